@@ -14,15 +14,24 @@ Handles various file sync patterns to AWS S3 with flexible configuration.
 Designed to be run with uv: `uv run s3_sync.py`
 """
 
+import fnmatch
+import functools
+import hashlib
+import json
 import os
 import sys
+import tempfile
+import threading
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
 import boto3
 import click
+from boto3.s3.transfer import TransferConfig
 from rich.console import Console
 from rich.table import Table
 from botocore.exceptions import ClientError
@@ -30,6 +39,61 @@ from botocore.exceptions import ClientError
 QUIET = os.environ.get("QUIET_MODE", "").lower() in ("1", "true", "yes")
 console = Console(quiet=QUIET)
 
+# Regions are synced in parallel, and each region uploads its files in parallel
+DEFAULT_REGION_WORKERS = 8
+DEFAULT_FILE_WORKERS = 8
+DEFAULT_DISCOVERY_WORKERS = 16
+
+# Bucket discovery and validation results are reused across runs for this long
+DEFAULT_DISCOVERY_TTL_SECONDS = 3600
+DEFAULT_DISCOVERY_CACHE = os.path.join(tempfile.gettempdir(), "s3sync-discovery.json")
+
+# Per-prefix record of uploaded content hashes used by incremental syncs
+MANIFEST_NAME = ".s3sync-manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Fixed zip entry timestamp (the earliest a zip can hold) so identical sources give identical bytes
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+STAT_KEYS = ("uploaded", "copied", "unchanged", "skipped", "failed")
+# Server-side copies at or above this size use parallel multipart copy (UploadPartCopy)
+MULTIPART_COPY_THRESHOLD = 64 * 1024 * 1024
+MULTIPART_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+# Uploads at or above the threshold go through the managed multipart transfer
+DEFAULT_MULTIPART_THRESHOLD_MB = 64
+DEFAULT_PART_SIZE_MB = 16
+DEFAULT_PART_CONCURRENCY = 8
+MB = 1024 * 1024
+THROUGHPUT_TABLE_ROWS = 20
+
+
+def _empty_stats() -> Dict[str, int]:
+    return {key: 0 for key in STAT_KEYS}
+
+
+def _rebase_key(key: str, source_prefix: str, dest_prefix: str) -> Optional[str]:
+    """Map a key under source_prefix to the same path under dest_prefix (None if it is outside)"""
+    if not source_prefix:
+        # An empty prefix is the bucket root - every key is under it
+        return f"{dest_prefix}/{key.lstrip('/')}" if dest_prefix else key
+    if not key.startswith(f"{source_prefix}/"):
+        return None
+    return f"{dest_prefix}{key[len(source_prefix):]}"
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_digests(path: str, size: int, mtime_ns: int) -> Tuple[str, str]:
+    sha256, md5 = hashlib.sha256(), hashlib.md5()  # nosec B324 - MD5 only to compare with S3 ETags
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+            md5.update(chunk)
+    return sha256.hexdigest(), md5.hexdigest()
+
+
+def _file_digests(file_path: Path) -> Tuple[str, str]:
+    """SHA-256 and MD5 of a file, hashed once per run unless the file changes"""
+    stat = file_path.stat()
+    return _cached_digests(str(file_path), stat.st_size, stat.st_mtime_ns)
+
 
 @dataclass
 class SyncConfig:
@@ -43,52 +107,355 @@ class SyncConfig:
     multi_region: bool = False
     dual_deployment: bool = False
     timestamp: str = None
+    incremental: bool = False
+    server_side_copy: bool = False
+
+
+class RemoteManifest:
+    """What a bucket prefix already holds, fetched with one manifest GET and one listing"""
+    
+    def __init__(self, s3_client, bucket: str, prefix: str, baseline_prefix: Optional[str] = None):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.manifest_key = f"{prefix}/{MANIFEST_NAME}".lstrip("/")
+        self._lock = threading.Lock()
+        loaded = self._load_manifest()
+        self.objects = self._list_objects(f"{prefix}/".lstrip("/"))
+        # Manifest entries for objects deleted out of band are stale
+        self.entries = {key: entry for key, entry in loaded.items() if key in self.objects}
+        # Only rewrite the manifest when something changed
+        self.dirty = len(self.entries) != len(loaded)
+        # A new versioned prefix starts empty - its unchanged content is copied from the baseline (latest)
+        self.baseline = None
+        if baseline_prefix is not None and baseline_prefix != prefix:
+            self.baseline = RemoteManifest(s3_client, bucket, baseline_prefix)
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.manifest_key)
+            return json.loads(response['Body'].read()).get("objects", {})
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                console.print(f"  ! Ignoring manifest s3://{self.bucket}/{self.manifest_key}: {e}", style="yellow")
+            return {}
+        except ValueError:
+            console.print(f"  ! Ignoring corrupt manifest s3://{self.bucket}/{self.manifest_key}", style="yellow")
+            return {}
+    
+    def _list_objects(self, prefix: str) -> Dict[str, Dict]:
+        objects = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                objects[obj['Key']] = {"size": obj['Size'], "etag": obj['ETag'].strip('"')}
+        return objects
+    
+    def is_unchanged(self, key: str, sha256: str, md5: str, size: int) -> bool:
+        """True when the object at key already has this content"""
+        remote = self.objects.get(key)
+        if remote is None or remote["size"] != size:
+            return False
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry.get("sha256") == sha256
+        # No manifest yet - single-part uploads have the MD5 as ETag
+        return remote["etag"] == md5
+    
+    def baseline_key(self, key: str, sha256: str, md5: str, size: int) -> Optional[str]:
+        """Key of the same file in the baseline prefix when it already has this content"""
+        if self.baseline is None:
+            return None
+        candidate = _rebase_key(key, self.prefix, self.baseline.prefix)
+        if candidate is not None and self.baseline.is_unchanged(candidate, sha256, md5, size):
+            return candidate
+        return None
+    
+    def record(self, key: str, sha256: str, size: int):
+        entry = {"sha256": sha256, "size": size}
+        with self._lock:
+            if self.entries.get(key) != entry:
+                self.entries[key] = entry
+                self.dirty = True
+    
+    def drop(self, key: str):
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self.dirty = True
+    
+    def save(self):
+        """Write the manifest in a single PUT, after every upload has finished"""
+        with self._lock:
+            body = json.dumps({"objects": dict(sorted(self.entries.items()))}, indent=1).encode()
+        self.s3_client.put_object(Bucket=self.bucket, Key=self.manifest_key, Body=body, ContentType='application/json')
+
+
+class DiscoveryCache:
+    """Regional bucket discovery and validation results kept in a local JSON file for a TTL"""
+    
+    def __init__(self, path: str = DEFAULT_DISCOVERY_CACHE, ttl_seconds: int = DEFAULT_DISCOVERY_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._data = self._load() if ttl_seconds > 0 else {}
+    
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _fresh(self, stamp: Optional[float]) -> bool:
+        return stamp is not None and time.time() - stamp < self.ttl_seconds
+    
+    def _save(self):
+        if self.ttl_seconds <= 0:
+            return
+        try:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._data, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            console.print(f"  ! Cannot write discovery cache {self.path}: {e}", style="yellow")
+    
+    def get_buckets(self, pattern: str) -> Optional[List[Dict[str, str]]]:
+        with self._lock:
+            entry = self._data.get("discovery", {}).get(pattern)
+        if entry and self._fresh(entry.get("timestamp")):
+            return entry["buckets"]
+        return None
+    
+    def put_buckets(self, pattern: str, buckets: List[Dict[str, str]]):
+        with self._lock:
+            self._data.setdefault("discovery", {})[pattern] = {"timestamp": time.time(), "buckets": buckets}
+            self._save()
+    
+    def is_validated(self, bucket: str) -> bool:
+        with self._lock:
+            return self._fresh(self._data.get("validated", {}).get(bucket))
+    
+    def mark_validated(self, bucket: str):
+        with self._lock:
+            self._data.setdefault("validated", {})[bucket] = time.time()
+            self._save()
+
+
+def _is_excluded(relative_path: Path, exclude_patterns: List[str]) -> bool:
+    """Match exclude patterns against each path component, as substrings or globs"""
+    return any(
+        pattern in part or fnmatch.fnmatch(part, pattern)
+        for part in relative_path.parts
+        for pattern in exclude_patterns
+    )
+
+
+class ZipCache:
+    """Builds each directory's zip once per run, content-addressed by its source hash"""
+    
+    def __init__(self):
+        self._dir = tempfile.TemporaryDirectory(prefix="s3sync-zips-")
+        self._lock = threading.Lock()
+        self._builds: Dict[str, threading.Lock] = {}
+        self.built = 0
+        self.reused = 0
+    
+    def _source_files(self, source_dir: Path, exclude_patterns: List[str]) -> List[Path]:
+        files = []
+        for file_path in source_dir.rglob('*'):
+            if file_path.is_file() and not _is_excluded(file_path.relative_to(source_dir), exclude_patterns):
+                files.append(file_path)
+        return sorted(files, key=lambda path: path.relative_to(source_dir).as_posix())
+    
+    def get(self, source_dir: Path, exclude_patterns: List[str]) -> Path:
+        """Path of the zip for source_dir, building it on first request"""
+        files = self._source_files(source_dir, exclude_patterns)
+        source_hash = hashlib.sha256()
+        for file_path in files:
+            source_hash.update(file_path.relative_to(source_dir).as_posix().encode() + b'\0')
+            source_hash.update(str(os.access(file_path, os.X_OK)).encode())
+            source_hash.update(_file_digests(file_path)[0].encode())
+        zip_path = Path(self._dir.name) / f"{source_dir.name}-{source_hash.hexdigest()[:16]}.zip"
+        
+        with self._lock:
+            build_lock = self._builds.setdefault(zip_path.name, threading.Lock())
+        # Regions asking for the same zip wait for a single build
+        with build_lock:
+            if zip_path.exists():
+                self.reused += 1
+                return zip_path
+            self._write_zip(source_dir, files, zip_path)
+            self.built += 1
+            return zip_path
+    
+    @staticmethod
+    def _write_zip(source_dir: Path, files: List[Path], output_path: Path):
+        """Reproducible zip: sorted entries, fixed timestamps, normalized permissions"""
+        tmp_path = output_path.with_suffix('.tmp')
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file_path in files:
+                info = zipfile.ZipInfo(file_path.relative_to(source_dir).as_posix(), date_time=ZIP_EPOCH)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.create_system = 3  # Unix, so external_attr carries the mode
+                mode = 0o755 if os.access(file_path, os.X_OK) else 0o644
+                info.external_attr = (0o100000 | mode) << 16
+                zipf.writestr(info, file_path.read_bytes())
+        os.replace(tmp_path, output_path)
 
 
 class S3Syncer:
     """Handles S3 sync operations with various strategies"""
     
-    def __init__(self, region: str = "us-east-1"):
+    def __init__(self, region: str = "us-east-1", region_workers: int = DEFAULT_REGION_WORKERS,
+                 file_workers: int = DEFAULT_FILE_WORKERS, discovery_cache: DiscoveryCache = None,
+                 multipart_threshold_mb: int = DEFAULT_MULTIPART_THRESHOLD_MB, part_size_mb: int = DEFAULT_PART_SIZE_MB,
+                 part_concurrency: int = DEFAULT_PART_CONCURRENCY):
         self.s3_client = boto3.client('s3', region_name=region)
         self.region = region
+        self.region_workers = max(1, region_workers)
+        self.file_workers = max(1, file_workers)
+        # S3 parts must be at least 5 MiB (except the last)
+        self.multipart_threshold = max(5, multipart_threshold_mb) * MB
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=max(5, part_size_mb) * MB,
+            max_concurrency=max(1, part_concurrency),
+        )
+        # One record per upload for the throughput report
+        self.transfers: List[Dict] = []
+        self._transfers_lock = threading.Lock()
+        # One client per region, shared by that region's upload threads
+        self._clients = {region: self.s3_client}
+        self._clients_lock = threading.Lock()
+        # Shared by every region and by the versioned and latest paths
+        self.zip_cache = ZipCache()
+        # Objects now in place per bucket (key -> local source), the sources of server-side copies
+        self._published: Dict[str, Dict[str, Path]] = {}
+        self._published_lock = threading.Lock()
+        self.discovery_cache = discovery_cache or DiscoveryCache(ttl_seconds=0)
+        # Buckets found during discovery that failed the access check
+        self._validation_errors: Dict[str, str] = {}
+        # Candidates (or the bucket listing) discovery could not resolve - reported as failed regions
+        self._discovery_errors: Dict[str, str] = {}
+
+    def _client_for(self, region: str):
+        """Return the cached S3 client for a region"""
+        # Client creation is not thread-safe, using a client is
+        with self._clients_lock:
+            if region not in self._clients:
+                self._clients[region] = boto3.client('s3', region_name=region)
+            return self._clients[region]
+
+    def _run_jobs(self, jobs: List[Tuple[str, Callable[[], Optional[str]]]], stats: Dict[str, int],
+                  done_key: str = "uploaded"):
+        """Run upload/copy jobs on a bounded pool, counting each as done, unchanged or failed
+        
+        Jobs return None when the remote object is already up to date, otherwise a
+        message, or a (stat key, message) pair to count it under another stat.
+        """
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.file_workers, len(jobs))) as executor:
+            futures = {executor.submit(job): label for label, job in jobs}
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    message = future.result()
+                    if message is None:
+                        stats["unchanged"] += 1
+                    else:
+                        stat, message = message if isinstance(message, tuple) else (done_key, message)
+                        console.print(message)
+                        stats[stat] += 1
+                except Exception as e:
+                    console.print(f"  ✗ Failed: {label} - {e}", style="red")
+                    stats["failed"] += 1
         
     def discover_regional_buckets(self, bucket_pattern: str) -> List[Dict[str, str]]:
-        """Discover regional S3 buckets based on naming pattern"""
+        """
+        Discover regional S3 buckets ({pattern}-{region}) and validate them in one parallel pass
+        
+        A bucket's region comes from S3 (GetBucketLocation), not from its name; the
+        name only has to end in the region it reports. Results are cached for the
+        discovery TTL, so repeated runs skip the round-trips. Candidates whose
+        location cannot be read are kept in _discovery_errors and reported as
+        failed regions, so a missing permission or throttling fails the run.
+        """
+        cached = self.discovery_cache.get_buckets(bucket_pattern)
+        if cached is not None:
+            console.print(f"[cyan]Using cached discovery for {bucket_pattern}: {len(cached)} regional buckets")
+            return cached
+        
         try:
             console.print(f"[cyan]Discovering regional buckets matching pattern: {bucket_pattern}")
             
             response = self.s3_client.list_buckets()
-            regional_buckets = []
+            candidates = [b['Name'] for b in response['Buckets'] if b['Name'].startswith(f"{bucket_pattern}-")]
+            if not candidates:
+                console.print("[green]Discovered 0 regional buckets")
+                return []
             
-            for bucket in response['Buckets']:
-                bucket_name = bucket['Name']
-                if bucket_pattern in bucket_name:
-                    # Extract region from bucket name (assuming format: {pattern}-{region})
-                    if bucket_name.startswith(bucket_pattern):
-                        region_suffix = bucket_name[len(bucket_pattern):]
-                        if region_suffix.startswith('-') and len(region_suffix) > 1:
-                            region = region_suffix[1:]  # Remove leading dash
-                            
-                            # Skip buckets that don't follow the regional pattern (e.g., templates buckets)
-                            # Valid regions should match AWS region format: us-east-1, eu-west-1, etc.
-                            if region and ('-' in region or region in ['us-gov-west-1', 'us-gov-east-1']) and not region.endswith('templates'):
-                                regional_buckets.append({
-                                    'bucket': bucket_name,
-                                    'region': region
-                                })
-                                console.print(f"  ✓ Found: {bucket_name} (region: {region})")
-                            else:
-                                console.print(f"  - Skipped: {bucket_name} (not a regional bucket: {region})", style="dim")
+            with ThreadPoolExecutor(max_workers=min(DEFAULT_DISCOVERY_WORKERS, len(candidates))) as executor:
+                probes = list(executor.map(lambda name: self._probe_bucket(name, bucket_pattern), candidates))
             
+            regional_buckets = []
+            for bucket_name, region, error in probes:
+                if region is None:
+                    self._discovery_errors[bucket_name] = f"Cannot read bucket location: {error}"
+                    console.print(f"  ✗ Unresolved: {bucket_name} (cannot read location: {error})", style="red")
+                elif bucket_name != f"{bucket_pattern}-{region}":
+                    # e.g. a templates bucket - not one of the per-region buckets
+                    console.print(f"  - Skipped: {bucket_name} (not a regional bucket, located in {region})", style="dim")
+                else:
+                    regional_buckets.append({'bucket': bucket_name, 'region': region})
+                    if error:
+                        self._validation_errors[bucket_name] = error
+                        console.print(f"  ✗ Found: {bucket_name} (region: {region}) - not accessible: {error}", style="red")
+                    else:
+                        console.print(f"  ✓ Found: {bucket_name} (region: {region})")
+            
+            regional_buckets.sort(key=lambda b: b['region'])
             console.print(f"[green]Discovered {len(regional_buckets)} regional buckets")
+            # Partial or empty results are re-checked on the next run
+            if regional_buckets and not self._validation_errors and not self._discovery_errors:
+                self.discovery_cache.put_buckets(bucket_pattern, regional_buckets)
             return regional_buckets
             
         except Exception as e:
             console.print(f"[red]Error discovering regional buckets: {e}")
+            self._discovery_errors["ListBuckets"] = f"Bucket discovery failed: {e}"
             return []
+    
+    def _discovery_failures(self) -> Dict[str, Dict[str, int]]:
+        """Failure stats for each candidate discovery could not resolve, keyed like regions"""
+        return {
+            f"unresolved ({name})": {**_empty_stats(), "failed": 1, "error": error}
+            for name, error in sorted(self._discovery_errors.items())
+        }
+    
+    def _probe_bucket(self, bucket_name: str, bucket_pattern: str) -> Tuple[str, Optional[str], Optional[str]]:
+        """Region and access check of one bucket: (bucket, region or None, error or None)"""
+        try:
+            location = self.s3_client.get_bucket_location(Bucket=bucket_name).get('LocationConstraint')
+        except Exception as e:
+            return bucket_name, None, str(e)
+        # Legacy location values: None is us-east-1, EU is eu-west-1
+        region = {None: 'us-east-1', '': 'us-east-1', 'EU': 'eu-west-1'}.get(location, location)
+        if bucket_name != f"{bucket_pattern}-{region}":
+            return bucket_name, region, None
+        try:
+            self._client_for(region).head_bucket(Bucket=bucket_name)
+        except Exception as e:
+            return bucket_name, region, str(e)
+        self.discovery_cache.mark_validated(bucket_name)
+        return bucket_name, region, None
         
     def validate_bucket(self, bucket: str) -> bool:
         """Validate that the bucket exists and is accessible"""
+        if self.discovery_cache.is_validated(bucket):
+            console.print(f"[cyan]Bucket {bucket} validated recently (cached)")
+            return True
         try:
             console.print(f"[cyan]Validating bucket access: {bucket}")
             
@@ -109,6 +476,7 @@ class S3Syncer:
                 self.s3_client.delete_object(Bucket=bucket, Key=test_key)
                 
                 console.print(f"  ✓ Bucket {bucket} exists and is writable")
+                self.discovery_cache.mark_validated(bucket)
                 return True
                 
             except ClientError as e:
@@ -142,15 +510,12 @@ class S3Syncer:
         
     def sync_files(self, config: SyncConfig, target_bucket: str = None, target_region: str = None) -> Dict[str, int]:
         """Sync individual files to S3"""
-        stats = {"uploaded": 0, "skipped": 0, "failed": 0}
+        stats = _empty_stats()
         
         bucket = target_bucket or config.bucket
         region = target_region or self.region
-        
-        # Use specific region client if different
-        s3_client = self.s3_client
-        if region != self.region:
-            s3_client = boto3.client('s3', region_name=region)
+        s3_client = self._client_for(region)
+        remote = self._remote_manifest(config, s3_client, bucket)
         
         console.print(f"[cyan]Syncing files from {config.source_path} to s3://{bucket}/{config.prefix} (region: {region})")
         
@@ -164,6 +529,7 @@ class S3Syncer:
         else:
             files = list(config.source_path.glob(config.pattern))
         
+        jobs = []
         for file_path in files:
             if file_path.is_file():
                 # Check exclusions
@@ -175,27 +541,26 @@ class S3Syncer:
                 relative_path = file_path.relative_to(config.source_path)
                 s3_key = f"{config.prefix}/{relative_path}".replace("//", "/")
                 
-                try:
-                    self._upload_file(file_path, bucket, s3_key, s3_client)
-                    console.print(f"  ✓ Uploaded: {relative_path} → {s3_key}")
-                    stats["uploaded"] += 1
-                except Exception as e:
-                    console.print(f"  ✗ Failed: {relative_path} - {e}", style="red")
-                    stats["failed"] += 1
-                    
+                def upload(file_path=file_path, s3_key=s3_key, relative_path=relative_path):
+                    action = self._sync_file(file_path, bucket, s3_key, region, remote)
+                    if action is None:
+                        return None
+                    return action, f"  ✓ {action.capitalize()}: {relative_path} → {s3_key} ({region})"
+                
+                jobs.append((str(relative_path), upload))
+        
+        self._run_jobs(jobs, stats)
+        self._save_manifest(remote)
         return stats
     
     def create_and_sync_zips(self, config: SyncConfig, target_bucket: str = None, target_region: str = None) -> Dict[str, int]:
         """Create ZIP files from directories and sync to S3"""
-        stats = {"uploaded": 0, "skipped": 0, "failed": 0}
+        stats = _empty_stats()
         
         bucket = target_bucket or config.bucket
         region = target_region or self.region
-        
-        # Use specific region client if different
-        s3_client = self.s3_client
-        if region != self.region:
-            s3_client = boto3.client('s3', region_name=region)
+        s3_client = self._client_for(region)
+        remote = self._remote_manifest(config, s3_client, bucket)
         
         console.print(f"[cyan]Creating ZIPs from {config.source_path} and syncing to s3://{bucket}/{config.prefix} (region: {region})")
         
@@ -204,6 +569,7 @@ class S3Syncer:
             # Get immediate subdirectories
             dirs_to_zip = [d for d in config.source_path.iterdir() if d.is_dir()]
             
+            jobs = []
             for dir_path in dirs_to_zip:
                 # Skip excluded directories
                 if any(pattern in dir_path.name for pattern in config.exclude_patterns):
@@ -211,42 +577,34 @@ class S3Syncer:
                     continue
                 
                 zip_name = f"{dir_path.name}.zip"
-                zip_path = Path(f"/tmp/{zip_name}")
+                s3_key = f"{config.prefix}/{zip_name}".replace("//", "/")
                 
-                try:
-                    # Create ZIP file
-                    self._create_zip(dir_path, zip_path)
-                    
-                    # Upload to S3
-                    s3_key = f"{config.prefix}/{zip_name}".replace("//", "/")
-                    self._upload_file(zip_path, bucket, s3_key, s3_client)
-                    
-                    console.print(f"  ✓ Zipped & Uploaded: {dir_path.name} → {s3_key}")
-                    stats["uploaded"] += 1
-                    
-                    # Clean up temp file
-                    zip_path.unlink()
-                    
-                except Exception as e:
-                    console.print(f"  ✗ Failed: {dir_path.name} - {e}", style="red")
-                    stats["failed"] += 1
+                def zip_and_upload(dir_path=dir_path, s3_key=s3_key):
+                    zip_path = self.zip_cache.get(dir_path, config.exclude_patterns)
+                    action = self._sync_file(zip_path, bucket, s3_key, region, remote)
+                    if action is None:
+                        return None
+                    return action, f"  ✓ Zipped & {action.capitalize()}: {dir_path.name} → {s3_key} ({region})"
+                
+                jobs.append((dir_path.name, zip_and_upload))
+            
+            self._run_jobs(jobs, stats)
+            self._save_manifest(remote)
                     
         return stats
     
     def sync_directory(self, config: SyncConfig, target_bucket: str = None, target_region: str = None) -> Dict[str, int]:
         """Sync entire directory structure to S3"""
-        stats = {"uploaded": 0, "skipped": 0, "failed": 0}
+        stats = _empty_stats()
         
         bucket = target_bucket or config.bucket
         region = target_region or self.region
-        
-        # Use specific region client if different
-        s3_client = self.s3_client
-        if region != self.region:
-            s3_client = boto3.client('s3', region_name=region)
+        s3_client = self._client_for(region)
+        remote = self._remote_manifest(config, s3_client, bucket)
         
         console.print(f"[cyan]Syncing directory {config.source_path} to s3://{bucket}/{config.prefix} (region: {region})")
         
+        jobs = []
         for root, dirs, files in os.walk(config.source_path):
             root_path = Path(root)
             
@@ -265,34 +623,190 @@ class S3Syncer:
                 relative_path = file_path.relative_to(config.source_path)
                 s3_key = f"{config.prefix}/{relative_path}".replace("//", "/")
                 
+                def upload(file_path=file_path, s3_key=s3_key, relative_path=relative_path):
+                    action = self._sync_file(file_path, bucket, s3_key, region, remote)
+                    if action is None:
+                        return None
+                    return action, f"  ✓ {action.capitalize()}: {relative_path} ({region})"
+                
+                jobs.append((str(relative_path), upload))
+        
+        self._run_jobs(jobs, stats)
+        self._save_manifest(remote)
+        return stats
+    
+    def _remote_manifest(self, config: SyncConfig, s3_client, bucket: str) -> Optional[RemoteManifest]:
+        """Fetch what the target prefix (and, for a new version, the latest prefix) already holds when syncing incrementally"""
+        if not config.incremental:
+            return None
+        # Every release writes a fresh versions/<timestamp> prefix - compare against the previous release in latest
+        baseline_prefix = self._latest_prefix(config) if config.dual_deployment and config.timestamp else None
+        remote = RemoteManifest(s3_client, bucket, config.prefix, baseline_prefix)
+        console.print(f"  Incremental: {len(remote.objects)} objects, {len(remote.entries)} manifest entries under s3://{bucket}/{config.prefix}")
+        if remote.baseline is not None:
+            console.print(f"  Baseline: {len(remote.baseline.objects)} objects, {len(remote.baseline.entries)} manifest entries under s3://{bucket}/{remote.baseline.prefix}")
+        return remote
+    
+    def _save_manifest(self, remote: Optional[RemoteManifest]):
+        if remote is None or not remote.dirty:
+            return
+        try:
+            remote.save()
+        except Exception as e:
+            # Only costs re-uploads on the next run
+            console.print(f"  ! Failed to write manifest s3://{remote.bucket}/{remote.manifest_key}: {e}", style="yellow")
+    
+    def _sync_file(self, file_path: Path, bucket: str, key: str, region: str,
+                   remote: Optional[RemoteManifest]) -> Optional[str]:
+        """
+        Put a file at key unless the remote copy has the same content
+        
+        Content the baseline prefix already holds is copied inside the bucket
+        instead of uploaded. Returns "uploaded", "copied", or None when unchanged.
+        """
+        s3_client = self._client_for(region)
+        if remote is None:
+            self._upload_file(file_path, bucket, key, s3_client)
+            self._record_published(bucket, key, file_path)
+            return "uploaded"
+        
+        sha256, md5 = _file_digests(file_path)
+        size = file_path.stat().st_size
+        if remote.is_unchanged(key, sha256, md5, size):
+            remote.record(key, sha256, size)
+            self._record_published(bucket, key, file_path)
+            return None
+        source_key = remote.baseline_key(key, sha256, md5, size)
+        try:
+            if source_key is not None:
+                self._copy_object(bucket, region, source_key, bucket, region, key, size, file_path, sha256)
+            else:
+                self._upload_file(file_path, bucket, key, s3_client, metadata={'sha256': sha256})
+        except Exception:
+            # Unknown remote state - make the next run upload it again
+            remote.drop(key)
+            raise
+        remote.record(key, sha256, size)
+        self._record_published(bucket, key, file_path)
+        return "uploaded" if source_key is None else "copied"
+    
+    def _record_published(self, bucket: str, key: str, file_path: Path):
+        with self._published_lock:
+            self._published.setdefault(bucket, {})[key] = file_path
+    
+    def copy_objects(self, source_bucket: str, source_region: str, source_prefix: str,
+                     dest_bucket: str, dest_region: str, dest_prefix: str, incremental: bool = False,
+                     baseline_prefix: Optional[str] = None) -> Dict[str, int]:
+        """
+        Server-side copy the objects this run published under source_prefix to dest_prefix
+        
+        When incremental, objects whose content dest_bucket already holds under
+        baseline_prefix are copied from there, inside the destination region.
+        """
+        stats = _empty_stats()
+        with self._published_lock:
+            published = {
+                key: path for key, path in self._published.get(source_bucket, {}).items()
+                if _rebase_key(key, source_prefix, dest_prefix) is not None
+            }
+        
+        dest_client = self._client_for(dest_region)
+        remote = RemoteManifest(dest_client, dest_bucket, dest_prefix, baseline_prefix) if incremental else None
+        console.print(f"[cyan]Copying {len(published)} objects s3://{source_bucket}/{source_prefix} → s3://{dest_bucket}/{dest_prefix} (region: {dest_region})")
+        
+        jobs = []
+        for source_key, file_path in sorted(published.items()):
+            dest_key = _rebase_key(source_key, source_prefix, dest_prefix)
+            
+            def copy(source_key=source_key, dest_key=dest_key, file_path=file_path):
+                sha256, md5 = _file_digests(file_path)
+                size = file_path.stat().st_size
+                if remote is not None and remote.is_unchanged(dest_key, sha256, md5, size):
+                    remote.record(dest_key, sha256, size)
+                    self._record_published(dest_bucket, dest_key, file_path)
+                    return None
+                baseline_key = remote.baseline_key(dest_key, sha256, md5, size) if remote is not None else None
                 try:
-                    self._upload_file(file_path, bucket, s3_key, s3_client)
-                    console.print(f"  ✓ Uploaded: {relative_path}")
-                    stats["uploaded"] += 1
-                except Exception as e:
-                    console.print(f"  ✗ Failed: {relative_path} - {e}", style="red")
-                    stats["failed"] += 1
-                    
+                    if baseline_key is not None:
+                        self._copy_object(dest_bucket, dest_region, baseline_key, dest_bucket, dest_region, dest_key,
+                                          size, file_path, sha256)
+                    else:
+                        self._copy_object(source_bucket, source_region, source_key, dest_bucket, dest_region, dest_key,
+                                          size, file_path, sha256)
+                except Exception:
+                    if remote is not None:
+                        remote.drop(dest_key)
+                    raise
+                if remote is not None:
+                    remote.record(dest_key, sha256, size)
+                # Copies are sources too - 'latest' is copied from each region's versioned objects
+                self._record_published(dest_bucket, dest_key, file_path)
+                return f"  ✓ Copied: {source_key} → {dest_key} ({dest_region})"
+            
+            jobs.append((source_key, copy))
+        
+        self._run_jobs(jobs, stats, done_key="copied")
+        self._save_manifest(remote)
         return stats
     
-    def _upload_file(self, file_path: Path, bucket: str, key: str, s3_client=None):
-        """Upload a single file to S3"""
+    def _copy_object(self, source_bucket: str, source_region: str, source_key: str, dest_bucket: str,
+                     dest_region: str, dest_key: str, size: int, file_path: Path, sha256: str):
+        """Copy one object inside S3 - no bytes pass through the runner"""
+        dest_client = self._client_for(dest_region)
+        copy_source = {'Bucket': source_bucket, 'Key': source_key}
+        if size < MULTIPART_COPY_THRESHOLD:
+            dest_client.copy_object(CopySource=copy_source, Bucket=dest_bucket, Key=dest_key, MetadataDirective='COPY')
+            return
+        # Multipart copies do not carry metadata over - set it explicitly
+        dest_client.copy(
+            copy_source,
+            dest_bucket,
+            dest_key,
+            ExtraArgs={'ContentType': self._get_content_type(file_path), 'Metadata': {'sha256': sha256}},
+            SourceClient=self._client_for(source_region),
+            Config=TransferConfig(
+                multipart_threshold=MULTIPART_COPY_THRESHOLD,
+                multipart_chunksize=MULTIPART_COPY_CHUNK_SIZE,
+                max_concurrency=self.file_workers,
+            ),
+        )
+    
+    def _upload_file(self, file_path: Path, bucket: str, key: str, s3_client=None, metadata: Dict[str, str] = None):
+        """Upload a single file to S3 - one PUT for small files, managed multipart for large ones"""
         client = s3_client or self.s3_client
-        with open(file_path, 'rb') as f:
-            client.put_object(
-                Bucket=bucket,
-                Key=key,
-                Body=f,
-                ContentType=self._get_content_type(file_path)
+        extra = {'Metadata': metadata} if metadata else {}
+        size = file_path.stat().st_size
+        start = time.time()
+        # S3 verifies the SHA-256 checksum of the object (of every part for multipart)
+        if size < self.multipart_threshold:
+            method = "put"
+            with open(file_path, 'rb') as f:
+                client.put_object(
+                    Bucket=bucket,
+                    Key=key,
+                    Body=f,
+                    ContentType=self._get_content_type(file_path),
+                    ChecksumAlgorithm='SHA256',
+                    **extra
+                )
+        else:
+            # Parts are retried individually, so a flaky network does not restart the whole file
+            method = "multipart"
+            client.upload_file(
+                str(file_path),
+                bucket,
+                key,
+                ExtraArgs={'ContentType': self._get_content_type(file_path), 'ChecksumAlgorithm': 'SHA256', **extra},
+                Config=self.transfer_config,
             )
-    
-    def _create_zip(self, source_dir: Path, output_path: Path):
-        """Create a ZIP file from a directory"""
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in source_dir.rglob('*'):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(source_dir)
-                    zipf.write(file_path, arcname)
+        with self._transfers_lock:
+            self.transfers.append({
+                "key": key,
+                "region": client.meta.region_name,
+                "bytes": size,
+                "seconds": time.time() - start,
+                "method": method,
+            })
     
     def _get_content_type(self, file_path: Path) -> str:
         """Determine content type based on file extension"""
@@ -312,62 +826,82 @@ class S3Syncer:
         
         if not regional_buckets:
             console.print(f"[yellow]No regional buckets found for pattern: {bucket_pattern}")
-            return {}
+            return self._discovery_failures()
+        
+        console.print(f"[cyan]Syncing {len(regional_buckets)} regions ({min(self.region_workers, len(regional_buckets))} at a time)")
         
         results = {}
+        with ThreadPoolExecutor(max_workers=min(self.region_workers, len(regional_buckets))) as executor:
+            futures = {
+                executor.submit(self._sync_region, config, bucket_info['bucket'], bucket_info['region']): bucket_info['region']
+                for bucket_info in regional_buckets
+            }
+            for future in as_completed(futures):
+                region = futures[future]
+                try:
+                    results[region] = future.result()
+                except Exception as e:
+                    console.print(f"[red]Failed to sync to {region}: {e}")
+                    results[region] = {"uploaded": 0, "skipped": 0, "failed": 1}
         
-        for bucket_info in regional_buckets:
-            bucket_name = bucket_info['bucket']
-            region = bucket_info['region']
-            
-            console.print(f"\n[bold blue]Syncing to region: {region}[/bold blue]")
-            
-            # Validate regional bucket access before syncing
-            try:
-                # Create region-specific S3 client for validation
-                regional_s3_client = boto3.client('s3', region_name=region)
-                regional_s3_client.head_bucket(Bucket=bucket_name)
-                console.print(f"  ✓ Regional bucket {bucket_name} validated")
-            except Exception as e:
-                console.print(f"  ✗ Regional bucket {bucket_name} validation failed: {e}", style="red")
-                console.print(f"  Skipping region {region}", style="yellow")
-                results[region] = {"uploaded": 0, "skipped": 0, "failed": 1, "error": f"Bucket validation failed: {e}"}
-                continue
-            
-            try:
-                if config.sync_type == 'files':
-                    stats = self.sync_files(config, bucket_name, region)
-                elif config.sync_type == 'zip':
-                    stats = self.create_and_sync_zips(config, bucket_name, region)
-                elif config.sync_type == 'directory':
-                    stats = self.sync_directory(config, bucket_name, region)
-                else:
-                    console.print(f"[red]Unknown sync type: {config.sync_type}")
-                    results[region] = {"uploaded": 0, "skipped": 0, "failed": 1, "error": f"Unknown sync type: {config.sync_type}"}
-                    continue
-                
-                results[region] = stats
-                
-            except Exception as e:
-                console.print(f"[red]Failed to sync to {region}: {e}")
-                results[region] = {"uploaded": 0, "skipped": 0, "failed": 1}
+        results.update(self._discovery_failures())
+        # Stable order for the summary regardless of completion order
+        return dict(sorted(results.items()))
+    
+    def _sync_region(self, config: SyncConfig, bucket_name: str, region: str) -> Dict[str, int]:
+        """Validate one regional bucket and sync to it"""
+        console.print(f"[bold blue]Syncing to region: {region}[/bold blue]")
         
-        return results
+        error = self._validate_regional_bucket(bucket_name, region)
+        if error:
+            return error
+        return self._sync_by_type(config, bucket_name, region)
+    
+    def _validate_regional_bucket(self, bucket_name: str, region: str) -> Optional[Dict[str, int]]:
+        """Failure stats when the regional bucket is not usable, None when it is"""
+        try:
+            if bucket_name in self._validation_errors:
+                raise RuntimeError(self._validation_errors[bucket_name])
+            # Discovery already checked it, now or in a cached run
+            if not self.discovery_cache.is_validated(bucket_name):
+                self._client_for(region).head_bucket(Bucket=bucket_name)
+                self.discovery_cache.mark_validated(bucket_name)
+            console.print(f"  ✓ Regional bucket {bucket_name} validated")
+            return None
+        except Exception as e:
+            console.print(f"  ✗ Regional bucket {bucket_name} validation failed: {e}", style="red")
+            console.print(f"  Skipping region {region}", style="yellow")
+            return {"uploaded": 0, "skipped": 0, "failed": 1, "error": f"Bucket validation failed: {e}"}
+    
+    def _sync_by_type(self, config: SyncConfig, bucket_name: str = None, region: str = None) -> Dict[str, int]:
+        if config.sync_type == 'files':
+            return self.sync_files(config, bucket_name, region)
+        elif config.sync_type == 'zip':
+            return self.create_and_sync_zips(config, bucket_name, region)
+        elif config.sync_type == 'directory':
+            return self.sync_directory(config, bucket_name, region)
+        console.print(f"[red]Unknown sync type: {config.sync_type}")
+        return {"uploaded": 0, "skipped": 0, "failed": 1, "error": f"Unknown sync type: {config.sync_type}"}
+    
+    def _latest_prefix(self, config: SyncConfig) -> str:
+        if config.timestamp and 'versions/' in config.prefix:
+            return config.prefix.replace(f'versions/{config.timestamp}', 'latest')
+        if config.timestamp:
+            return config.prefix.replace(config.timestamp, 'latest')
+        return f"{config.prefix}/latest".lstrip('/')
     
     def sync_with_dual_deployment(self, config: SyncConfig, bucket_pattern: str = None) -> Dict[str, any]:
         """Sync with both timestamp and latest paths"""
+        if config.server_side_copy:
+            return self.publish_with_server_side_copy(config, bucket_pattern)
+        
         results = {"timestamp": {}, "latest": {}}
         
         # First sync with timestamp path
         if config.multi_region and bucket_pattern:
             results["timestamp"] = self.sync_multi_region(config, bucket_pattern)
         else:
-            if config.sync_type == 'files':
-                results["timestamp"][self.region] = self.sync_files(config)
-            elif config.sync_type == 'zip':
-                results["timestamp"][self.region] = self.create_and_sync_zips(config)
-            elif config.sync_type == 'directory':
-                results["timestamp"][self.region] = self.sync_directory(config)
+            results["timestamp"][self.region] = self._sync_by_type(config)
         
         # Then sync with latest path if dual deployment enabled
         if config.dual_deployment:
@@ -376,27 +910,125 @@ class S3Syncer:
             # Create config for latest path
             latest_config = SyncConfig(
                 bucket=config.bucket,
-                prefix=config.prefix.replace(f'versions/{config.timestamp}', 'latest') if config.timestamp and 'versions/' in config.prefix else config.prefix.replace(config.timestamp, 'latest') if config.timestamp else f"{config.prefix}/latest",
+                prefix=self._latest_prefix(config),
                 source_path=config.source_path,
                 pattern=config.pattern,
                 sync_type=config.sync_type,
                 exclude_patterns=config.exclude_patterns,
                 multi_region=config.multi_region,
                 dual_deployment=False,  # Prevent infinite recursion
-                timestamp=None
+                timestamp=None,
+                incremental=config.incremental
             )
             
             if config.multi_region and bucket_pattern:
                 results["latest"] = self.sync_multi_region(latest_config, bucket_pattern)
             else:
-                if config.sync_type == 'files':
-                    results["latest"][self.region] = self.sync_files(latest_config)
-                elif config.sync_type == 'zip':
-                    results["latest"][self.region] = self.create_and_sync_zips(latest_config)
-                elif config.sync_type == 'directory':
-                    results["latest"][self.region] = self.sync_directory(latest_config)
+                results["latest"][self.region] = self._sync_by_type(latest_config)
+        
+        return results
+    
+    def publish_with_server_side_copy(self, config: SyncConfig, bucket_pattern: str = None) -> Dict[str, any]:
+        """
+        Upload each file once, then build every other copy inside S3
+        
+        Multi-region: the versioned prefix is uploaded to the primary bucket (the
+        one in the syncer's region) and copied to the other regional buckets.
+        Dual deployment: 'latest' is copied from the versioned objects within
+        each bucket.
+        """
+        results = {"timestamp": {}, "latest": {}}
+        
+        if config.multi_region and bucket_pattern:
+            targets = self.discover_regional_buckets(bucket_pattern)
+            results["timestamp"].update(self._discovery_failures())
+            if not targets:
+                console.print(f"[yellow]No regional buckets found for pattern: {bucket_pattern}")
+                return results
+            primary = next((t for t in targets if t['region'] == self.region), targets[0])
+        else:
+            primary = {'bucket': config.bucket, 'region': self.region}
+            targets = [primary]
+        
+        console.print(f"[bold]Uploading once to s3://{primary['bucket']}/{config.prefix} ({primary['region']}), copying server-side from there[/bold]")
+        primary_stats = self._sync_region(config, primary['bucket'], primary['region']) if config.multi_region else self._sync_by_type(config)
+        results["timestamp"][primary['region']] = primary_stats
+        latest_prefix = self._latest_prefix(config)
+        # With dual deployment the previous release is in latest - unchanged objects are copied from there
+        baseline_prefix = latest_prefix if config.dual_deployment and config.timestamp else None
+        
+        def replicate(target: Dict[str, str]) -> Dict[str, int]:
+            if "error" in primary_stats:
+                return {"uploaded": 0, "skipped": 0, "failed": 1, "error": "Primary upload failed"}
+            error = self._validate_regional_bucket(target['bucket'], target['region'])
+            if error:
+                return error
+            return self.copy_objects(primary['bucket'], primary['region'], config.prefix,
+                                     target['bucket'], target['region'], config.prefix, config.incremental,
+                                     baseline_prefix=baseline_prefix)
+        
+        others = [t for t in targets if t is not primary]
+        results["timestamp"].update(self._for_each_region(others, replicate))
+        
+        if config.dual_deployment:
+            console.print(f"\n[bold yellow]Copying to '{latest_prefix}' server-side[/bold yellow]")
+            reachable = [t for t in targets if "error" not in results["timestamp"].get(t['region'], {})]
+            
+            def promote(target: Dict[str, str]) -> Dict[str, int]:
+                return self.copy_objects(target['bucket'], target['region'], config.prefix,
+                                         target['bucket'], target['region'], latest_prefix, config.incremental)
+            
+            results["latest"] = self._for_each_region(reachable, promote)
         
+        results["timestamp"] = dict(sorted(results["timestamp"].items()))
         return results
+    
+    def _for_each_region(self, targets: List[Dict[str, str]], work: Callable[[Dict[str, str]], Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+        """Run work for each regional bucket on the region pool"""
+        results = {}
+        if not targets:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.region_workers, len(targets))) as executor:
+            futures = {executor.submit(work, target): target['region'] for target in targets}
+            for future in as_completed(futures):
+                region = futures[future]
+                try:
+                    results[region] = future.result()
+                except Exception as e:
+                    console.print(f"[red]Failed in {region}: {e}")
+                    results[region] = {"uploaded": 0, "skipped": 0, "failed": 1}
+        return dict(sorted(results.items()))
+
+
+def print_throughput(transfers: List[Dict]):
+    """Per-file upload throughput, largest files first"""
+    if not transfers:
+        return
+    table = Table(title="Upload Throughput")
+    table.add_column("Key", style="cyan")
+    table.add_column("Region", style="cyan")
+    table.add_column("Method")
+    table.add_column("MiB", justify="right")
+    table.add_column("Seconds", justify="right")
+    table.add_column("MiB/s", style="green", justify="right")
+    ranked = sorted(transfers, key=lambda t: t["bytes"], reverse=True)
+    for transfer in ranked[:THROUGHPUT_TABLE_ROWS]:
+        seconds = max(transfer["seconds"], 1e-6)
+        table.add_row(
+            transfer["key"],
+            transfer["region"],
+            transfer["method"],
+            f"{transfer['bytes'] / MB:.2f}",
+            f"{transfer['seconds']:.2f}",
+            f"{transfer['bytes'] / MB / seconds:.1f}",
+        )
+    total_bytes = sum(t["bytes"] for t in transfers)
+    total_seconds = max(sum(t["seconds"] for t in transfers), 1e-6)
+    table.caption = (
+        f"{len(transfers)} uploads, {total_bytes / MB:.1f} MiB, {total_bytes / MB / total_seconds:.1f} MiB/s per stream"
+        + (f" (largest {THROUGHPUT_TABLE_ROWS} shown)" if len(transfers) > THROUGHPUT_TABLE_ROWS else "")
+    )
+    console.print(table)
 
 
 @click.command()
@@ -416,9 +1048,21 @@ class S3Syncer:
 @click.option('--bucket-pattern', envvar='BUCKET_PATTERN', help='Base bucket pattern for multi-region discovery (e.g., "cyngular-onboarding")')
 @click.option('--dual-deployment', envvar='DUAL_DEPLOYMENT', is_flag=True, help='Deploy to both timestamp and latest paths')
 @click.option('--timestamp', envvar='TIMESTAMP', help='Timestamp for versioned deployment')
+@click.option('--incremental', envvar='INCREMENTAL', is_flag=True, help='Skip files whose content is already in S3 (per-prefix manifest); new versions copy unchanged files from latest')
+@click.option('--server-side-copy', envvar='SERVER_SIDE_COPY', is_flag=True, help='Upload once, build latest and other regions with S3 server-side copies')
+@click.option('--discovery-cache', envvar='DISCOVERY_CACHE', default=DEFAULT_DISCOVERY_CACHE, help='File caching bucket discovery/validation')
+@click.option('--discovery-ttl', envvar='DISCOVERY_TTL_SECONDS', type=int, default=DEFAULT_DISCOVERY_TTL_SECONDS, help='Discovery cache TTL in seconds (0 disables)')
+@click.option('--multipart-threshold-mb', envvar='MULTIPART_THRESHOLD_MB', type=int, default=DEFAULT_MULTIPART_THRESHOLD_MB, help='Files this large (MiB) use multipart upload')
+@click.option('--part-size-mb', envvar='PART_SIZE_MB', type=int, default=DEFAULT_PART_SIZE_MB, help='Multipart part size in MiB (min 5)')
+@click.option('--part-concurrency', envvar='PART_CONCURRENCY', type=int, default=DEFAULT_PART_CONCURRENCY, help='Parallel parts per multipart upload')
+@click.option('--region-workers', envvar='REGION_WORKERS', type=int, default=DEFAULT_REGION_WORKERS, help='Regions synced in parallel')
+@click.option('--file-workers', envvar='FILE_WORKERS', type=int, default=DEFAULT_FILE_WORKERS, help='Parallel uploads per region')
 def main(bucket: str, prefix: str, source: str, pattern: str, 
          sync_type: str, exclude: str, region: str, dry_run: bool,
-         multi_region: bool, bucket_pattern: str, dual_deployment: bool, timestamp: str):
+         multi_region: bool, bucket_pattern: str, dual_deployment: bool, timestamp: str,
+         incremental: bool, server_side_copy: bool, discovery_cache: str, discovery_ttl: int,
+         multipart_threshold_mb: int, part_size_mb: int, part_concurrency: int,
+         region_workers: int, file_workers: int):
     """
     S3 Sync Tool - Flexible file synchronization to AWS S3
     
@@ -449,7 +1093,9 @@ def main(bucket: str, prefix: str, source: str, pattern: str,
         exclude_patterns=exclude_patterns,
         multi_region=multi_region,
         dual_deployment=dual_deployment,
-        timestamp=timestamp
+        timestamp=timestamp,
+        incremental=incremental,
+        server_side_copy=server_side_copy
     )
     
     # Validate source path
@@ -474,6 +1120,11 @@ def main(bucket: str, prefix: str, source: str, pattern: str,
     table.add_row("Bucket Pattern", bucket_pattern or "(single bucket)")
     table.add_row("Dual Deployment", str(dual_deployment))
     table.add_row("Timestamp", timestamp or "(none)")
+    table.add_row("Incremental", str(incremental))
+    table.add_row("Server-Side Copy", str(server_side_copy))
+    table.add_row("Discovery Cache", f"{discovery_cache} ({discovery_ttl}s)" if discovery_ttl > 0 else "(disabled)")
+    table.add_row("Multipart", f">= {multipart_threshold_mb} MiB, {part_size_mb} MiB parts x {part_concurrency}")
+    table.add_row("Workers", f"{region_workers} regions x {file_workers} files")
     table.add_row("Dry Run", str(dry_run))
     
     console.print(table)
@@ -484,7 +1135,10 @@ def main(bucket: str, prefix: str, source: str, pattern: str,
         return
     
     # Initialize syncer
-    syncer = S3Syncer(region=region)
+    syncer = S3Syncer(region=region, region_workers=region_workers, file_workers=file_workers,
+                      discovery_cache=DiscoveryCache(discovery_cache, discovery_ttl),
+                      multipart_threshold_mb=multipart_threshold_mb, part_size_mb=part_size_mb,
+                      part_concurrency=part_concurrency)
     
     # Validate bucket access before proceeding
     if not multi_region:
@@ -509,13 +1163,19 @@ def main(bucket: str, prefix: str, source: str, pattern: str,
             results = syncer.sync_with_dual_deployment(config, bucket_pattern)
             
             # Calculate combined stats
-            stats = {"uploaded": 0, "skipped": 0, "failed": 0}
+            stats = _empty_stats()
+            results_table = Table(title="Results by Region")
+            results_table.add_column("Deployment", style="cyan")
+            results_table.add_column("Region", style="cyan")
+            for key in stats:
+                results_table.add_column(key.capitalize(), style="green", justify="right")
             for deployment_type, regions in results.items():
-                console.print(f"\n[bold]Results for {deployment_type}:[/bold]")
                 for region, region_stats in regions.items():
-                    console.print(f"  {region}: {region_stats}")
+                    results_table.add_row(deployment_type, region, *(str(region_stats.get(key, 0)) for key in stats))
                     for key in stats:
                         stats[key] += region_stats.get(key, 0)
+            console.print()
+            console.print(results_table)
         else:
             # Single region, single deployment
             if config.sync_type == 'files':
@@ -535,10 +1195,15 @@ def main(bucket: str, prefix: str, source: str, pattern: str,
         summary_table.add_column("Count", style="green")
         
         summary_table.add_row("Uploaded", str(stats["uploaded"]))
+        summary_table.add_row("Copied", str(stats.get("copied", 0)))
+        summary_table.add_row("Unchanged", str(stats.get("unchanged", 0)))
         summary_table.add_row("Skipped", str(stats["skipped"]))
         summary_table.add_row("Failed", str(stats["failed"]))
         
         console.print(summary_table)
+        if config.sync_type == 'zip':
+            console.print(f"Zip cache: {syncer.zip_cache.built} built, {syncer.zip_cache.reused} reused")
+        print_throughput(syncer.transfers)
         
         # Exit with error if any failures
         if stats["failed"] > 0:
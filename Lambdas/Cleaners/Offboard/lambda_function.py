@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+from cyngular_common.cleanup import (
+    CleanupEngine,
+    deadline_from_context,
+    get_client_regions,
+    get_state_store,
+)
+from cyngular_common.cleanup_registry import CLEANUP_REGISTRY
+from cyngular_common.profiling import profile_handler
+
+MAX_CONCURRENT_CELLS = int(os.environ.get("MAX_CONCURRENT_CELLS", "8"))
+
+
+def get_services_to_clean(event):
+    """Services from the event, CLEANUP_SERVICES, or every default-enabled registry entry"""
+    services = event.get("services")
+    if not services:
+        services = [s.strip() for s in os.environ.get("CLEANUP_SERVICES", "").split(",") if s.strip()]
+    if not services:
+        services = [name for name, config in CLEANUP_REGISTRY.items() if config.enabled_by_default]
+    return services
+
+
+@profile_handler("Offboard")
+def lambda_handler(event, context):
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    try:
+        logger.info("STARTING CYNGULAR OFFBOARDING...")
+        services = get_services_to_clean(event)
+        regions = event.get("regions") or get_client_regions()
+        dry_run = bool(event.get("dry_run", False))
+        run_id = os.environ.get(
+            "CLEANUP_RUN_ID", f"offboarding-{os.environ.get('CLIENT_NAME', 'cyngular')}"
+        )
+        logger.info(f"SERVICES: {services} REGIONS: {regions} DRY RUN: {dry_run}")
+
+        engine = CleanupEngine(
+            services,
+            regions,
+            state_store=get_state_store(run_id),
+            options={
+                "cyngular_role_arn": os.environ.get("CYNGULAR_ROLE_ARN"),
+                "delete_dns_config": os.environ.get("DELETE_QUERY_LOG_CONFIG", "false").lower() == "true",
+                "disable_eks_logging": os.environ.get("EKS_DISABLE_LOGGING", "false").lower() == "true",
+            },
+            max_workers=MAX_CONCURRENT_CELLS,
+        )
+        results = engine.run(dry_run=dry_run, deadline=deadline_from_context(context))
+
+        if dry_run:
+            logger.info(
+                f"OFFBOARDING PLAN: {results['totals']['planned']} actions, "
+                f"~{results['totals']['estimated_api_calls']} API calls"
+            )
+        elif results["complete"]:
+            logger.info(f"OFFBOARDING COMPLETE: {results['totals']}")
+        else:
+            logger.warning(f"OFFBOARDING INCOMPLETE - RERUN TO RESUME: {results['totals']}")
+
+        return {"statusCode": 200, "body": json.dumps(results)}
+
+    except Exception as e:
+        logger.critical(f"CYNGULAR OFFBOARDING FAILED. {str(e)}")
+        return {"statusCode": 500, "body": json.dumps({"success": False, "error": str(e)})}
@@ -1,53 +1,38 @@
 import boto3
+import json
 import os
 import logging
+from cyngular_common.cleanup import (
+    CleanupEngine,
+    deadline_from_context,
+    get_client_regions,
+    get_state_store,
+)
+from cyngular_common.profiling import profile_handler
 
+MAX_CONCURRENT_REGIONS = int(os.environ.get("MAX_CONCURRENT_REGIONS", "8"))
 
-def dnslogs(curr_region):
-    try:
-        r_53_client = boto3.client("route53resolver", region_name=curr_region)
-        ec2_client = boto3.client("ec2", region_name=curr_region)
-
-        region_query_log_configs = r_53_client.list_resolver_query_log_configs()[
-            "ResolverQueryLogConfigs"
-        ]
-        cyngular_resolver_id = ""
 
-        for region_query_log_config in region_query_log_configs:
-            try:
-                if region_query_log_config["Name"] == "cyngular_dns":
-                    cyngular_resolver_id = region_query_log_config["Id"]
-                    break
-            except Exception as e:
-                logging.critical(str(e))
-
-        if cyngular_resolver_id:
-            vpc_list = ec2_client.describe_vpcs()
-            if "Vpcs" in vpc_list:
-                for vpc in vpc_list["Vpcs"]:
-                    try:
-                        vpc_id = vpc["VpcId"]
-                        logging.info(
-                            f"DELETING CONFIGURATION OF DNSLOGS ON VPC-ID: {vpc_id}"
-                        )
-                        resp = r_53_client.disassociate_resolver_query_log_config(
-                            ResolverQueryLogConfigId=cyngular_resolver_id,
-                            ResourceId=vpc_id,
-                        )
-                        logging.info(f"COMMAND SUCCEEDED. {resp}")
-                    except Exception as e:
-                        if "association doesn't exist" in str(e):
-                            logging.critical(
-                                f"{vpc_id} - ResolverWasNotAssociated. {str(e)}"
-                            )
-                        else:
-                            logging.critical(f"{vpc_id} - {str(e)}")
-
-    except Exception as e:
-        logging.critical(str(e))
+def region_summaries(cleanup_results):
+    """Flatten engine cell results into the per-region DNS summary"""
+    return {
+        cell["region"]: {
+            "region": cell["region"],
+            "planned": cell["planned"],
+            "disassociated": cell["counters"].get("disassociated", 0),
+            "already_removed": cell["counters"].get("already_removed", 0),
+            "deleted_configs": cell["counters"].get("deleted", 0),
+            "failed": cell["failed"],
+            "complete": cell["complete"],
+            "errors": cell["errors"],
+        }
+        for cell in cleanup_results["cells"].values()
+        if "region" in cell
+    }
 
 
-def cyngular_function(event, context):
+@profile_handler("RemoveDNS")
+def lambda_handler(event, context):
     logging.basicConfig(
         format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
     )
@@ -57,19 +42,48 @@ def cyngular_function(event, context):
         logger.info("STRATING CYNGULARS FUNCTION...")
         logger.info("DELETING DNSLOGS...")
         events_client = boto3.client("events")
-        REGIONS = os.environ["CLIENT_REGIONS"]
+        regions = get_client_regions()
+        dry_run = bool(event.get("dry_run", False))
+        logger.info(f"AWS REGIONS: {regions}")
 
-        for curr_region in REGIONS.split(" "):
-            logger.info(f"AWS REGION: {curr_region}")
+        engine = CleanupEngine(
+            ["dns"],
+            regions,
+            state_store=get_state_store(f"remove-dns-{os.environ.get('CLIENT_NAME', 'cyngular')}"),
+            options={
+                "delete_dns_config": os.environ.get("DELETE_QUERY_LOG_CONFIG", "false").lower() == "true"
+            },
+            max_workers=MAX_CONCURRENT_REGIONS,
+        )
+        results = engine.run(dry_run=dry_run, deadline=deadline_from_context(context))
+        logger.info(f"DNSLOGS CLEANUP SUMMARY: {results['totals']} COMPLETE: {results['complete']}")
+
+        if results["complete"]:
             try:
-                dnslogs(curr_region)
+                logger.info("DEACTIVATING EVENT BUS RULE")
+                response = events_client.disable_rule(
+                    Name="cyngular-lambda-config-dns-rule", EventBusName="default"
+                )
+                logger.info(f"DONE! {response}")
             except Exception as e:
-                logger.critical(f"{curr_region} - {str(e)}")
-        logger.info("DEACTIVATING EVENT BUS RULE")
-        response = events_client.disable_rule(
-            Name="cyngular-lambda-config-dns-rule", EventBusName="default"
-        )
-        logger.info(f"DONE! {response}")
+                logger.warning(f"COULD NOT DEACTIVATE EVENT BUS RULE. {str(e)}")
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "dry_run": dry_run,
+                    "complete": results["complete"],
+                    "totals": results["totals"],
+                    "regions": region_summaries(results),
+                }
+            ),
+        }
 
     except Exception as e:
         logger.critical(f"CYNGULARS FUNCTION FAILED. {str(e)}")
+        return {"statusCode": 500, "body": json.dumps({"success": False, "error": str(e)})}
+
+
+# Backwards-compatible entry point name
+cyngular_function = lambda_handler
@@ -1,31 +1,37 @@
 import boto3
+import json
 import os
 import logging
+from cyngular_common.cleanup import (
+    CleanupEngine,
+    deadline_from_context,
+    get_client_regions,
+    get_state_store,
+)
+from cyngular_common.profiling import profile_handler
 
+MAX_CONCURRENT_REGIONS = int(os.environ.get("MAX_CONCURRENT_REGIONS", "8"))
 
-def vpcflowlogs(curr_region):
-    try:
-        logging.info(f"DELETING VPCFLOWLOGS... {curr_region}")
-
-        flowlogs_ids_list = []
-        ec2_client = boto3.client("ec2", region_name=curr_region)
-
-        response = ec2_client.describe_flow_logs(
-            Filters=[
-                {"Name": "tag:Name", "Values": ["Cyngular-vpc-flowlogs"]},
-            ]
-        )
-        for flow_log in response["FlowLogs"]:
-            flowlogs_ids_list.append(flow_log["FlowLogId"])
 
-        logging.info(f"DELETING THE VPCFLOWLOGS: {flowlogs_ids_list}")
-        response = ec2_client.delete_flow_logs(FlowLogIds=flowlogs_ids_list)
-        logging.info(f"COMMAND SUCCEEDED. {response}")
-    except Exception as e:
-        logging.critical(f"{curr_region} - {str(e)}")
+def region_summaries(cleanup_results):
+    """Flatten engine cell results into the per-region flow log summary"""
+    summaries = {}
+    for cell in cleanup_results["cells"].values():
+        if "region" not in cell:
+            continue
+        summaries[cell["region"]] = {
+            "region": cell["region"],
+            "deleted": cell["counters"].get("deleted", 0),
+            "unsuccessful": cell["counters"].get("unsuccessful", 0),
+            "failed_chunks": cell["failed"],
+            "complete": cell["complete"],
+            "errors": cell["errors"],
+        }
+    return summaries
 
 
-def cyngular_function(event, context):
+@profile_handler("RemoveVFL")
+def lambda_handler(event, context):
     logging.basicConfig(
         format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
     )
@@ -34,18 +40,45 @@ def cyngular_function(event, context):
     try:
         logger.info("STRATING CYNGULARS FUNCTION...")
         events_client = boto3.client("events")
-        REGIONS = os.environ["CLIENT_REGIONS"]
+        regions = get_client_regions()
+        dry_run = bool(event.get("dry_run", False))
+        logger.info(f"AWS REGIONS: {regions}")
+
+        engine = CleanupEngine(
+            ["vfl"],
+            regions,
+            state_store=get_state_store(f"remove-vfl-{os.environ.get('CLIENT_NAME', 'cyngular')}"),
+            max_workers=MAX_CONCURRENT_REGIONS,
+        )
+        results = engine.run(dry_run=dry_run, deadline=deadline_from_context(context))
+        logger.info(f"VPCFLOWLOGS CLEANUP SUMMARY: {results['totals']} COMPLETE: {results['complete']}")
 
-        for curr_region in REGIONS.split(" "):
-            logger.info(f"AWS REGION: {curr_region}")
+        if results["complete"]:
             try:
-                vpcflowlogs(curr_region)
+                logger.info("DEACTIVATING EVENT BUS RULE")
+                response = events_client.disable_rule(
+                    Name="cyngular-lambda-config-vpcflowlogs-rule", EventBusName="default"
+                )
+                logger.info(f"DONE! {response}")
             except Exception as e:
-                logger.critical(f"{curr_region} - {str(e)}")
-        logger.info("DEACTIVATING EVENT BUS RULE")
-        response = events_client.disable_rule(
-            Name="cyngular-lambda-config-vpcflowlogs-rule", EventBusName="default"
-        )
-        logger.info(f"DONE! {response}")
+                logger.warning(f"COULD NOT DEACTIVATE EVENT BUS RULE. {str(e)}")
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "dry_run": dry_run,
+                    "complete": results["complete"],
+                    "totals": results["totals"],
+                    "regions": region_summaries(results),
+                }
+            ),
+        }
+
     except Exception as e:
         logger.critical(f"CYNGULARS FUNCTION FAILED. {str(e)}")
+        return {"statusCode": 500, "body": json.dumps({"success": False, "error": str(e)})}
+
+
+# Backwards-compatible entry point name
+cyngular_function = lambda_handler
@@ -2,10 +2,37 @@
 Cyngular Common Library for Lambda Functions
 
 This package provides shared utilities and modules for Cyngular Lambda functions.
+
+Submodules are loaded on first attribute access (PEP 562), so a function that
+only needs cfnresponse does not pay for importing metrics, tracing and the rest
+during its cold start.
 """
 
-from .metrics import MetricsCollector
-from . import cfnresponse
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from . import budget, cfnresponse, instrumentation, profiling, run_history, structured_logging, tracing
+    from .metrics import MetricsCollector
 
 __version__ = "1.0.0"
-__all__ = ["MetricsCollector", "cfnresponse"]
\ No newline at end of file
+__all__ = ["MetricsCollector", "cfnresponse", "instrumentation", "tracing", "budget", "run_history", "profiling", "structured_logging"]
+
+_SUBMODULES = {"cfnresponse", "instrumentation", "tracing", "budget", "run_history", "profiling", "structured_logging"}
+_ATTRIBUTES = {"MetricsCollector": "metrics"}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    elif name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(f".{_ATTRIBUTES[name]}", __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,193 @@
+"""
+Per-run AWS API budget ledger for Cyngular Lambda functions.
+
+Every API call made through a boto3 client is counted per service/operation
+by a botocore before-call handler. Optional ceilings cap what a single run
+may issue; work loops check has_budget() and defer what is left to the next
+run instead of failing. Loops walk their items in resume_order(), so the next
+run starts at the first item this one deferred rather than at the same head of
+the list. The ledger goes into the run results so the onboarding footprint on
+a customer account can be shown exactly.
+
+The orchestrator hands each RegionProcessor cell a share of the run's
+ceilings (split()) and adds the cell ledgers it gets back to its own
+(merge_ledgers()), so the cells of one run together stay under the ceilings.
+
+Ceilings are keyed "service:Operation" (botocore names, e.g.
+"ssm:SendCommand"), "service:*" for every operation of a service, or "*" for
+all calls.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+
+class ApiBudget:
+    """Thread-safe call counts, ceilings and deferred work for one run"""
+
+    def __init__(self, ceilings: Optional[Dict[str, int]] = None):
+        self.ceilings = {key: int(value) for key, value in (ceilings or {}).items()}
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = {}
+        self._service_calls: Dict[str, int] = {}
+        self._total_calls = 0
+        self._deferred: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, overrides: Optional[Dict[str, int]] = None) -> "ApiBudget":
+        """Ceilings from the API_BUDGET JSON env var, updated with overrides"""
+        ceilings = {}
+        raw = os.environ.get("API_BUDGET", "").strip()
+        if raw:
+            try:
+                ceilings = json.loads(raw)
+            except ValueError as e:
+                logger.error(f"Ignoring invalid API_BUDGET (expected a JSON object): {str(e)}")
+        if overrides:
+            ceilings.update(overrides)
+        return cls(ceilings)
+
+    def record_call(self, service: str, operation: str) -> None:
+        key = f"{service}:{operation}"
+        with self._lock:
+            self._calls[key] = self._calls.get(key, 0) + 1
+            self._service_calls[service] = self._service_calls.get(service, 0) + 1
+            self._total_calls += 1
+
+    def _used(self, key: str) -> int:
+        # Calls counted against a ceiling key - caller holds the lock
+        if key == "*":
+            return self._total_calls
+        service, operation = key.split(":", 1)
+        return self._service_calls.get(service, 0) if operation == "*" else self._calls.get(key, 0)
+
+    def remaining(self, service: str, operation: str) -> Optional[int]:
+        """Calls left before the tightest matching ceiling, None when unlimited"""
+        with self._lock:
+            used = {key: self._used(key) for key in (f"{service}:{operation}", f"{service}:*", "*")}
+        limits = [self.ceilings[key] - count for key, count in used.items() if key in self.ceilings]
+        return max(0, min(limits)) if limits else None
+
+    def has_budget(self, service: str, operation: str, calls: int = 1) -> bool:
+        remaining = self.remaining(service, operation)
+        return remaining is None or remaining >= calls
+
+    def defer(self, service: str, operation: str, items: int = 1) -> None:
+        """Record work items left for the next run because the budget ran out"""
+        key = f"{service}:{operation}"
+        with self._lock:
+            self._deferred[key] = self._deferred.get(key, 0) + items
+        logger.warning(f"API budget exhausted for {key} - deferring {items} item(s) to the next run")
+
+    def split(self, cells: Dict[str, Iterable[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        Divide what is left of each ceiling between cells
+
+        Args:
+            cells: The AWS services (botocore names) each cell calls, by cell name
+
+        Returns:
+            Ceilings per cell. A ceiling is split evenly between the cells that call
+            its service ("*" between all cells); the others get 0 for it.
+        """
+        cell_services = {cell: set(services) for cell, services in cells.items()}
+        shares: Dict[str, Dict[str, int]] = {cell: {} for cell in cell_services}
+        for key, ceiling in self.ceilings.items():
+            service = key.split(":", 1)[0]
+            users = sorted(cell for cell, services in cell_services.items() if key == "*" or service in services)
+            with self._lock:
+                left = max(0, ceiling - self._used(key))
+            base, extra = divmod(left, len(users)) if users else (0, 0)
+            for cell in cell_services:
+                shares[cell][key] = 0
+            for index, cell in enumerate(users):
+                shares[cell][key] = base + (1 if index < extra else 0)
+        return shares
+
+    def ledger(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_calls": self._total_calls,
+                "calls": dict(sorted(self._calls.items())),
+                "ceilings": dict(self.ceilings),
+                "deferred": dict(self._deferred),
+            }
+
+
+def resume_order(item_ids: List[str], resume_at: Optional[str] = None) -> List[str]:
+    """
+    item_ids sorted by ID, rotated to start at resume_at
+
+    resume_at is the first item a previous run deferred. Sorting keeps the order
+    stable however the API lists the items; when resume_at no longer exists the
+    rotation starts at the next ID after it.
+    """
+    ordered = sorted(item_ids)
+    if not resume_at:
+        return ordered
+    index = bisect.bisect_left(ordered, resume_at)
+    return ordered[index:] + ordered[:index]
+
+
+def merge_ledgers(ledger: Dict[str, Any], cell_ledgers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The run's own ledger with the calls and deferred work of its cells added"""
+    calls = dict(ledger["calls"])
+    deferred = dict(ledger["deferred"])
+    total_calls = ledger["total_calls"]
+    for cell in cell_ledgers:
+        total_calls += cell["total_calls"]
+        for key, count in cell["calls"].items():
+            calls[key] = calls.get(key, 0) + count
+        for key, count in cell["deferred"].items():
+            deferred[key] = deferred.get(key, 0) + count
+    return {
+        **ledger,
+        "total_calls": total_calls,
+        "calls": dict(sorted(calls.items())),
+        "deferred": deferred,
+        "cells_reported": len(cell_ledgers),
+    }
+
+
+_active: Optional[ApiBudget] = None
+_installed_sessions = set()
+_install_lock = threading.Lock()
+
+
+def activate(budget: ApiBudget) -> ApiBudget:
+    """Make budget the one counted by the call handler and returned by get_active_budget()"""
+    global _active
+    _active = budget
+    return budget
+
+
+def get_active_budget() -> ApiBudget:
+    """The running invocation's budget; an unlimited one when none was activated"""
+    if _active is None:
+        return activate(ApiBudget())
+    return _active
+
+
+def _count_call(model=None, **kwargs) -> None:
+    if _active is not None and model is not None:
+        _active.record_call(model.service_model.service_name, model.name)
+
+
+def install(session: Optional[boto3.session.Session] = None) -> None:
+    """Count calls of every client later created from session (default boto3 session if omitted)"""
+    if session is None:
+        session = boto3.DEFAULT_SESSION or boto3._get_default_session()
+
+    with _install_lock:
+        if id(session) in _installed_sessions:
+            return
+        session.events.register("before-call", _count_call, unique_id="cyngular-api-budget")
+        _installed_sessions.add(id(session))
@@ -6,12 +6,34 @@
 #  See the License for the specific language governing permissions and limitations under the License.
 
 import json
-import urllib3
+import time
 
 SUCCESS = "SUCCESS"
 FAILED = "FAILED"
 
-http = urllib3.PoolManager()
+# The presigned PUT is the only way CloudFormation learns the outcome - bound every
+# attempt and retry transient failures, otherwise a blip leaves the stack stuck for an hour
+CONNECT_TIMEOUT_SECONDS = 5.0
+READ_TIMEOUT_SECONDS = 15.0
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 8.0
+
+# Created on the first send() - most invocations never respond to CloudFormation,
+# so importing urllib3 and building the pool up front only slows the cold start
+_http = None
+
+
+def _get_http():
+    global _http
+    if _http is None:
+        import urllib3
+
+        _http = urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT_SECONDS, read=READ_TIMEOUT_SECONDS),
+            retries=False,
+        )
+    return _http
 
 
 def send(event, context, responseStatus, responseData, physicalResourceId=None, noEcho=False, reason=None):
@@ -40,11 +62,20 @@ def send(event, context, responseStatus, responseData, physicalResourceId=None,
         'content-length' : str(len(json_responseBody))
     }
 
-    try:
-        response = http.request('PUT', responseUrl, headers=headers, body=json_responseBody)
-        print("Status code:", response.status)
+    http = _get_http()
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            response = http.request('PUT', responseUrl, headers=headers, body=json_responseBody)
+            print("Status code:", response.status)
+            # 4xx means the presigned URL itself is unusable - retrying will not help
+            if response.status < 500:
+                return
+
+        except Exception as e:
 
+            print("send(..) failed executing http.request(..) (attempt {}/{}):".format(attempt, MAX_ATTEMPTS), e)
 
-    except Exception as e:
+        if attempt < MAX_ATTEMPTS:
+            time.sleep(min(BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), BACKOFF_MAX_SECONDS))
 
-        print("send(..) failed executing http.request(..):", e)
\ No newline at end of file
+    print("send(..) giving up after {} attempts".format(MAX_ATTEMPTS))
\ No newline at end of file
@@ -0,0 +1,354 @@
+"""
+Resumable offboarding engine for Cyngular cleanup Lambda functions.
+
+Teardown is planned per (service, region) cell from CLEANUP_REGISTRY, executed
+in parallel, and checkpointed to a state store so that a run that times out
+halfway resumes where it stopped instead of starting from scratch.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CleanupAction:
+    """A single teardown step against one resource"""
+
+    service: str
+    region: str
+    action: str
+    resource_id: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    estimated_api_calls: int = 1
+
+    @property
+    def key(self) -> str:
+        return f"{self.service}:{self.region}:{self.action}:{self.resource_id}"
+
+
+@dataclass
+class CleanupConfig:
+    """Registry entry describing how to plan and execute teardown for a service"""
+
+    planner: Callable[[str, "ClientCache", Dict[str, Any]], List[CleanupAction]]
+    executor: Callable[[CleanupAction, "ClientCache", Dict[str, Any]], Dict[str, Any]]
+    # Read calls needed to build the plan for one region (dry-run estimate)
+    plan_api_calls: int = 1
+    enabled_by_default: bool = True
+
+
+class ClientCache:
+    """Thread-safe cache of boto3 clients per (service, region)"""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, service_name: str, region: str):
+        key = (service_name, region)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = boto3.client(service_name, region_name=region)
+            return self._clients[key]
+
+
+class LocalStateStore:
+    """Checkpoint state kept in a local JSON file (tests / local runs)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state: Dict[str, Any]) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def __repr__(self) -> str:
+        return f"LocalStateStore({self.path})"
+
+
+class S3StateStore:
+    """Checkpoint state kept as a single S3 object"""
+
+    def __init__(self, bucket: str, key: str, s3_client=None):
+        self.bucket = bucket
+        self.key = key
+        self.s3_client = s3_client or boto3.client("s3")
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.key)
+            return json.loads(response["Body"].read())
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+
+    def save(self, state: Dict[str, Any]) -> None:
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Body=json.dumps(state).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+    def __repr__(self) -> str:
+        return f"S3StateStore(s3://{self.bucket}/{self.key})"
+
+
+def get_state_store(run_id: str):
+    """State store from env - S3 when CLEANUP_STATE_BUCKET is set, /tmp otherwise"""
+    bucket = os.environ.get("CLEANUP_STATE_BUCKET")
+    if bucket:
+        prefix = os.environ.get("CLEANUP_STATE_PREFIX", "cyngular-offboarding").strip("/")
+        return S3StateStore(bucket, f"{prefix}/{run_id}.json")
+    return LocalStateStore(os.path.join("/tmp", f"{run_id}.json"))
+
+
+def get_client_regions() -> List[str]:
+    """Regions to clean - CLIENT_REGIONS if set, otherwise every enabled region"""
+    regions = os.environ.get("CLIENT_REGIONS", "").replace(",", " ").split()
+    if regions:
+        return regions
+
+    ec2_client = boto3.client("ec2")
+    response = ec2_client.describe_regions(AllRegions=False)
+    return [r["RegionName"] for r in response["Regions"]]
+
+
+def deadline_from_context(context: Any, margin_seconds: int = 30) -> Optional[float]:
+    """Epoch deadline leaving margin_seconds of the Lambda timeout for checkpointing"""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return time.time() + context.get_remaining_time_in_millis() / 1000 - margin_seconds
+
+
+def _add_counters(counters: Dict[str, int], result: Dict[str, Any]) -> None:
+    """Roll numeric fields and status values of executor results into cell counters"""
+    for key, value in result.items():
+        if key == "status":
+            counters[value] = counters.get(value, 0) + 1
+        elif isinstance(value, int) and not isinstance(value, bool):
+            counters[key] = counters.get(key, 0) + value
+
+
+class CleanupEngine:
+    """Plans, executes and checkpoints teardown across (service, region) cells"""
+
+    MAX_CONCURRENT_CELLS = 8
+    CHECKPOINT_EVERY_ACTIONS = 25
+
+    def __init__(
+        self,
+        services: List[str],
+        regions: List[str],
+        state_store=None,
+        options: Optional[Dict[str, Any]] = None,
+        max_workers: Optional[int] = None,
+        registry: Optional[Dict[str, CleanupConfig]] = None,
+    ):
+        """
+        Initialize cleanup engine
+
+        Args:
+            services: Services to tear down (keys of the cleanup registry)
+            regions: Regions to tear down
+            state_store: Checkpoint store with load()/save(); None disables resume
+            options: Service options passed to planners and executors
+            max_workers: Number of cells processed concurrently
+            registry: Cleanup registry, defaults to CLEANUP_REGISTRY
+        """
+        if registry is None:
+            from .cleanup_registry import CLEANUP_REGISTRY
+
+            registry = CLEANUP_REGISTRY
+
+        unknown = [s for s in services if s not in registry]
+        if unknown:
+            raise ValueError(f"Unknown cleanup services: {unknown}")
+
+        self.registry = registry
+        self.services = services
+        self.regions = regions
+        self.state_store = state_store
+        self.options = options or {}
+        self.max_workers = max_workers or self.MAX_CONCURRENT_CELLS
+        self.clients = ClientCache()
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._state = {"completed": {}, "done_cells": [], "runs": 0}
+        self._pending_checkpoint = 0
+
+    @property
+    def cells(self) -> List[Tuple[str, str]]:
+        return [(service, region) for service in self.services for region in self.regions]
+
+    def _load_state(self) -> None:
+        if not self.state_store:
+            return
+        state = self.state_store.load()
+        # A finished run's checkpoint must not short-circuit a fresh cleanup
+        if state and not state.get("complete"):
+            logger.info(
+                f"Resuming cleanup from checkpoint {self.state_store}: "
+                f"{len(state.get('completed', {}))} actions, {len(state.get('done_cells', []))} cells done"
+            )
+            self._state.update(state)
+
+    def _checkpoint(self, force: bool = False) -> None:
+        if not self.state_store:
+            return
+        # Saves are serialized so an older snapshot never overwrites a newer one
+        with self._save_lock:
+            with self._lock:
+                if not force and self._pending_checkpoint < self.CHECKPOINT_EVERY_ACTIONS:
+                    return
+                self._pending_checkpoint = 0
+                snapshot = json.loads(json.dumps(self._state))
+            try:
+                self.state_store.save(snapshot)
+            except Exception as e:
+                logger.warning(f"Failed to checkpoint cleanup state to {self.state_store}: {str(e)}")
+
+    def _record_action(self, action: CleanupAction, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._state["completed"][action.key] = result
+            self._pending_checkpoint += 1
+
+    def _record_cell_done(self, cell: str) -> None:
+        with self._lock:
+            if cell not in self._state["done_cells"]:
+                self._state["done_cells"].append(cell)
+            self._pending_checkpoint += 1
+
+    def plan_cell(self, service: str, region: str) -> List[CleanupAction]:
+        config = self.registry[service]
+        return config.planner(region, self.clients, self.options)
+
+    def _run_cell(
+        self, service: str, region: str, dry_run: bool, deadline: Optional[float]
+    ) -> Dict[str, Any]:
+        cell = f"{service}:{region}"
+        summary = {
+            "service": service,
+            "region": region,
+            "planned": 0,
+            "estimated_api_calls": self.registry[service].plan_api_calls,
+            "succeeded": 0,
+            "failed": 0,
+            "skipped": 0,
+            "complete": False,
+            "counters": {},
+            "errors": [],
+        }
+
+        if cell in self._state["done_cells"]:
+            summary["complete"] = True
+            summary["estimated_api_calls"] = 0
+            summary["resumed"] = True
+            return summary
+
+        try:
+            actions = self.plan_cell(service, region)
+        except Exception as e:
+            logger.error(f"[{region} | {service}] Cleanup planning failed: {str(e)}")
+            summary["errors"].append(f"plan: {str(e)}")
+            return summary
+
+        summary["planned"] = len(actions)
+        summary["estimated_api_calls"] += sum(a.estimated_api_calls for a in actions)
+        if dry_run:
+            summary["actions"] = [a.key for a in actions]
+            return summary
+
+        executor = self.registry[service].executor
+        for action in actions:
+            if action.key in self._state["completed"]:
+                summary["skipped"] += 1
+                continue
+            if deadline and time.time() >= deadline:
+                logger.warning(f"[{region} | {service}] Time budget exhausted - deferring to next run")
+                self._checkpoint(force=True)
+                return summary
+            try:
+                result = executor(action, self.clients, self.options) or {}
+                self._record_action(action, result)
+                summary["succeeded"] += 1
+                _add_counters(summary["counters"], result)
+            except Exception as e:
+                logger.error(f"[{region} | {service}] {action.action} {action.resource_id} failed: {str(e)}")
+                summary["failed"] += 1
+                summary["errors"].append(f"{action.resource_id}: {str(e)}")
+            self._checkpoint()
+
+        if not summary["failed"]:
+            summary["complete"] = True
+            self._record_cell_done(cell)
+        return summary
+
+    def run(self, dry_run: bool = False, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Plan and (unless dry_run) execute teardown for every cell
+
+        Args:
+            dry_run: Only plan - report action count and estimated API calls
+            deadline: Epoch seconds after which no new actions are started
+
+        Returns:
+            Per-cell summaries plus totals; complete is False when work remains
+        """
+        self._load_state()
+        start_time = time.time()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(self.cells)))) as pool:
+            future_to_cell = {
+                pool.submit(self._run_cell, service, region, dry_run, deadline): f"{service}:{region}"
+                for service, region in self.cells
+            }
+            for future in as_completed(future_to_cell):
+                cell = future_to_cell[future]
+                try:
+                    results[cell] = future.result()
+                except Exception as e:
+                    logger.error(f"Cleanup cell {cell} failed: {str(e)}")
+                    results[cell] = {"complete": False, "errors": [str(e)]}
+
+        complete = not dry_run and all(r.get("complete") for r in results.values())
+        if not dry_run:
+            with self._lock:
+                self._state["runs"] = self._state.get("runs", 0) + 1
+                self._state["complete"] = complete
+            self._checkpoint(force=True)
+
+        totals = {
+            key: sum(r.get(key, 0) for r in results.values())
+            for key in ("planned", "estimated_api_calls", "succeeded", "failed", "skipped")
+        }
+        return {
+            "dry_run": dry_run,
+            "complete": complete,
+            "totals": totals,
+            "cells": results,
+            "processing_time_seconds": round(time.time() - start_time, 2),
+        }
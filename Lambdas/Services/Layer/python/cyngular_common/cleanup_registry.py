@@ -0,0 +1,323 @@
+"""
+Teardown handlers for the offboarding engine.
+
+Mirrors RegionProcessor's SERVICE_REGISTRY: every onboarding service has a
+planner that lists what Cyngular created in a region, and an executor that
+removes one planned action.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from botocore.exceptions import ClientError
+
+from .cleanup import CleanupAction, CleanupConfig, ClientCache
+
+logger = logging.getLogger(__name__)
+
+CYNGULAR_QLC_NAME = "cyngular_dns"
+CYNGULAR_FLOW_LOG_NAME = "Cyngular-vpc-flowlogs"
+CYNGULAR_EKS_LOG_TYPES = ["audit", "authenticator"]
+CYNGULAR_AUDIT_RULES_PATH = "/etc/audit/rules.d/audit.rules"
+
+# DeleteFlowLogs accepts at most 1000 flow log IDs per request
+DELETE_FLOW_LOGS_CHUNK_SIZE = 1000
+# SendCommand accepts at most 50 instance IDs per request
+SEND_COMMAND_CHUNK_SIZE = 50
+CONFIG_DELETE_WAIT_SECONDS = 60
+CONFIG_DELETE_POLL_SECONDS = 5
+
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _chunk_id(ids: List[str]) -> str:
+    """Resource ID of a chunk action, unique to its exact set of IDs"""
+    ordered = sorted(ids)
+    # Checkpoints key on this - the same first ID and size must not make two chunks look alike
+    digest = hashlib.sha256(",".join(ordered).encode()).hexdigest()[:16]
+    return f"{ordered[0]}+{len(ordered) - 1}:{digest}"
+
+
+def plan_dns_cleanup(region: str, clients: ClientCache, options: Dict[str, Any]) -> List[CleanupAction]:
+    """Disassociate every active association of the cyngular_dns query log config"""
+    r53_client = clients.get("route53resolver", region)
+
+    actions = []
+    paginator = r53_client.get_paginator("list_resolver_query_log_configs")
+    for page in paginator.paginate(Filters=[{"Name": "Name", "Values": [CYNGULAR_QLC_NAME]}]):
+        for config in page["ResolverQueryLogConfigs"]:
+            if config.get("Name") != CYNGULAR_QLC_NAME:
+                continue
+
+            assoc_paginator = r53_client.get_paginator("list_resolver_query_log_config_associations")
+            for assoc_page in assoc_paginator.paginate(
+                Filters=[{"Name": "ResolverQueryLogConfigId", "Values": [config["Id"]]}]
+            ):
+                for association in assoc_page["ResolverQueryLogConfigAssociations"]:
+                    if association.get("Status") in ("DELETING", "FAILED"):
+                        continue
+                    actions.append(
+                        CleanupAction(
+                            service="dns",
+                            region=region,
+                            action="disassociate_query_log_config",
+                            resource_id=association["ResourceId"],
+                            params={"config_id": config["Id"]},
+                        )
+                    )
+
+            if options.get("delete_dns_config"):
+                actions.append(
+                    CleanupAction(
+                        service="dns",
+                        region=region,
+                        action="delete_query_log_config",
+                        resource_id=config["Id"],
+                        estimated_api_calls=2,
+                    )
+                )
+    return actions
+
+
+def execute_dns_cleanup(action: CleanupAction, clients: ClientCache, options: Dict[str, Any]) -> Dict[str, Any]:
+    r53_client = clients.get("route53resolver", action.region)
+
+    if action.action == "disassociate_query_log_config":
+        try:
+            r53_client.disassociate_resolver_query_log_config(
+                ResolverQueryLogConfigId=action.params["config_id"],
+                ResourceId=action.resource_id,
+            )
+        except r53_client.exceptions.ResourceNotFoundException:
+            # Removed between planning and execution - nothing left to do
+            return {"status": "already_removed"}
+        return {"status": "disassociated"}
+
+    # Disassociation is asynchronous - the config can only go once it has drained
+    deadline = time.time() + CONFIG_DELETE_WAIT_SECONDS
+    while True:
+        config = r53_client.get_resolver_query_log_config(
+            ResolverQueryLogConfigId=action.resource_id
+        )["ResolverQueryLogConfig"]
+        if config.get("AssociationCount", 0) == 0:
+            r53_client.delete_resolver_query_log_config(ResolverQueryLogConfigId=action.resource_id)
+            return {"status": "deleted"}
+        if time.time() >= deadline:
+            raise RuntimeError(
+                f"{config.get('AssociationCount')} associations still draining - retry on next run"
+            )
+        time.sleep(CONFIG_DELETE_POLL_SECONDS)
+
+
+def plan_vfl_cleanup(region: str, clients: ClientCache, options: Dict[str, Any]) -> List[CleanupAction]:
+    """Delete Cyngular-tagged flow logs in chunks of the DeleteFlowLogs limit"""
+    ec2_client = clients.get("ec2", region)
+
+    flow_log_ids = []
+    paginator = ec2_client.get_paginator("describe_flow_logs")
+    for page in paginator.paginate(Filters=[{"Name": "tag:Name", "Values": [CYNGULAR_FLOW_LOG_NAME]}]):
+        flow_log_ids.extend(flow_log["FlowLogId"] for flow_log in page["FlowLogs"])
+
+    return [
+        CleanupAction(
+            service="vfl",
+            region=region,
+            action="delete_flow_logs",
+            resource_id=_chunk_id(chunk),
+            params={"flow_log_ids": chunk},
+        )
+        for chunk in _chunks(sorted(flow_log_ids), DELETE_FLOW_LOGS_CHUNK_SIZE)
+    ]
+
+
+def execute_vfl_cleanup(action: CleanupAction, clients: ClientCache, options: Dict[str, Any]) -> Dict[str, Any]:
+    ec2_client = clients.get("ec2", action.region)
+    flow_log_ids = action.params["flow_log_ids"]
+
+    response = ec2_client.delete_flow_logs(FlowLogIds=flow_log_ids)
+    unsuccessful = response.get("Unsuccessful", [])
+    if unsuccessful:
+        # Fail the action so the cell stays incomplete - the next run plans only the flow logs left
+        error = unsuccessful[0].get("Error", {})
+        raise RuntimeError(
+            f"{len(unsuccessful)} of {len(flow_log_ids)} deletions failed "
+            f"(first {unsuccessful[0].get('ResourceId')}): {error.get('Code')} - {error.get('Message')}"
+        )
+    return {"deleted": len(flow_log_ids)}
+
+
+def plan_eks_cleanup(region: str, clients: ClientCache, options: Dict[str, Any]) -> List[CleanupAction]:
+    """Remove the Cyngular access entry and, optionally, the logging Cyngular enabled"""
+    eks_client = clients.get("eks", region)
+    role_arn = options.get("cyngular_role_arn")
+
+    actions = []
+    paginator = eks_client.get_paginator("list_clusters")
+    for page in paginator.paginate():
+        for cluster_name in page["clusters"]:
+            if role_arn:
+                entries = []
+                entries_paginator = eks_client.get_paginator("list_access_entries")
+                try:
+                    for entries_page in entries_paginator.paginate(clusterName=cluster_name):
+                        entries.extend(entries_page.get("accessEntries", []))
+                except eks_client.exceptions.InvalidRequestException:
+                    # CONFIG_MAP-only clusters never received an access entry
+                    entries = []
+                if role_arn in entries:
+                    actions.append(
+                        CleanupAction(
+                            service="eks",
+                            region=region,
+                            action="delete_access_entry",
+                            resource_id=cluster_name,
+                            params={"principal_arn": role_arn},
+                        )
+                    )
+
+            if options.get("disable_eks_logging"):
+                cluster = eks_client.describe_cluster(name=cluster_name)["cluster"]
+                enabled_types = [
+                    log_type
+                    for log_config in cluster.get("logging", {}).get("clusterLogging", [])
+                    if log_config.get("enabled", False)
+                    for log_type in log_config.get("types", [])
+                ]
+                types_to_disable = [t for t in CYNGULAR_EKS_LOG_TYPES if t in enabled_types]
+                if types_to_disable:
+                    actions.append(
+                        CleanupAction(
+                            service="eks",
+                            region=region,
+                            action="disable_cluster_logging",
+                            resource_id=cluster_name,
+                            params={"types": types_to_disable},
+                        )
+                    )
+    return actions
+
+
+def execute_eks_cleanup(action: CleanupAction, clients: ClientCache, options: Dict[str, Any]) -> Dict[str, Any]:
+    eks_client = clients.get("eks", action.region)
+
+    if action.action == "delete_access_entry":
+        try:
+            eks_client.delete_access_entry(
+                clusterName=action.resource_id, principalArn=action.params["principal_arn"]
+            )
+        except eks_client.exceptions.ResourceNotFoundException:
+            return {"status": "already_removed"}
+        return {"status": "deleted"}
+
+    eks_client.update_cluster_config(
+        name=action.resource_id,
+        logging={"clusterLogging": [{"types": action.params["types"], "enabled": False}]},
+    )
+    return {"status": "logging_disabled", "types": action.params["types"]}
+
+
+def _ssm_linux_instances(ssm_client, instance_ids: Optional[List[str]] = None) -> Set[str]:
+    """IDs of the SSM-managed Linux instances (of instance_ids when given)"""
+    filters = [{"Key": "PlatformTypes", "Values": ["Linux"]}]
+    if instance_ids is not None:
+        filters.append({"Key": "InstanceIds", "Values": instance_ids})
+
+    managed = set()
+    paginator = ssm_client.get_paginator("describe_instance_information")
+    for page in paginator.paginate(Filters=filters):
+        managed.update(info["InstanceId"] for info in page["InstanceInformationList"])
+    return managed
+
+
+def plan_os_cleanup(region: str, clients: ClientCache, options: Dict[str, Any]) -> List[CleanupAction]:
+    """Remove the Cyngular auditd rules from running SSM-managed Linux instances, 50 per SSM command"""
+    ec2_client = clients.get("ec2", region)
+    ssm_client = clients.get("ssm", region)
+
+    # SendCommand rejects the whole request when one ID is not SSM-managed or is not Linux
+    managed = _ssm_linux_instances(ssm_client)
+    instance_ids = []
+    paginator = ec2_client.get_paginator("describe_instances")
+    for page in paginator.paginate(Filters=[{"Name": "instance-state-name", "Values": ["running"]}]):
+        for reservation in page["Reservations"]:
+            instance_ids.extend(
+                instance["InstanceId"] for instance in reservation["Instances"] if instance["InstanceId"] in managed
+            )
+
+    return [
+        CleanupAction(
+            service="os",
+            region=region,
+            action="remove_auditd_rules",
+            resource_id=_chunk_id(chunk),
+            params={"instance_ids": chunk},
+        )
+        for chunk in _chunks(sorted(instance_ids), SEND_COMMAND_CHUNK_SIZE)
+    ]
+
+
+def _send_auditd_removal(ssm_client, instance_ids: List[str]) -> str:
+    response = ssm_client.send_command(
+        InstanceIds=instance_ids,
+        DocumentName="AWS-RunShellScript",
+        Parameters={
+            "commands": [
+                f'rm -f "{CYNGULAR_AUDIT_RULES_PATH}"',
+                "augenrules --load || systemctl restart auditd.service",
+            ]
+        },
+    )
+    return response["Command"]["CommandId"]
+
+
+def execute_os_cleanup(action: CleanupAction, clients: ClientCache, options: Dict[str, Any]) -> Dict[str, Any]:
+    ssm_client = clients.get("ssm", action.region)
+    instance_ids = action.params["instance_ids"]
+
+    try:
+        command_id = _send_auditd_removal(ssm_client, instance_ids)
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("InvalidInstanceId", "UnsupportedPlatformType"):
+            raise
+        # An instance stopped or lost its SSM agent since planning - retry with the ones still reachable
+        managed = _ssm_linux_instances(ssm_client, instance_ids)
+        reachable = [instance_id for instance_id in instance_ids if instance_id in managed]
+        logger.warning(
+            f"[{action.region} | os] Dropping {len(instance_ids) - len(reachable)} unreachable instances "
+            f"from {action.resource_id}: {str(e)}"
+        )
+        if not reachable:
+            return {"status": "no_reachable_instances", "instances": 0, "unreachable": len(instance_ids)}
+        command_id = _send_auditd_removal(ssm_client, reachable)
+        return {"command_id": command_id, "instances": len(reachable), "unreachable": len(instance_ids) - len(reachable)}
+    return {"command_id": command_id, "instances": len(instance_ids)}
+
+
+CLEANUP_REGISTRY = {
+    "dns": CleanupConfig(
+        planner=plan_dns_cleanup,
+        executor=execute_dns_cleanup,
+        plan_api_calls=2,
+    ),
+    "vfl": CleanupConfig(
+        planner=plan_vfl_cleanup,
+        executor=execute_vfl_cleanup,
+        plan_api_calls=1,
+    ),
+    "eks": CleanupConfig(
+        planner=plan_eks_cleanup,
+        executor=execute_eks_cleanup,
+        plan_api_calls=2,
+    ),
+    "os": CleanupConfig(
+        planner=plan_os_cleanup,
+        executor=execute_os_cleanup,
+        plan_api_calls=2,
+        # Touches customer instances - only when explicitly requested
+        enabled_by_default=False,
+    ),
+}
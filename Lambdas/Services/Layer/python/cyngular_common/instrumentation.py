@@ -0,0 +1,239 @@
+"""
+AWS API call instrumentation for Cyngular Lambda functions.
+
+install() registers botocore event handlers on the default boto3 session, so
+every client created through boto3.client(...) afterwards is measured without
+changes at the call sites. Calls are aggregated per (service, operation,
+region) into call/error/retry/throttle counts and a latency histogram.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+THROTTLE_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ProvisionedThroughputExceededException",
+    "SlowDown",
+    "RateExceeded",
+}
+_START_TIME_KEY = "cyngular_call_start"
+_CALL_KEY = "cyngular_call_key"
+
+CallKey = Tuple[str, str, str]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+class _CallStats:
+    """Counters and latency histogram for one (service, operation, region)"""
+
+    __slots__ = ("calls", "errors", "retries", "throttles", "latency_sum_ms", "latency_max_ms", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.latency_sum_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+
+    def observe(self, latency_ms: float) -> None:
+        self.latency_sum_ms += latency_ms
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.histogram[i] += 1
+                break
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding the given fraction of calls"""
+        observed = sum(self.histogram)
+        if not observed:
+            return None
+        threshold = fraction * observed
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= threshold:
+                return min(bound, self.latency_max_ms)
+        return self.latency_max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        observed = sum(self.histogram)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "latency_ms": {
+                "avg": round(self.latency_sum_ms / observed, 1) if observed else None,
+                "p50": _round(self.percentile(0.5)),
+                "p90": _round(self.percentile(0.9)),
+                "max": round(self.latency_max_ms, 1),
+            },
+            "histogram": {
+                ("+Inf" if bound == float("inf") else f"le_{bound}"): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)
+                if count
+            },
+        }
+
+
+class ApiCallRecorder:
+    """Thread-safe aggregation of botocore call events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[CallKey, _CallStats] = {}
+
+    def _get(self, key: CallKey) -> _CallStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _CallStats()
+        return stats
+
+    @staticmethod
+    def _key(model: Any, context: Optional[Dict[str, Any]]) -> CallKey:
+        region = (context or {}).get("client_region") or "global"
+        return (model.service_model.service_name, model.name, region)
+
+    def before_call(self, model=None, context=None, **kwargs) -> None:
+        if context is not None and model is not None:
+            context[_CALL_KEY] = self._key(model, context)
+            context[_START_TIME_KEY] = time.perf_counter()
+
+    def after_call(self, model=None, context=None, parsed=None, **kwargs) -> None:
+        self._finish(model, context, parsed or {}, None)
+
+    def after_call_error(self, model=None, context=None, exception=None, **kwargs) -> None:
+        self._finish(model, context, {}, exception)
+
+    def _finish(self, model, context, parsed: Dict[str, Any], exception: Optional[Exception]) -> None:
+        context = context if context is not None else {}
+        # after-call-error carries no operation model - use the key stored by before-call
+        key = context.pop(_CALL_KEY, None) or (self._key(model, context) if model is not None else None)
+        if key is None:
+            return
+        start = context.pop(_START_TIME_KEY, None)
+        metadata = parsed.get("ResponseMetadata", {})
+        error_code = parsed.get("Error", {}).get("Code")
+
+        with self._lock:
+            stats = self._get(key)
+            stats.calls += 1
+            # RetryAttempts counts every retry the client made, whatever the retry mode
+            stats.retries += metadata.get("RetryAttempts", 0)
+            if error_code or exception is not None:
+                stats.errors += 1
+            if start is not None:
+                stats.observe((time.perf_counter() - start) * 1000)
+
+    def needs_retry(self, response=None, operation=None, request_dict=None, caught_exception=None, **kwargs) -> None:
+        # Observe every attempt - returning None leaves the retry decision to botocore
+        if operation is None or not response:
+            return
+        error_code = response[1].get("Error", {}).get("Code") if len(response) > 1 else None
+        if error_code not in THROTTLE_ERROR_CODES:
+            return
+        context = (request_dict or {}).get("context")
+        with self._lock:
+            self._get(self._key(operation, context)).throttles += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-call stats keyed 'service:operation:region' plus overall totals"""
+        with self._lock:
+            items = sorted(self._stats.items())
+            calls = {":".join(key): stats.to_dict() for key, stats in items}
+            totals = {
+                field: sum(getattr(stats, field) for _, stats in items)
+                for field in ("calls", "errors", "retries", "throttles")
+            }
+        return {"totals": totals, "calls": calls}
+
+    def emit_metrics(self, metrics, namespace: str = "Cyngular/AWSApi") -> None:
+        """Publish per-operation counts and latency through a MetricsCollector"""
+        batch: List[Dict[str, Any]] = []
+        with self._lock:
+            items = list(self._stats.items())
+        for (service, operation, region), stats in items:
+            dimensions = {"Service": service, "Operation": operation, "Region": region}
+            for name in ("calls", "errors", "retries", "throttles"):
+                value = getattr(stats, name)
+                if value:
+                    batch.append({"name": f"Api{name.capitalize()}", "value": value, "dimensions": dimensions})
+            if sum(stats.histogram):
+                batch.append(
+                    {
+                        "name": "ApiLatencyAvg",
+                        "value": stats.latency_sum_ms / sum(stats.histogram),
+                        "unit": "Milliseconds",
+                        "dimensions": dimensions,
+                    }
+                )
+        metrics.put_metrics_batch(namespace, batch)
+
+
+_recorder = ApiCallRecorder()
+_installed_sessions = set()
+_install_lock = threading.Lock()
+
+
+def get_recorder() -> ApiCallRecorder:
+    return _recorder
+
+
+def install(session: Optional[boto3.session.Session] = None) -> ApiCallRecorder:
+    """
+    Register the call handlers on a boto3 session (the default session if omitted)
+
+    Clients copy the session's handlers when they are created, so install()
+    must run before the clients to be measured are created. Safe to call on
+    every invocation.
+
+    Args:
+        session: boto3 session to instrument
+
+    Returns:
+        The process-wide ApiCallRecorder
+    """
+    if session is None:
+        session = boto3.DEFAULT_SESSION or boto3._get_default_session()
+
+    with _install_lock:
+        if id(session) in _installed_sessions:
+            return _recorder
+        events = session.events
+        events.register("before-call", _recorder.before_call, unique_id="cyngular-api-before-call")
+        events.register("after-call", _recorder.after_call, unique_id="cyngular-api-after-call")
+        events.register("after-call-error", _recorder.after_call_error, unique_id="cyngular-api-after-call-error")
+        events.register("needs-retry", _recorder.needs_retry, unique_id="cyngular-api-needs-retry")
+        _installed_sessions.add(id(session))
+    return _recorder
+
+
+def summary() -> Dict[str, Any]:
+    return _recorder.summary()
+
+
+def reset() -> None:
+    _recorder.reset()
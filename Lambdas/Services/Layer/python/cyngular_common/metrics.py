@@ -3,35 +3,458 @@ CloudWatch metrics utility for Cyngular Lambda functions.
 
 This module provides centralized metrics collection and publishing functionality
 for monitoring Lambda function performance and business metrics.
+
+Three publishing modes are supported:
+    api   - every put_metric call is sent with PutMetricData; put_metrics_batch
+            pre-aggregates its metrics before sending
+    batch - metrics are aggregated in memory and sent by flush() as statistic
+            sets / value-count histograms, up to 1000 datums per request
+    emf   - metrics are aggregated in memory and written once by flush() as
+            CloudWatch Embedded Metric Format log lines (no API calls)
+
+With background flushing enabled (METRICS_BACKGROUND_FLUSH=true) metrics are
+pushed onto a bounded queue and published by a daemon thread every
+METRICS_FLUSH_INTERVAL_SECONDS, so callers never wait on CloudWatch. flush()
+then stops the thread and drains the queue within the given timeout.
 """
 
 import boto3
+import collections
+import json
 import logging
-from typing import Dict, List, Any, Optional
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Use Lambda runtime logger properly
 logger = logging.getLogger(__name__)
 
+METRICS_MODES = ("api", "batch", "emf")
+# EMF limits: 100 metrics per directive, 100 values per metric array
+EMF_MAX_METRICS_PER_LINE = 100
+EMF_MAX_VALUES_PER_METRIC = 100
+# PutMetricData limits: 1000 datums and 1MB per request, 150 distinct values per datum
+PUT_METRIC_DATA_MAX_DATUMS = 1000
+PUT_METRIC_DATA_MAX_BYTES = 900_000
+MAX_DISTINCT_VALUES_PER_DATUM = 150
+DIMENSION_CACHE_SIZE = 1024
+# Background flusher defaults
+DROP_POLICIES = ("drop_oldest", "drop_newest")
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_FLUSH_INTERVAL_SECONDS = 10.0
+DRAIN_BATCH_SIZE = 5000
+
+DimensionsKey = Tuple[Tuple[str, str], ...]
+
+
+class _MetricAggregate:
+    """Running value/count histogram and statistic set for one metric series"""
+
+    __slots__ = ("counts", "sample_count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.counts: Dict[float, int] = {}
+        self.sample_count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value: float) -> None:
+        self.counts[value] = self.counts.get(value, 0) + 1
+        self.sample_count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def datum_values(self) -> Dict[str, Any]:
+        """Cheapest PutMetricData representation that preserves the distribution"""
+        if self.sample_count == 1:
+            return {"Value": self.total}
+        if len(self.counts) <= MAX_DISTINCT_VALUES_PER_DATUM:
+            return {"Values": list(self.counts.keys()), "Counts": [float(c) for c in self.counts.values()]}
+        return {
+            "StatisticValues": {
+                "SampleCount": float(self.sample_count),
+                "Sum": self.total,
+                "Minimum": self.minimum,
+                "Maximum": self.maximum,
+            }
+        }
+
+    def values(self) -> List[float]:
+        """Individual observations, for formats without counts (EMF)"""
+        return [value for value, count in self.counts.items() for _ in range(count)]
+
+
+def flush_timeout_from_context(context: Any, margin_seconds: float = 2.0) -> Optional[float]:
+    """Seconds left for the final metrics drain, keeping margin_seconds of the Lambda timeout"""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return max(0.0, context.get_remaining_time_in_millis() / 1000 - margin_seconds)
+
 
 class MetricsCollector:
     """Centralized metrics collection and publishing for Lambda functions"""
 
-    def __init__(self, client_name: str, lambda_function_type: str):
+    def __init__(
+        self,
+        client_name: str,
+        lambda_function_type: str,
+        mode: Optional[str] = None,
+        background: Optional[bool] = None,
+        queue_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        drop_policy: Optional[str] = None,
+    ):
         """
         Initialize metrics collector
 
         Args:
             client_name: The client name for dimension tagging
             lambda_function_type: The type of Lambda function (ServiceOrchestrator, RegionalServiceManager, etc.)
+            mode: Publishing mode ('api', 'batch' or 'emf'); the METRICS_MODE env var takes precedence
+            background: Publish from a background thread (env METRICS_BACKGROUND_FLUSH)
+            queue_size: Background queue bound (env METRICS_QUEUE_SIZE)
+            flush_interval: Seconds between background flushes (env METRICS_FLUSH_INTERVAL_SECONDS)
+            drop_policy: 'drop_oldest' or 'drop_newest' when the queue is full (env METRICS_DROP_POLICY)
         """
         self.client_name = client_name
         self.lambda_function_type = lambda_function_type
 
-        # Configure CloudWatch client with retry settings
-        retry_config = Config(retries={"max_attempts": 3, "mode": "adaptive"})
-        self.cloudwatch_client = boto3.client("cloudwatch", config=retry_config)
+        self.mode = os.environ.get("METRICS_MODE", mode or "api").lower()
+        if self.mode not in METRICS_MODES:
+            raise ValueError(f"Unknown metrics mode: {self.mode}. Expected one of {METRICS_MODES}")
+
+        self._cloudwatch_client = None
+        self._aggregates: Dict[Tuple[str, str, str, DimensionsKey], _MetricAggregate] = {}
+        self._buffer_lock = threading.Lock()
+        self._dimension_cache: Dict[Any, Tuple[DimensionsKey, List[Dict[str, str]]]] = {}
+
+        if background is None:
+            background = os.environ.get("METRICS_BACKGROUND_FLUSH", "false").lower() == "true"
+        self.background = background
+        self.queue_size = int(queue_size or os.environ.get("METRICS_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        self.flush_interval = float(
+            flush_interval or os.environ.get("METRICS_FLUSH_INTERVAL_SECONDS", DEFAULT_FLUSH_INTERVAL_SECONDS)
+        )
+        self.drop_policy = (drop_policy or os.environ.get("METRICS_DROP_POLICY", "drop_oldest")).lower()
+        if self.drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {self.drop_policy}. Expected one of {DROP_POLICIES}")
+
+        # deque append/popleft are atomic, so producers never take a lock; with
+        # maxlen set, a full deque discards its oldest entry on append
+        self._queue = collections.deque(
+            maxlen=self.queue_size if self.drop_policy == "drop_oldest" else None
+        )
+        self._stop_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._drain_deadline: Optional[float] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "dropped": 0, "flushed": 0, "flushes": 0, "flush_errors": 0}
+
+    @property
+    def cloudwatch_client(self):
+        """CloudWatch client, created on first use so buffered modes only pay for it at flush"""
+        if self._cloudwatch_client is None:
+            # Configure CloudWatch client with retry settings
+            retry_config = Config(retries={"max_attempts": 3, "mode": "adaptive"})
+            self._cloudwatch_client = boto3.client("cloudwatch", config=retry_config)
+        return self._cloudwatch_client
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Background queue counters: enqueued, dropped, flushed observations, flush cycles and errors"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = len(self._queue)
+        return stats
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    @property
+    def _buffered(self) -> bool:
+        return self.background or self.mode != "api"
+
+    def _dimensions(self, dimensions: Optional[Dict[str, str]]) -> Tuple[DimensionsKey, List[Dict[str, str]]]:
+        """Default + custom dimensions as (hashable key, PutMetricData list), cached per dimension set"""
+        cache_key = tuple(dimensions.items()) if dimensions else ()
+        cached = self._dimension_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Default dimensions, custom dimensions override on name clash
+        merged = {
+            "ClientName": self.client_name,
+            "LambdaFunction": self.lambda_function_type,
+        }
+        if dimensions:
+            merged.update(dimensions)
+        key = tuple(merged.items())
+        result = (key, [{"Name": name, "Value": value} for name, value in key])
+
+        if len(self._dimension_cache) < DIMENSION_CACHE_SIZE:
+            self._dimension_cache[cache_key] = result
+        return result
+
+    def _record(
+        self,
+        aggregates: Dict[Tuple[str, str, str, DimensionsKey], _MetricAggregate],
+        namespace: str,
+        metric_name: str,
+        value: float,
+        unit: str,
+        dimensions: Optional[Dict[str, str]],
+    ) -> None:
+        dimensions_key, _ = self._dimensions(dimensions)
+        key = (namespace, metric_name, unit, dimensions_key)
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = aggregates[key] = _MetricAggregate()
+        aggregate.add(value)
+
+    def _buffer_metric(
+        self,
+        namespace: str,
+        metric_name: str,
+        value: float,
+        unit: str,
+        dimensions: Optional[Dict[str, str]],
+    ) -> None:
+        """Aggregate a metric into the buffer for the next flush() instead of calling CloudWatch"""
+        if self.background:
+            self._enqueue((namespace, metric_name, value, unit, dimensions))
+            return
+        with self._buffer_lock:
+            self._record(self._aggregates, namespace, metric_name, value, unit, dimensions)
+
+    def _enqueue(self, observation: Tuple) -> None:
+        """Hand an observation to the background flusher, applying the drop policy when full"""
+        if len(self._queue) >= self.queue_size:
+            # drop_oldest: the bounded deque evicts the head on append
+            self._count("dropped")
+            if self.drop_policy == "drop_newest":
+                return
+        self._queue.append(observation)
+        self._count("enqueued")
+        self._ensure_flusher()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._buffer_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stop_event.clear()
+            self._drain_deadline = None
+            self._flusher = threading.Thread(
+                target=self._flusher_loop, name="metrics-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _flusher_loop(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self._drain_once()
+
+        # Final drain - bounded by the deadline set by flush()
+        while self._queue:
+            if self._drain_deadline is not None and time.time() >= self._drain_deadline:
+                remaining = len(self._queue)
+                self._queue.clear()
+                self._count("dropped", remaining)
+                logger.warning(f"Metrics drain timed out - dropped {remaining} queued observations")
+                return
+            self._drain_once()
+
+    def _drain_once(self) -> int:
+        """Move up to DRAIN_BATCH_SIZE queued observations into aggregates and publish them"""
+        aggregates = {}
+        drained = 0
+        while drained < DRAIN_BATCH_SIZE:
+            try:
+                namespace, metric_name, value, unit, dimensions = self._queue.popleft()
+            except IndexError:
+                break
+            self._record(aggregates, namespace, metric_name, value, unit, dimensions)
+            drained += 1
+        if not aggregates:
+            return 0
+
+        written = self._publish(aggregates)
+        if written:
+            self._count("flushed", drained)
+            self._count("flushes")
+        else:
+            self._count("flush_errors")
+            self._count("dropped", drained)
+        return written
+
+    def _publish(
+        self, aggregates: Dict[Tuple[str, str, str, DimensionsKey], _MetricAggregate]
+    ) -> int:
+        try:
+            if self.mode == "emf":
+                written = self._write_emf(aggregates)
+                logger.info(f"Flushed {len(aggregates)} metric series as {written} EMF log lines")
+            else:
+                written = self._send_aggregates(aggregates)
+                logger.info(f"Flushed {len(aggregates)} metric series in {written} PutMetricData requests")
+            return written
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            logger.warning(f"Failed to flush metrics: {error_code} - {str(e)}")
+        except Exception as e:
+            logger.warning(f"Unexpected error flushing metrics: {str(e)}")
+        return 0
+
+    def _send_aggregates(
+        self, aggregates: Dict[Tuple[str, str, str, DimensionsKey], _MetricAggregate]
+    ) -> int:
+        """Send aggregated series with as few PutMetricData requests as the limits allow"""
+        datums_by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+        for (namespace, metric_name, unit, dimensions_key), aggregate in aggregates.items():
+            _, dimension_list = self._dimensions(dict(dimensions_key))
+            datum = {
+                "MetricName": metric_name,
+                "Unit": unit,
+                "Dimensions": dimension_list,
+                **aggregate.datum_values(),
+            }
+            datums_by_namespace.setdefault(namespace, []).append(datum)
+
+        requests = 0
+        for namespace, datums in datums_by_namespace.items():
+            batch, batch_bytes = [], 0
+            for datum in datums:
+                datum_bytes = len(json.dumps(datum))
+                if batch and (
+                    len(batch) >= PUT_METRIC_DATA_MAX_DATUMS
+                    or batch_bytes + datum_bytes > PUT_METRIC_DATA_MAX_BYTES
+                ):
+                    self.cloudwatch_client.put_metric_data(Namespace=namespace, MetricData=batch)
+                    requests += 1
+                    batch, batch_bytes = [], 0
+                batch.append(datum)
+                batch_bytes += datum_bytes
+            if batch:
+                self.cloudwatch_client.put_metric_data(Namespace=namespace, MetricData=batch)
+                requests += 1
+        return requests
+
+    def _write_emf(
+        self, aggregates: Dict[Tuple[str, str, str, DimensionsKey], _MetricAggregate]
+    ) -> int:
+        """Write aggregated series as EMF log lines, one group per namespace and dimension set"""
+        groups: Dict[Any, Dict[str, Any]] = {}
+        for (namespace, metric_name, unit, dimensions_key), aggregate in aggregates.items():
+            group = groups.setdefault(
+                (namespace, dimensions_key),
+                {"namespace": namespace, "dimensions": dict(dimensions_key), "metrics": {}},
+            )
+            entry = group["metrics"].setdefault(metric_name, {"unit": unit, "values": []})
+            entry["values"].extend(aggregate.values())
+
+        timestamp = int(time.time() * 1000)
+        lines = 0
+        for group in groups.values():
+            dimension_names = list(group["dimensions"].keys())
+            # Split long value arrays so every line stays within the EMF limits
+            chunks = []
+            for name, entry in group["metrics"].items():
+                values = entry["values"]
+                for i in range(0, len(values), EMF_MAX_VALUES_PER_METRIC):
+                    chunks.append((name, entry["unit"], values[i : i + EMF_MAX_VALUES_PER_METRIC]))
+
+            while chunks:
+                line_metrics, remaining = {}, []
+                for name, unit, values in chunks:
+                    if name in line_metrics or len(line_metrics) >= EMF_MAX_METRICS_PER_LINE:
+                        remaining.append((name, unit, values))
+                    else:
+                        line_metrics[name] = (unit, values)
+                chunks = remaining
+
+                document = {
+                    "_aws": {
+                        "Timestamp": timestamp,
+                        "CloudWatchMetrics": [
+                            {
+                                "Namespace": group["namespace"],
+                                "Dimensions": [dimension_names],
+                                "Metrics": [
+                                    {"Name": name, "Unit": unit} for name, (unit, _) in line_metrics.items()
+                                ],
+                            }
+                        ],
+                    },
+                    **group["dimensions"],
+                }
+                for name, (_, values) in line_metrics.items():
+                    document[name] = values[0] if len(values) == 1 else values
+
+                # EMF must reach stdout unprefixed - the Lambda log formatter would break parsing
+                sys.stdout.write(json.dumps(document) + "\n")
+                lines += 1
+
+        sys.stdout.flush()
+        return lines
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """
+        Publish buffered metrics
+
+        Observations of the same metric and dimension set are aggregated: into
+        value/count histograms or statistic sets in batch mode, into value
+        arrays on a shared EMF line in emf mode. With background flushing, the
+        flusher thread is stopped after draining the queue; whatever is still
+        queued when timeout expires is dropped and counted in stats.
+
+        Args:
+            timeout: Maximum seconds to spend draining the background queue
+
+        Returns:
+            Number of PutMetricData requests or EMF log lines written by this call
+            (number of flush cycles when flushing in the background)
+        """
+        if self.background:
+            return self._stop_flusher(timeout)
+
+        with self._buffer_lock:
+            aggregates, self._aggregates = self._aggregates, {}
+        if not aggregates:
+            return 0
+        return self._publish(aggregates)
+
+    def _stop_flusher(self, timeout: Optional[float]) -> int:
+        flusher = self._flusher
+        if flusher is None or not flusher.is_alive():
+            # Never started (or already stopped) - drain leftovers inline
+            written = 0
+            deadline = time.time() + timeout if timeout is not None else None
+            while self._queue and (deadline is None or time.time() < deadline):
+                written += self._drain_once()
+            if self._queue:
+                self._count("dropped", len(self._queue))
+                self._queue.clear()
+            return written
+
+        flushes_before = self.stats["flushes"]
+        self._drain_deadline = time.time() + timeout if timeout is not None else None
+        self._stop_event.set()
+        flusher.join(timeout)
+        if flusher.is_alive():
+            logger.warning(f"Metrics flusher still running after {timeout}s - giving up on the final drain")
+        stats = self.stats
+        logger.info(
+            f"Metrics flusher stopped: {stats['flushed']} flushed, {stats['dropped']} dropped, "
+            f"{stats['queued']} still queued"
+        )
+        return stats["flushes"] - flushes_before
 
     def put_metric(
         self,
@@ -56,17 +479,12 @@ class MetricsCollector:
             if not isinstance(value, (int, float)):
                 logger.warning(f"Invalid metric value for {metric_name}: {value} (type: {type(value)}). Expected numeric value. Skipping metric.")
                 return
-            # Default dimensions
-            metric_dimensions = [
-                {"Name": "ClientName", "Value": self.client_name},
-                {"Name": "LambdaFunction", "Value": self.lambda_function_type},
-            ]
 
-            # Add custom dimensions
-            if dimensions:
-                for key, value in dimensions.items():
-                    metric_dimensions.append({"Name": key, "Value": value})
+            if self._buffered:
+                self._buffer_metric(namespace, metric_name, value, unit, dimensions)
+                return
 
+            _, metric_dimensions = self._dimensions(dimensions)
             metric_data = {
                 "MetricName": metric_name,
                 "Value": value,
@@ -94,6 +512,9 @@ class MetricsCollector:
         """
         Put multiple metrics to CloudWatch in a single batch
 
+        Observations of the same metric and dimensions are pre-aggregated into
+        one datum before sending.
+
         Args:
             namespace: CloudWatch namespace
             metrics: List of metric dictionaries with keys: name, value, unit, dimensions (optional)
@@ -102,43 +523,36 @@ class MetricsCollector:
             return
 
         try:
-            metric_data = []
-
+            # Buffered modes aggregate into the shared buffer, api mode into a throwaway one
+            aggregates = {}
             for metric in metrics:
-                # Default dimensions
-                dimensions = [
-                    {"Name": "ClientName", "Value": self.client_name},
-                    {"Name": "LambdaFunction", "Value": self.lambda_function_type},
-                ]
-
-                # Add custom dimensions
-                if "dimensions" in metric:
-                    for key, value in metric["dimensions"].items():
-                        dimensions.append({"Name": key, "Value": value})
-
                 # Ensure metric value is numeric
                 metric_value = metric["value"]
                 if not isinstance(metric_value, (int, float)):
                     logger.warning(f"Invalid metric value for {metric['name']}: {metric_value} (type: {type(metric_value)}). Skipping metric.")
                     continue
 
-                metric_data.append(
-                    {
-                        "MetricName": metric["name"],
-                        "Value": metric_value,
-                        "Unit": metric.get("unit", "Count"),
-                        "Dimensions": dimensions,
-                    }
-                )
-
-            # max 20 metrics per batch
-            for i in range(0, len(metric_data), 20):
-                batch = metric_data[i : i + 20]
-                self.cloudwatch_client.put_metric_data(
-                    Namespace=namespace, MetricData=batch
-                )
-
-            logger.info(f"Batch metrics sent: {len(metrics)} metrics to {namespace}")
+                if self._buffered:
+                    self._buffer_metric(
+                        namespace,
+                        metric["name"],
+                        metric_value,
+                        metric.get("unit", "Count"),
+                        metric.get("dimensions"),
+                    )
+                else:
+                    self._record(
+                        aggregates,
+                        namespace,
+                        metric["name"],
+                        metric_value,
+                        metric.get("unit", "Count"),
+                        metric.get("dimensions"),
+                    )
+
+            if aggregates:
+                requests = self._send_aggregates(aggregates)
+                logger.info(f"Batch metrics sent: {len(metrics)} metrics to {namespace} in {requests} requests")
 
         except ClientError as e:
             error_code = e.response["Error"]["Code"]
@@ -0,0 +1,218 @@
+"""
+Opt-in per-invocation profiling for Cyngular Lambda handlers.
+
+Decorate a handler with @profile_handler(). Nothing happens unless
+PROFILE_MODE is set ("cprofile", "tracemalloc" or "all"); the disabled path is
+a single environment lookup. Sampled invocations (PROFILE_SAMPLE_RATE, 0-1)
+write cProfile stats and a tracemalloc top-N report to /tmp and, when
+PROFILE_S3_BUCKET is set, upload them under PROFILE_S3_PREFIX.
+cProfile, pstats and tracemalloc are only imported once profiling is on, so
+decorated handlers do not load them on a cold start.
+
+Handlers fan work out to ThreadPoolExecutor workers. tracemalloc traces every
+thread. Before Python 3.12 a cProfile profiler only sees the thread that
+enabled it, so each thread started during the invocation gets its own
+profiler and the reports merge them. From 3.12 cProfile runs on
+sys.monitoring: the handler's profiler already records every thread (and a
+second profiler cannot be enabled), but concurrent threads share its call
+stack, so worker functions get their call counts and own time (tottime) and
+no meaningful cumulative time. The text report therefore ranks by both.
+"""
+
+import functools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+    import pstats
+    import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = "/tmp/cyngular-profiles"
+DEFAULT_TOP_N = 25
+TRACEMALLOC_FRAMES = 10
+# cProfile is process-wide (sys.monitoring) from 3.12 and per-thread before
+PROFILER_SEES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def _modes(setting: str) -> List[str]:
+    modes = [m.strip().lower() for m in setting.split(",") if m.strip()]
+    if "all" in modes:
+        return ["cprofile", "tracemalloc"]
+    return [m for m in modes if m in ("cprofile", "tracemalloc")]
+
+
+def _sampled() -> bool:
+    rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "1"))
+    return rate >= 1 or random.random() < rate  # nosec B311 - sampling, not security
+
+
+class _ThreadProfilers:
+    """Starts a cProfile profiler in every thread created while installed (Python < 3.12)"""
+
+    def __init__(self):
+        self.profilers: List["cProfile.Profile"] = []
+        self._lock = threading.Lock()
+        self._installed = False
+
+    def _start(self, frame: Any, event: str, arg: Any) -> None:
+        # threading calls this on the new thread's first profile event; the profiler replaces it
+        import cProfile
+
+        sys.setprofile(None)
+        if not self._installed:
+            return
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.profilers.append(profiler)
+        profiler.enable()
+
+    def install(self) -> None:
+        self._installed = True
+        threading.setprofile(self._start)
+
+    def uninstall(self) -> None:
+        threading.setprofile(None)
+        self._installed = False
+
+
+def _cprofile_report(stats: "pstats.Stats", top_n: int) -> str:
+    import io
+
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(top_n)
+    # Worker-thread hot spots on 3.12, where their cumulative times are not tracked
+    stats.sort_stats("tottime").print_stats(top_n)
+    return stream.getvalue()
+
+
+def _tracemalloc_report(snapshot: "tracemalloc.Snapshot", peak: int, top_n: int) -> Dict[str, Any]:
+    import tracemalloc
+
+    # Leave out the profiler's own allocations
+    snapshot = snapshot.filter_traces(
+        [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    return {
+        "peak_bytes": peak,
+        "top": [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:top_n]
+        ],
+    }
+
+
+def _upload(paths: List[str]) -> None:
+    bucket = os.environ.get("PROFILE_S3_BUCKET")
+    if not bucket:
+        return
+    prefix = os.environ.get("PROFILE_S3_PREFIX", "cyngular-profiles").strip("/")
+    try:
+        import boto3
+
+        s3_client = boto3.client("s3")
+        for path in paths:
+            key = f"{prefix}/{os.path.basename(path)}"
+            s3_client.upload_file(path, bucket, key)
+            logger.info(f"Profile uploaded to s3://{bucket}/{key}")
+    except Exception as e:
+        logger.warning(f"Failed to upload profiles to s3://{bucket}/{prefix}: {str(e)}")
+
+
+def _run_profiled(handler: Callable, event: Any, context: Any, label: str, modes: List[str]) -> Any:
+    import cProfile
+    import tracemalloc
+
+    top_n = int(os.environ.get("PROFILE_TOP_N", DEFAULT_TOP_N))
+    request_id = getattr(context, "aws_request_id", None) or uuid.uuid4().hex
+    base_path = os.path.join(PROFILE_DIR, f"{label}-{int(time.time())}-{request_id}")
+
+    profiler = cProfile.Profile() if "cprofile" in modes else None
+    # Worker threads (ThreadPoolExecutor) need their own profilers before 3.12
+    thread_profilers = _ThreadProfilers() if profiler and not PROFILER_SEES_ALL_THREADS else None
+    started_tracemalloc = False
+    if "tracemalloc" in modes and not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        started_tracemalloc = True
+
+    start_time = time.time()
+    if thread_profilers:
+        thread_profilers.install()
+    if profiler:
+        profiler.enable()
+    try:
+        return handler(event, context)
+    finally:
+        if profiler:
+            profiler.disable()
+        if thread_profilers:
+            thread_profilers.uninstall()
+        duration = time.time() - start_time
+
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            written = []
+            if profiler:
+                import pstats
+
+                stats = pstats.Stats(profiler)
+                for thread_profiler in thread_profilers.profilers if thread_profilers else []:
+                    stats.add(thread_profiler)
+                stats.dump_stats(f"{base_path}.pstats")
+                with open(f"{base_path}.cprofile.txt", "w") as f:
+                    f.write(_cprofile_report(stats, top_n))
+                written += [f"{base_path}.pstats", f"{base_path}.cprofile.txt"]
+            if "tracemalloc" in modes and tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                report = _tracemalloc_report(tracemalloc.take_snapshot(), peak, top_n)
+                with open(f"{base_path}.tracemalloc.json", "w") as f:
+                    json.dump(report, f, indent=2)
+                written.append(f"{base_path}.tracemalloc.json")
+                logger.info(f"[{label} | profiling] Peak traced memory: {peak / 1024 / 1024:.1f} MiB")
+            threads = f" (+{len(thread_profilers.profilers)} worker threads)" if thread_profilers else ""
+            logger.info(f"[{label} | profiling] {duration:.2f}s invocation profiled{threads}: {', '.join(written)}")
+            _upload(written)
+        except Exception as e:
+            logger.warning(f"[{label} | profiling] Failed to write profiles: {str(e)}")
+        finally:
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+
+def profile_handler(name: Optional[str] = None) -> Callable:
+    """
+    Decorate a Lambda handler so invocations can be profiled via env vars
+
+    Args:
+        name: Label used in profile file names, defaults to the handler's module
+
+    Returns:
+        The handler wrapper
+    """
+
+    def decorator(handler: Callable) -> Callable:
+        label = name or handler.__module__
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            setting = os.environ.get("PROFILE_MODE")
+            if not setting:
+                return handler(event, context)
+            modes = _modes(setting)
+            if not modes or not _sampled():
+                return handler(event, context)
+            return _run_profiled(handler, event, context, label, modes)
+
+        return wrapper
+
+    return decorator
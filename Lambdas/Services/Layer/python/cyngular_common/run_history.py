@@ -0,0 +1,240 @@
+"""
+Run history and performance regression detection for Cyngular Lambda functions.
+
+Compact per-run summaries are appended to JSON-lines streams: "runs" for the
+ServiceManager's run-level record and "cells/<service>/<region>" for each
+RegionProcessor cell. Each stream has its own object (or file), so parallel
+cells never write to the same key. find_regressions() flags a record whose
+duration or failure rate regressed against the trailing runs of its stream.
+"""
+
+import json
+import logging
+import os
+import statistics
+from typing import Any, Dict, List
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# Entries kept per stream - older ones are dropped on append
+MAX_STREAM_ENTRIES = 500
+DEFAULT_WINDOW = 10
+DEFAULT_MIN_RUNS = 3
+DEFAULT_DURATION_THRESHOLD = 1.5
+# Slowdowns smaller than this are noise, whatever the ratio
+DEFAULT_MIN_DURATION_DELTA_SECONDS = 5.0
+DEFAULT_FAILURE_RATE_THRESHOLD = 0.5
+RECENT_RUNS = 3
+
+
+def _parse_lines(body: str) -> List[Dict[str, Any]]:
+    records = []
+    for line in body.splitlines():
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping corrupt run history line")
+    return records
+
+
+def _render_lines(records: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in records)
+
+
+class LocalRunHistory:
+    """Run history kept as JSONL files under a local directory (tests / local runs)"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, stream: str) -> str:
+        return os.path.join(self.directory, f"{stream}.jsonl")
+
+    def read(self, stream: str) -> List[Dict[str, Any]]:
+        try:
+            with open(self._path(stream), "r") as f:
+                return _parse_lines(f.read())
+        except FileNotFoundError:
+            return []
+
+    def append(self, stream: str, record: Dict[str, Any], max_entries: int = MAX_STREAM_ENTRIES) -> List[Dict[str, Any]]:
+        """Append record and return the stream's previous entries"""
+        history = self.read(stream)
+        path = self._path(stream)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(_render_lines((history + [record])[-max_entries:]))
+        os.replace(tmp_path, path)
+        return history
+
+    def list_streams(self, prefix: str = "") -> List[str]:
+        streams = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".jsonl"):
+                    stream = os.path.relpath(os.path.join(root, name[: -len(".jsonl")]), self.directory)
+                    stream = stream.replace(os.sep, "/")
+                    if stream.startswith(prefix):
+                        streams.append(stream)
+        return sorted(streams)
+
+    def __repr__(self) -> str:
+        return f"LocalRunHistory({self.directory})"
+
+
+class S3RunHistory:
+    """Run history kept as one JSONL object per stream under an S3 prefix"""
+
+    def __init__(self, bucket: str, prefix: str, s3_client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.s3_client = s3_client or boto3.client("s3")
+
+    def _key(self, stream: str) -> str:
+        return f"{self.prefix}/{stream}.jsonl"
+
+    def read(self, stream: str) -> List[Dict[str, Any]]:
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self._key(stream))
+            return _parse_lines(response["Body"].read().decode("utf-8"))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return []
+            raise
+
+    def append(self, stream: str, record: Dict[str, Any], max_entries: int = MAX_STREAM_ENTRIES) -> List[Dict[str, Any]]:
+        """Append record and return the stream's previous entries"""
+        # S3 has no append - a stream is only ever written by one cell/run at a time
+        history = self.read(stream)
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(stream),
+            Body=_render_lines((history + [record])[-max_entries:]).encode("utf-8"),
+            ContentType="application/x-ndjson",
+        )
+        return history
+
+    def list_streams(self, prefix: str = "") -> List[str]:
+        streams = []
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}/{prefix}"):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith(".jsonl"):
+                    streams.append(obj["Key"][len(self.prefix) + 1 : -len(".jsonl")])
+        return sorted(streams)
+
+    def __repr__(self) -> str:
+        return f"S3RunHistory(s3://{self.bucket}/{self.prefix})"
+
+
+def get_run_history():
+    """Run history from env - S3 when RUN_HISTORY_BUCKET is set, /tmp otherwise"""
+    bucket = os.environ.get("RUN_HISTORY_BUCKET")
+    prefix = os.environ.get("RUN_HISTORY_PREFIX", "cyngular-service-manager/history")
+    if bucket:
+        return S3RunHistory(bucket, prefix)
+    return LocalRunHistory(os.path.join("/tmp", prefix.strip("/")))
+
+
+def cell_stream(service: str, region: str) -> str:
+    return f"cells/{service}/{region}"
+
+
+def find_regressions(
+    history: List[Dict[str, Any]],
+    current: Dict[str, Any],
+    window: int = DEFAULT_WINDOW,
+    duration_threshold: float = DEFAULT_DURATION_THRESHOLD,
+    failure_rate_threshold: float = DEFAULT_FAILURE_RATE_THRESHOLD,
+    min_runs: int = DEFAULT_MIN_RUNS,
+    min_duration_delta: float = DEFAULT_MIN_DURATION_DELTA_SECONDS,
+) -> List[Dict[str, Any]]:
+    """
+    Compare a run record with the trailing runs of its stream
+
+    Records carry duration_seconds and success. A duration regression is a
+    run slower than duration_threshold x the trailing median (and by at least
+    min_duration_delta seconds); a failure regression is a failure rate over
+    the last RECENT_RUNS runs that exceeds the trailing rate by
+    failure_rate_threshold.
+
+    Args:
+        history: Earlier records of the stream, oldest first
+        current: The record to check
+        window: Number of trailing runs forming the baseline
+        duration_threshold: Slowdown ratio that counts as a regression
+        failure_rate_threshold: Failure rate increase that counts as a regression
+        min_runs: Baseline runs needed before anything is flagged
+        min_duration_delta: Minimum absolute slowdown in seconds
+
+    Returns:
+        One entry per regressed metric, empty when the run is in line with the baseline
+    """
+    trailing = history[-window:]
+    if len(trailing) < min_runs:
+        return []
+
+    regressions = []
+    durations = [r["duration_seconds"] for r in trailing if r.get("duration_seconds") is not None]
+    duration = current.get("duration_seconds")
+    if durations and duration is not None:
+        median = statistics.median(durations)
+        if duration > median * duration_threshold and duration - median >= min_duration_delta:
+            regressions.append(
+                {
+                    "metric": "duration_seconds",
+                    "value": duration,
+                    "baseline": round(median, 3),
+                    "ratio": round(duration / median, 2) if median else None,
+                }
+            )
+
+    def failure_rate(records: List[Dict[str, Any]]) -> float:
+        return sum(1 for r in records if not r.get("success", True)) / len(records)
+
+    # The last few runs against the window before them, so one flaky run is not enough
+    split = max(0, len(history) - (RECENT_RUNS - 1))
+    recent, baseline = history[split:], history[max(0, split - window) : split]
+    if len(baseline) < min_runs:
+        return regressions
+    recent_rate = failure_rate(recent + [current])
+    baseline_rate = failure_rate(baseline)
+    if recent_rate - baseline_rate >= failure_rate_threshold:
+        regressions.append(
+            {
+                "metric": "failure_rate",
+                "value": round(recent_rate, 3),
+                "baseline": round(baseline_rate, 3),
+            }
+        )
+    return regressions
+
+
+def record_run(history_store, stream: str, record: Dict[str, Any], **thresholds) -> List[Dict[str, Any]]:
+    """
+    Append a run record to its stream and return regressions against earlier runs
+
+    Failures are logged, never raised - run history must not break a run.
+    """
+    try:
+        previous = history_store.append(stream, record)
+    except Exception as e:
+        logger.warning(f"Failed to append run history to {history_store} ({stream}): {str(e)}")
+        return []
+
+    window = int(os.environ.get("RUN_HISTORY_WINDOW", DEFAULT_WINDOW))
+    threshold = float(os.environ.get("REGRESSION_THRESHOLD", DEFAULT_DURATION_THRESHOLD))
+    thresholds.setdefault("window", window)
+    thresholds.setdefault("duration_threshold", threshold)
+    regressions = find_regressions(previous, record, **thresholds)
+    for regression in regressions:
+        logger.warning(
+            f"Performance regression in {stream}: {regression['metric']} "
+            f"{regression['value']} vs trailing {regression['baseline']}"
+        )
+    return regressions
@@ -0,0 +1,167 @@
+"""
+Structured, lazily formatted logging for Cyngular Lambda functions.
+
+StructuredLogger wraps a standard logger and emits one JSON document per
+record. The document is only serialized when a handler actually emits the
+record, so disabled levels cost nothing. Hot loops use:
+    sampled() - per-key rate limiting of repeated messages, per invocation
+    rollup()  - one summary record instead of one record per resource
+    payload() - truncated logging of events / results
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_PAYLOAD_MAX_CHARS = 2048
+DEFAULT_SAMPLE_BURST = 5
+DEFAULT_SAMPLE_EVERY = 100
+ROLLUP_MAX_EXAMPLES = 5
+
+
+def _payload_max_chars() -> int:
+    return int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", DEFAULT_PAYLOAD_MAX_CHARS))
+
+
+def truncate(payload: Any, max_chars: Optional[int] = None) -> str:
+    """JSON-serialize payload, cut to max_chars with a marker saying how much was dropped"""
+    max_chars = max_chars or _payload_max_chars()
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}...(+{len(text) - max_chars} chars)"
+
+
+class _JsonMessage:
+    """Log message rendered to JSON only when the record is emitted"""
+
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        document = {"event": self.event}
+        for key, value in self.fields.items():
+            # Callables are evaluated lazily, only for emitted records
+            document[key] = value() if callable(value) else value
+        return json.dumps(document, default=str)
+
+
+class Rollup:
+    """Counts per-item outcomes of a loop and logs them as one summary record"""
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+        self.counts: Dict[str, int] = {}
+        self.examples: Dict[str, List[Any]] = {}
+        self.start = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, outcome: str, item: Any = None) -> None:
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+            if item is not None:
+                examples = self.examples.setdefault(outcome, [])
+                if len(examples) < ROLLUP_MAX_EXAMPLES:
+                    examples.append(item)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            **self.fields,
+            "total": sum(self.counts.values()),
+            "counts": dict(self.counts),
+            "examples": dict(self.examples),
+            "duration_ms": round((time.time() - self.start) * 1000, 1),
+        }
+
+
+class StructuredLogger:
+    """JSON-document logging on top of a standard library logger"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.sample_burst = int(os.environ.get("LOG_SAMPLE_BURST", DEFAULT_SAMPLE_BURST))
+        self.sample_every = int(os.environ.get("LOG_SAMPLE_EVERY", DEFAULT_SAMPLE_EVERY))
+        self._sample_counts: Dict[str, int] = {}
+        self._sample_lock = threading.Lock()
+
+    def log(self, level: int, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, _JsonMessage(event, fields))
+
+    def debug(self, event: str, **fields) -> None:
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields) -> None:
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields) -> None:
+        self.log(logging.ERROR, event, **fields)
+
+    def sampled(self, event: str, key: Optional[str] = None, level: int = logging.INFO, **fields) -> None:
+        """
+        Log a repeated message rate-limited per key
+
+        The first sample_burst occurrences of a key are logged, then one in
+        every sample_every; each emitted record after suppression says how
+        many were skipped. Counts live until reset_sampling().
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        key = key or event
+        with self._sample_lock:
+            count = self._sample_counts.get(key, 0) + 1
+            self._sample_counts[key] = count
+        if count <= self.sample_burst:
+            self.log(level, event, **fields)
+        elif (count - self.sample_burst) % self.sample_every == 0:
+            self.log(level, event, occurrences=count, suppressed=self.sample_every - 1, **fields)
+
+    def reset_sampling(self) -> None:
+        """Forget sampled() counts, so the next occurrences are logged in full again"""
+        with self._sample_lock:
+            self._sample_counts.clear()
+
+    def payload(self, event: str, payload: Any, level: int = logging.INFO, **fields) -> None:
+        """Log an event/result payload, serialized and truncated only if emitted"""
+        self.log(level, event, payload=lambda: truncate(payload), **fields)
+
+    @contextmanager
+    def rollup(self, name: str, level: int = logging.INFO, **fields) -> Iterator[Rollup]:
+        """Collect per-item outcomes inside the block and log one summary record at the end"""
+        rollup = Rollup(name, fields)
+        try:
+            yield rollup
+        finally:
+            self.log(level, name, **rollup.summary())
+
+
+_loggers: Dict[str, StructuredLogger] = {}
+
+
+def get_logger(name: Optional[str] = None) -> StructuredLogger:
+    """Structured logger for name (the root logger when omitted), cached per name"""
+    key = name or ""
+    if key not in _loggers:
+        _loggers[key] = StructuredLogger(logging.getLogger(name))
+    return _loggers[key]
+
+
+def reset_sampling() -> None:
+    """Reset sampled() counts of every cached logger - call at the start of each Lambda invocation
+
+    Loggers outlive an invocation in a warm container; without a reset, keys
+    sampled by earlier invocations would stay suppressed in later ones.
+    """
+    for structured_logger in list(_loggers.values()):
+        structured_logger.reset_sampling()
@@ -0,0 +1,189 @@
+"""
+Lightweight span tracing for Cyngular Lambda functions.
+
+A run ID is created by the orchestrator and passed, together with the parent
+span ID, in every fan-out payload under TRACE_CONTEXT_KEY. Each function
+records child spans with timings and exports them as JSON lines to a
+pluggable sink, so one run can be stitched back together across Lambdas
+(see Lambdas/tools/trace_report.py).
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_CONTEXT_KEY = "trace"
+# Marker on stdout span lines, so they can be filtered out of CloudWatch Logs
+SPAN_LOG_MARKER = "cyngular_span"
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """A timed unit of work within a run"""
+
+    __slots__ = ("run_id", "span_id", "parent_id", "name", "attributes", "start", "end", "status", "error")
+
+    def __init__(self, run_id: str, name: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.run_id = run_id
+        self.span_id = new_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            SPAN_LOG_MARKER: 1,
+            "run_id": self.run_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "end": round(self.end, 6) if self.end is not None else None,
+            "duration_ms": round((self.end - self.start) * 1000, 3) if self.end is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class StdoutSpanSink:
+    """Writes spans as JSON lines to stdout (CloudWatch Logs inside Lambda)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def export(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str)
+        with self._lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+
+class FileSpanSink:
+    """Appends spans as JSON lines to a local file (tests / local runs)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def __repr__(self) -> str:
+        return f"FileSpanSink({self.path})"
+
+
+class NullSpanSink:
+    """Discards spans - tracing disabled"""
+
+    def export(self, span: Dict[str, Any]) -> None:
+        pass
+
+
+def get_span_sink():
+    """Span sink from TRACE_SINK: 'stdout' (default), 'file:<path>' or 'none'"""
+    setting = os.environ.get("TRACE_SINK", "stdout")
+    if setting == "none":
+        return NullSpanSink()
+    if setting.startswith("file:"):
+        return FileSpanSink(setting[len("file:"):])
+    return StdoutSpanSink()
+
+
+class Tracer:
+    """Creates spans for one run and exports them to a sink as they finish"""
+
+    def __init__(self, run_id: Optional[str] = None, parent_id: Optional[str] = None, sink=None):
+        """
+        Initialize tracer
+
+        Args:
+            run_id: Run the spans belong to; a new ID is generated if omitted
+            parent_id: Span in the calling function that spans without a local parent attach to
+            sink: Span sink with export(dict); defaults to get_span_sink()
+        """
+        self.run_id = run_id or uuid.uuid4().hex
+        self.parent_id = parent_id
+        self.sink = sink or get_span_sink()
+        self._local = threading.local()
+
+    @classmethod
+    def from_event(cls, event: Dict[str, Any], sink=None) -> "Tracer":
+        """Continue the run whose trace context was injected into the event payload"""
+        context = event.get(TRACE_CONTEXT_KEY) or {}
+        return cls(context.get("run_id"), context.get("parent_span_id"), sink)
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @property
+    def current_span(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes) -> Iterator[Span]:
+        """
+        Record a span around the enclosed block
+
+        The parent is, in order: the explicit parent (needed when the block
+        runs on a worker thread), the innermost open span on this thread, or
+        the tracer's remote parent.
+        """
+        if parent is not None:
+            parent_id = parent.span_id
+        else:
+            current = self.current_span
+            parent_id = current.span_id if current else self.parent_id
+
+        span = Span(self.run_id, name, parent_id, attributes)
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            span.end = time.time()
+            stack.pop()
+            self._export(span)
+
+    def _export(self, span: Span) -> None:
+        try:
+            self.sink.export(span.to_dict())
+        except Exception as e:
+            logger.warning(f"Failed to export span {span.name}: {str(e)}")
+
+    def inject(self, payload: Dict[str, Any], span: Optional[Span] = None) -> Dict[str, Any]:
+        """Add the trace context to a fan-out payload, parented on span (or the current span)"""
+        parent = span or self.current_span
+        payload[TRACE_CONTEXT_KEY] = {
+            "run_id": self.run_id,
+            "parent_span_id": parent.span_id if parent else self.parent_id,
+        }
+        return payload
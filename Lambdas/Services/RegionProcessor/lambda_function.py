@@ -1,12 +1,23 @@
 import json
 import logging
+import os
 import traceback
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from service_registry import SERVICE_REGISTRY
-# from cyngular_common.metrics import MetricsCollector
+from cyngular_common import budget, instrumentation
+from cyngular_common.metrics import MetricsCollector, flush_timeout_from_context
+from cyngular_common.profiling import profile_handler
+from cyngular_common.run_history import cell_stream, get_run_history, record_run
+from cyngular_common.structured_logging import get_logger, reset_sampling
+from cyngular_common.tracing import Tracer
 
 logger = logging.getLogger(__name__)
+slog = get_logger(__name__)
+
+# Every boto3 client created by the services is measured per operation and region
+instrumentation.install()
+budget.install()
 
 class RegionProcessor:
     def __init__(
@@ -15,14 +26,22 @@ class RegionProcessor:
         client_name: str,
         cyngular_bucket: str,
         cyngular_role_arn: str,
+        metrics: Optional[MetricsCollector] = None,
+        tracer: Optional[Tracer] = None,
+        resume_at: Optional[str] = None,
     ):
         self.region = region
         self.client_name = client_name
         self.cyngular_bucket = cyngular_bucket
         self.cyngular_role_arn = cyngular_role_arn
 
-        # # Initialize metrics collector
-        # self.metrics = MetricsCollector(client_name, "RegionalServiceManager")
+        # Buffered EMF metrics - flushed once by the handler, no API calls
+        self.metrics = metrics or MetricsCollector(
+            client_name, "RegionalServiceManager", mode="emf"
+        )
+        self.tracer = tracer or Tracer()
+        # First item the cell's previous run deferred - the service loops start there
+        self.resume_at = resume_at
 
     def process_service(self, service: str) -> Dict[str, Any]:
         """Process a specific service for the region"""
@@ -44,30 +63,34 @@ class RegionProcessor:
                     params.append(self.cyngular_bucket)
                 elif param == "cyngular_role_arn":
                     params.append(self.cyngular_role_arn)
+                elif param == "resume_at":
+                    params.append(self.resume_at)
                 else:
                     logger.error(
                         f"Unknown parameter {param} required for service {service}"
                     )
                     return {"success": False, "error": f"Unknown parameter: {param}"}
 
-            result = handler(*params)
+            with self.tracer.span(f"service.{service}", service=service, region=self.region) as span:
+                result = handler(*params)
+                span.set_attribute("success", bool(result.get("success")))
             result["service"] = service
             result["region"] = self.region
 
-            # if result.get("success"):
-            #     self.metrics.put_metric(
-            #         namespace="Cyngular/Services",
-            #         metric_name="ServiceProcessed",
-            #         value=1,
-            #         dimensions={"Service": service, "Region": self.region},
-            #     )
-            # else:
-            #     self.metrics.put_metric(
-            #         namespace="Cyngular/Services",
-            #         metric_name="ServiceFailed",
-            #         value=1,
-            #         dimensions={"Service": service, "Region": self.region},
-            #     )
+            if result.get("success"):
+                self.metrics.put_metric(
+                    namespace="Cyngular/Services",
+                    metric_name="ServiceProcessed",
+                    value=1,
+                    dimensions={"Service": service, "Region": self.region},
+                )
+            else:
+                self.metrics.put_metric(
+                    namespace="Cyngular/Services",
+                    metric_name="ServiceFailed",
+                    value=1,
+                    dimensions={"Service": service, "Region": self.region},
+                )
 
             return result
 
@@ -81,16 +104,65 @@ class RegionProcessor:
             }
 
 
+def previous_resume_at(service: str, region: str) -> Optional[str]:
+    """Where the cell's previous run stopped, when this run has API ceilings to stop at"""
+    if not budget.get_active_budget().ceilings:
+        return None
+    try:
+        history = get_run_history().read(cell_stream(service, region))
+    except Exception as e:
+        logger.warning(f"Failed to read run history of {service}/{region}, starting from the first item: {str(e)}")
+        return None
+    return history[-1].get("resume_at") if history else None
+
+
+def record_cell(service: str, region: str, run_id: str, start_time: float, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Append the cell's run to its history stream, returns regressions against earlier runs"""
+    api_calls = result.get("api_calls")
+    return record_run(
+        get_run_history(),
+        cell_stream(service, region),
+        {
+            "run_id": run_id,
+            "timestamp": start_time,
+            "duration_seconds": round(time.time() - start_time, 3),
+            "success": bool(result.get("success")),
+            "api_calls": api_calls["totals"]["calls"] if api_calls else None,
+            "deferred": sum(len(v) for k, v in result.items() if k.startswith("deferred_") and isinstance(v, list)),
+            "resume_at": result.get("resume_at"),
+        },
+    )
+
+
+@profile_handler("RegionProcessor")
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Main lambda handler"""
-    logger.info(f"Received event: {json.dumps(event)}")
+    # Sampling counts are per invocation, not per warm container
+    reset_sampling()
+    slog.payload("region_processor.received_event", event)
 
     client_name = event["client_name"]
-    # try:
-    #     temp_metrics = MetricsCollector(client_name, "RegionalServiceManager")
-    #     temp_metrics.record_invocation("Direct")
-    # except Exception:
-    #     logger.warning("Failed to record invocation metrics")
+    metrics = MetricsCollector(client_name, "RegionalServiceManager", mode="emf")
+    instrumentation.reset()
+    # Ceilings from API_BUDGET, narrowed to this cell's share of the run by the orchestrator's payload
+    budget.activate(budget.ApiBudget.from_env(event.get("api_budget")))
+    # Continues the orchestrator's run when the payload carries its trace context
+    tracer = Tracer.from_event(event)
+    try:
+        with tracer.span("RegionProcessor", service=event.get("service"), region=event.get("region")):
+            return _handle(event, metrics, tracer)
+    finally:
+        if os.environ.get("API_CALL_METRICS", "false").lower() == "true":
+            instrumentation.get_recorder().emit_metrics(metrics)
+        metrics.flush(timeout=flush_timeout_from_context(context))
+
+
+def _handle(event: Dict[str, Any], metrics: MetricsCollector, tracer: Tracer) -> Dict[str, Any]:
+    """Process one RegionProcessor event, recording metrics into the buffered collector"""
+    try:
+        metrics.record_invocation("Direct")
+    except Exception:
+        logger.warning("Failed to record invocation metrics")
 
     # Extract and validate all required parameters
     try:
@@ -113,10 +185,21 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     try:
         processor = RegionProcessor(
-            region, client_name, cyngular_bucket, cyngular_role_arn
+            region,
+            client_name,
+            cyngular_bucket,
+            cyngular_role_arn,
+            metrics,
+            tracer,
+            previous_resume_at(service, region),
         )
+        start_time = time.time()
         result = processor.process_service(service)
-        logger.info(f"Processing complete: {result}")
+        result["api_calls"] = instrumentation.summary()
+        result["api_budget"] = budget.get_active_budget().ledger()
+        result["run_id"] = tracer.run_id
+        result["regressions"] = record_cell(service, region, tracer.run_id, start_time, result)
+        slog.payload("region_processor.complete", result, service=service, region=region)
 
         return {"statusCode": 200, "body": json.dumps(result)}
 
@@ -132,13 +215,12 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         logger.info(traceback.format_exc())  # Log full traceback
 
-        # try:
-        #     if "processor" in locals():
-        #         processor.metrics.record_error(
-        #             error_details["error_type"], error_details["error_message"]
-        #         )
-        # except Exception:
-        #     logger.warning(traceback.format_exc())
+        try:
+            metrics.record_error(
+                error_details["error_type"], error_details["error_message"]
+            )
+        except Exception:
+            logger.warning(traceback.format_exc())
 
         return {
             "statusCode": 500,
@@ -18,7 +18,7 @@ class ServiceConfig:
 SERVICE_REGISTRY = {
     "dns": ServiceConfig(
         handler=process_dns_service,
-        required_params=["region", "cyngular_bucket"],
+        required_params=["region", "cyngular_bucket", "resume_at"],
     ),
     "vfl": ServiceConfig(
         handler=process_vfl_service,
@@ -26,10 +26,10 @@ SERVICE_REGISTRY = {
     ),
     "eks": ServiceConfig(
         handler=process_eks_service,
-        required_params=["region", "cyngular_role_arn"],
+        required_params=["region", "cyngular_role_arn", "resume_at"],
     ),
     "os": ServiceConfig(
         handler=process_os_service,
-        required_params=["region"]
+        required_params=["region", "resume_at"]
     ),
 }
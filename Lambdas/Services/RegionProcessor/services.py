@@ -1,17 +1,30 @@
 import boto3
 import logging
+import os
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from botocore.exceptions import ClientError
+from cyngular_common.budget import get_active_budget, resume_order
+from cyngular_common.structured_logging import get_logger, truncate
 from utils import check_access_entry_exists, create_cyngular_access_entry
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
+# Per-resource loops log through rollups / sampling instead of a line per resource
+slog = get_logger()
+
+# Next to this module - the working directory is only the code directory on Lambda
+AUDITD_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "auditd_rules")
+AUDITD_DOCUMENT = "AWS-RunShellScript"
+# Marks the auditd commands, so later runs can tell which instances already have them
+AUDITD_COMMENT = "Cyngular auditd configuration"
+AUDITD_CONFIGURED_STATUSES = ("Pending", "InProgress", "Delayed", "Success")
 
 
 def process_dns_service(
     region: str,
-    cyngular_bucket: str
+    cyngular_bucket: str,
+    resume_at: Optional[str] = None
 ) -> Dict[str, Any]:
     """Configure DNS logging for the region"""
     try:
@@ -51,30 +64,72 @@ def process_dns_service(
                 logger.error(f"QLC CREATION FAILED: {str(e)}")
                 return {"success": False, "error": str(e)}
 
-        vpc_list = ec2_client.describe_vpcs().get("Vpcs", [])
-        logger.info(f"FOUND {len(vpc_list)} VPCS TO PROCESS")
+        vpc_ids = [
+            vpc["VpcId"]
+            for page in ec2_client.get_paginator("describe_vpcs").paginate()
+            for vpc in page.get("Vpcs", [])
+        ]
+        logger.info(f"FOUND {len(vpc_ids)} VPCS TO PROCESS")
 
+        # VPCs associated by an earlier run are not charged to the budget again
+        associated = set()
+        try:
+            associations = r53_client.get_paginator("list_resolver_query_log_config_associations").paginate(
+                Filters=[{"Name": "ResolverQueryLogConfigId", "Values": [cyngular_resolver_id]}]
+            )
+            for page in associations:
+                for association in page.get("ResolverQueryLogConfigAssociations", []):
+                    if association.get("Status") not in ("FAILED", "DELETING"):
+                        associated.add(association["ResourceId"])
+        except ClientError as e:
+            # A role without the listing permission associates every VPC, as before
+            logger.warning(f"Cannot list query log config associations, associating all VPCs: {str(e)}")
+            associated.clear()
+
+        budget = get_active_budget()
         processed_vpcs = []
-        for vpc in vpc_list:
-            vpc_id = vpc.get("VpcId")
-            try:
-                logger.info(f"ASSOCIATING {vpc_id} WITH QLC")
-                r53_client.associate_resolver_query_log_config(
-                    ResolverQueryLogConfigId=cyngular_resolver_id, ResourceId=vpc_id
-                )
-                logger.info(f"SUCCESS: {vpc_id} associated")
-                processed_vpcs.append(vpc_id)
-            except Exception as e:
-                if "ResourceInUseException" in str(e) or "already associated" in str(e):
-                    logger.info(f"Already associated: {vpc_id}")
+        deferred_vpcs = []
+        with slog.rollup("dns.associate_vpcs", region=region, resolver_id=cyngular_resolver_id) as rollup:
+            pending = []
+            for vpc_id in resume_order(vpc_ids, resume_at):
+                if vpc_id in associated:
+                    rollup.add("already_associated", vpc_id)
                     processed_vpcs.append(vpc_id)
                 else:
-                    logger.error(f"Association failed for {vpc_id}: {str(e)}")
+                    pending.append(vpc_id)
+
+            for index, vpc_id in enumerate(pending):
+                if not budget.has_budget("route53resolver", "AssociateResolverQueryLogConfig"):
+                    deferred_vpcs = pending[index:]
+                    budget.defer("route53resolver", "AssociateResolverQueryLogConfig", len(deferred_vpcs))
+                    break
+                try:
+                    r53_client.associate_resolver_query_log_config(
+                        ResolverQueryLogConfigId=cyngular_resolver_id, ResourceId=vpc_id
+                    )
+                    rollup.add("associated", vpc_id)
+                    processed_vpcs.append(vpc_id)
+                except Exception as e:
+                    if "ResourceInUseException" in str(e) or "already associated" in str(e):
+                        rollup.add("already_associated", vpc_id)
+                        processed_vpcs.append(vpc_id)
+                    else:
+                        rollup.add("failed", vpc_id)
+                        slog.sampled(
+                            "dns.associate_failed",
+                            key=f"dns.associate_failed:{region}",
+                            level=logging.ERROR,
+                            region=region,
+                            vpc_id=vpc_id,
+                            error=str(e),
+                        )
 
         return {
             "success": True,
             "resolver_id": cyngular_resolver_id,
-            "processed_vpcs": processed_vpcs
+            "processed_vpcs": processed_vpcs,
+            "deferred_vpcs": deferred_vpcs,
+            "resume_at": deferred_vpcs[0] if deferred_vpcs else None,
         }
 
     except Exception as e:
@@ -91,17 +146,51 @@ def process_vfl_service(
         logger.info(f"STARTING VPC FLOW LOGS IN {region}...")
 
         ec2_client = boto3.client("ec2", region_name=region)
-        vpc_list = ec2_client.describe_vpcs()
-        vpc_id_list = []
-
-        if "Vpcs" in vpc_list:
-            for vpc in vpc_list["Vpcs"]:
-                vpc_id_list.append(vpc["VpcId"])
+        all_vpc_ids = [
+            vpc["VpcId"]
+            for page in ec2_client.get_paginator("describe_vpcs").paginate()
+            for vpc in page.get("Vpcs", [])
+        ]
 
-        logger.info(f"CONFIGURING VPC FLOW LOGS ON VPC-IDS: {vpc_id_list}")
+        # VPCs already logging to the bucket are left out of the call (and the budget)
+        bucket_arn = f"arn:aws:s3:::{cyngular_bucket}"
+        logged_vpcs = set()
+        try:
+            flow_logs = ec2_client.get_paginator("describe_flow_logs").paginate(
+                Filters=[{"Name": "log-destination-type", "Values": ["s3"]}]
+            )
+            for page in flow_logs:
+                for flow_log in page.get("FlowLogs", []):
+                    destination = flow_log.get("LogDestination", "")
+                    if destination == bucket_arn or destination.startswith(f"{bucket_arn}/"):
+                        logged_vpcs.add(flow_log["ResourceId"])
+        except ClientError as e:
+            # A role without the listing permission sends every VPC to CreateFlowLogs, as before
+            logger.warning(f"Cannot describe flow logs, configuring all VPCs: {str(e)}")
+            logged_vpcs.clear()
+        vpc_id_list = [vpc_id for vpc_id in all_vpc_ids if vpc_id not in logged_vpcs]
+
+        slog.info(
+            "vfl.configure",
+            region=region,
+            vpc_count=len(all_vpc_ids),
+            already_logged=len(all_vpc_ids) - len(vpc_id_list),
+            vpc_ids=lambda: truncate(vpc_id_list),
+        )
 
-        if not vpc_id_list:
+        if not all_vpc_ids:
             return {"success": True, "message": "No VPCs found in region"}
+        if not vpc_id_list:
+            return {"success": True, "message": "Flow logs already exist", "vpc_ids": all_vpc_ids}
+
+        budget = get_active_budget()
+        if not budget.has_budget("ec2", "CreateFlowLogs"):
+            budget.defer("ec2", "CreateFlowLogs", len(vpc_id_list))
+            return {
+                "success": True,
+                "message": "API budget exhausted - deferred to next run",
+                "deferred_vpcs": vpc_id_list,
+            }
 
         response = ec2_client.create_flow_logs(
             ResourceIds=vpc_id_list,
@@ -140,7 +229,8 @@ def process_vfl_service(
 
 def process_eks_service(
     region: str,
-    cyngular_role_arn: str
+    cyngular_role_arn: str,
+    resume_at: Optional[str] = None
 ) -> Dict[str, Any]:
     """Configure EKS access for the region"""
     try:
@@ -151,7 +241,10 @@ def process_eks_service(
         }
 
         eks_client = boto3.client("eks", region_name=region)
-        clusters = eks_client.list_clusters()["clusters"]
+        clusters = resume_order(
+            [name for page in eks_client.get_paginator("list_clusters").paginate() for name in page["clusters"]],
+            resume_at,
+        )
 
         if not clusters:
             logger.info(f"[{region} | EKS] No EKS clusters found in {region}")
@@ -160,79 +253,81 @@ def process_eks_service(
             f"[{region} | EKS] Found {len(clusters)} clusters in region {region}"
         )
 
+        budget = get_active_budget()
         processed_clusters = []
-        for cluster_name in clusters:
-            try:
-                logger.info(f"[{region} | EKS] CONFIGURING CLUSTER: {cluster_name}")
-
-                current_config = eks_client.describe_cluster(name=cluster_name)
-                current_logging = current_config.get("cluster", {}).get("logging", {})
-                current_types = []
-
-                for log_config in current_logging.get("clusterLogging", []):
-                    if log_config.get("enabled", False):
-                        current_types.extend(log_config.get("types", []))
-
-                wanted_types = ["audit", "authenticator"]
-                if all(log_type in current_types for log_type in wanted_types):
-                    logger.info(
-                        f"[{region} | EKS] Cluster {cluster_name} already has required logging enabled"
-                    )
-                else:
-                    logger.info(
-                        f"[{region} | EKS] Updating logging configuration for {cluster_name}"
-                    )
-
-                    merged_types = list(set(current_types + wanted_types))
-                    # Override / Merge logging config
-                    wanted_cluster_logging_config = {
-                        "clusterLogging": [{"types": merged_types, "enabled": True}]
-                    }
+        deferred_clusters = []
+        with slog.rollup("eks.configure_clusters", region=region) as rollup:
+            for index, cluster_name in enumerate(clusters):
+                if not budget.has_budget("eks", "DescribeCluster"):
+                    deferred_clusters = clusters[index:]
+                    budget.defer("eks", "DescribeCluster", len(deferred_clusters))
+                    break
+                try:
+                    current_config = eks_client.describe_cluster(name=cluster_name)
+                    current_logging = current_config.get("cluster", {}).get("logging", {})
+                    current_types = []
+
+                    for log_config in current_logging.get("clusterLogging", []):
+                        if log_config.get("enabled", False):
+                            current_types.extend(log_config.get("types", []))
+
+                    wanted_types = ["audit", "authenticator"]
+                    if all(log_type in current_types for log_type in wanted_types):
+                        rollup.add("logging_already_enabled", cluster_name)
+                    else:
+                        merged_types = list(set(current_types + wanted_types))
+                        # Override / Merge logging config
+                        wanted_cluster_logging_config = {
+                            "clusterLogging": [{"types": merged_types, "enabled": True}]
+                        }
 
-                    try:
-                        eks_client.update_cluster_config(
-                            name=cluster_name, logging=wanted_cluster_logging_config
-                        )
-                        logger.info(
-                            f"[{region} | EKS] Successfully updated logging for {cluster_name}"
-                        )
-                    except ClientError as e:
-                        if "No changes needed for the logging config provided" in str(
-                            e
-                        ):
-                            logger.info(
-                                f"[{region} | EKS] No changes needed for logging config in {cluster_name}"
+                        try:
+                            eks_client.update_cluster_config(
+                                name=cluster_name, logging=wanted_cluster_logging_config
                             )
-                        else:
-                            raise e
-
-                if check_access_entry_exists(
-                    region, eks_client, cluster_name, cyngular_role_arn
-                ):
-                    logger.info(
-                        f"[{region} | EKS] Access entry already exists for {cluster_name}"
-                    )
-                else:
-                    access_result = create_cyngular_access_entry(
+                            rollup.add("logging_updated", cluster_name)
+                        except ClientError as e:
+                            if "No changes needed for the logging config provided" in str(
+                                e
+                            ):
+                                rollup.add("logging_already_enabled", cluster_name)
+                            else:
+                                raise e
+
+                    if check_access_entry_exists(
                         region, eks_client, cluster_name, cyngular_role_arn
-                    )
-                    processed_clusters.append(
-                        {
-                            "cluster": cluster_name,
-                            "logging_enabled": True,
-                            "access_entry": access_result,
-                        }
-                    )
+                    ):
+                        rollup.add("access_entry_exists", cluster_name)
+                    else:
+                        access_result = create_cyngular_access_entry(
+                            region, eks_client, cluster_name, cyngular_role_arn
+                        )
+                        rollup.add("access_entry_created", cluster_name)
+                        processed_clusters.append(
+                            {
+                                "cluster": cluster_name,
+                                "logging_enabled": True,
+                                "access_entry": access_result,
+                            }
+                        )
 
-            except Exception as e:
-                logger.error(
-                    f"[{region} | EKS] Error processing cluster {cluster_name}: {str(e)}"
-                )
-                processed_clusters.append({"cluster": cluster_name, "error": str(e)})
+                except Exception as e:
+                    rollup.add("failed", cluster_name)
+                    slog.sampled(
+                        "eks.cluster_failed",
+                        key=f"eks.cluster_failed:{region}",
+                        level=logging.ERROR,
+                        region=region,
+                        cluster=cluster_name,
+                        error=str(e),
+                    )
+                    processed_clusters.append({"cluster": cluster_name, "error": str(e)})
 
         return {
             "success": True,
-            "processed_clusters": processed_clusters
+            "processed_clusters": processed_clusters,
+            "deferred_clusters": deferred_clusters,
+            "resume_at": deferred_clusters[0] if deferred_clusters else None,
         }
 
     except Exception as e:
@@ -240,7 +335,7 @@ def process_eks_service(
         return {"success": False, "error": str(e)}
 
 
-def process_os_service(region: str) -> Dict[str, Any]:
+def process_os_service(region: str, resume_at: Optional[str] = None) -> Dict[str, Any]:
     """Configure OS internals (auditd) for the region"""
     try:
         logger.info(f"[{region} | OS INTERNALS] STARTING...")
@@ -248,13 +343,16 @@ def process_os_service(region: str) -> Dict[str, Any]:
         ec2_client = boto3.client("ec2", region_name=region)
         ssm_client = boto3.client("ssm", region_name=region)
 
-        all_instances = ec2_client.describe_instances()
+        running_instances = ec2_client.get_paginator("describe_instances").paginate(
+            Filters=[{"Name": "instance-state-name", "Values": ["running"]}]
+        )
         instance_ids = []
 
-        for reservation in all_instances["Reservations"]:
-            for instance in reservation["Instances"]:
-                if instance["State"]["Name"] == "running":
-                    instance_ids.append(instance["InstanceId"])
+        for page in running_instances:
+            for reservation in page["Reservations"]:
+                for instance in reservation["Instances"]:
+                    if instance["State"]["Name"] == "running":
+                        instance_ids.append(instance["InstanceId"])
 
         if not instance_ids:
             logger.info(
@@ -263,68 +361,112 @@ def process_os_service(region: str) -> Dict[str, Any]:
             return {"success": True, "message": "No running instances found"}
 
         auditd_rules = ""
-        with open("auditd_rules", "r") as f:
+        with open(AUDITD_RULES_PATH, "r") as f:
             auditd_rules = f.read()
 
-        processed_instances = []
-        for instance_id in instance_ids:
-            try:
-                logger.info(
-                    f"[{region} | OS INTERNALS] CONFIGURING INSTANCE-ID: {instance_id}"
-                )
-                response = ssm_client.send_command(
-                    InstanceIds=[instance_id],
-                    DocumentName="AWS-RunShellScript",
-                    Parameters={
-                        "commands": [
-                            "apt-get update -y",
-                            "apt-get install -y auditd",
-                            "systemctl kill auditd.service",
-                            "sleep 10",
-                            f'echo {auditd_rules} | base64 --decode > "/etc/audit/rules.d/audit.rules"',
-                            "sleep 10",
-                            "systemctl start auditd.service",
-                        ]
-                    },
-                )
-                logger.info(
-                    f"[{region} | OS INTERNALS | {instance_id}] COMMAND SUCCEEDED"
-                )
-                processed_instances.append(
-                    {
-                        "instance_id": instance_id,
-                        "command_id": response["Command"]["CommandId"],
-                        "status": "sent",
-                    }
-                )
+        budget = get_active_budget()
+        # Without ceilings every run re-applies the rules (repairs re-imaged or edited instances);
+        # with ceilings, instances an earlier run already sent the command to are not charged again
+        configured = set()
+        if budget.ceilings:
+            invocations = ssm_client.get_paginator("list_command_invocations").paginate(
+                Filters=[{"key": "DocumentName", "value": AUDITD_DOCUMENT}]
+            )
+            for page in invocations:
+                for invocation in page.get("CommandInvocations", []):
+                    if invocation.get("Comment") == AUDITD_COMMENT and invocation.get("Status") in AUDITD_CONFIGURED_STATUSES:
+                        configured.add(invocation["InstanceId"])
 
-            except ClientError as e:
-                if e.response["Error"]["Code"] == "InvalidInstanceId" and "not in a valid state for account" in str(e):
-                    logger.warning(
-                        f"[{region} | OS INTERNALS | {instance_id}] SKIPPED: instance not reachable via SSM "
-                        f"(likely missing SSM agent, stopped/terminated, or not SSM-managed). {str(e)}"
+        processed_instances = []
+        deferred_instances = []
+        with slog.rollup("os.send_command", region=region) as rollup:
+            pending = []
+            for instance_id in resume_order(instance_ids, resume_at):
+                if instance_id in configured:
+                    rollup.add("already_configured", instance_id)
+                else:
+                    pending.append(instance_id)
+
+            for index, instance_id in enumerate(pending):
+                if not budget.has_budget("ssm", "SendCommand"):
+                    deferred_instances = pending[index:]
+                    budget.defer("ssm", "SendCommand", len(deferred_instances))
+                    break
+                try:
+                    response = ssm_client.send_command(
+                        InstanceIds=[instance_id],
+                        DocumentName=AUDITD_DOCUMENT,
+                        Comment=AUDITD_COMMENT,
+                        Parameters={
+                            "commands": [
+                                "apt-get update -y",
+                                "apt-get install -y auditd",
+                                "systemctl kill auditd.service",
+                                "sleep 10",
+                                f'echo {auditd_rules} | base64 --decode > "/etc/audit/rules.d/audit.rules"',
+                                "sleep 10",
+                                "systemctl start auditd.service",
+                            ]
+                        },
                     )
+                    rollup.add("sent", instance_id)
                     processed_instances.append(
-                        {"instance_id": instance_id, "error": str(e), "reason": "ssm_unreachable"}
+                        {
+                            "instance_id": instance_id,
+                            "command_id": response["Command"]["CommandId"],
+                            "status": "sent",
+                        }
                     )
 
-                elif e.response["Error"]["Code"] == "UnsupportedPlatformType":
-                    logger.warning(
-                        f"[{region} | OS INTERNALS | {instance_id}] SKIPPED: unsupported platform (likely Windows). {str(e)}"
+                except ClientError as e:
+                    if e.response["Error"]["Code"] == "InvalidInstanceId" and "not in a valid state for account" in str(e):
+                        # Likely missing SSM agent, stopped/terminated, or not SSM-managed
+                        rollup.add("ssm_unreachable", instance_id)
+                        processed_instances.append(
+                            {"instance_id": instance_id, "error": str(e), "reason": "ssm_unreachable"}
+                        )
+
+                    elif e.response["Error"]["Code"] == "UnsupportedPlatformType":
+                        # Likely Windows
+                        rollup.add("unsupported_platform", instance_id)
+                        processed_instances.append(
+                            {"instance_id": instance_id, "error": str(e)}
+                        )
+
+                    else:
+                        rollup.add("failed", instance_id)
+                        slog.sampled(
+                            "os.send_command_failed",
+                            key=f"os.send_command_failed:{region}",
+                            level=logging.ERROR,
+                            region=region,
+                            instance_id=instance_id,
+                            error=str(e),
+                        )
+                        processed_instances.append(
+                            {"instance_id": instance_id, "error": str(e)}
+                        )
+
+                except Exception as e:
+                    rollup.add("failed", instance_id)
+                    slog.sampled(
+                        "os.send_command_failed",
+                        key=f"os.send_command_failed:{region}",
+                        level=logging.ERROR,
+                        region=region,
+                        instance_id=instance_id,
+                        error=str(e),
                     )
                     processed_instances.append(
                         {"instance_id": instance_id, "error": str(e)}
                     )
 
-            except Exception as e:
-                logger.error(
-                    f"[{region} | OS INTERNALS | {instance_id}] COMMAND FAILED: {str(e)}"
-                )
-                processed_instances.append(
-                    {"instance_id": instance_id, "error": str(e)}
-                )
-
-        return {"success": True, "processed_instances": processed_instances}
+        return {
+            "success": True,
+            "processed_instances": processed_instances,
+            "deferred_instances": deferred_instances,
+            "resume_at": deferred_instances[0] if deferred_instances else None,
+        }
 
     except ClientError as e:
         logger.error(
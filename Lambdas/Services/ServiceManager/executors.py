@@ -0,0 +1,207 @@
+"""
+Backends that run one RegionProcessor task (service x region) for the ServiceManager.
+
+REGION_EXECUTOR selects the backend:
+    lambda-async - Event invoke of the RegionProcessor function (default)
+    lambda-sync  - RequestResponse invoke, returns the cell's own result
+    thread       - RegionProcessor.process_service on a thread of this process
+    process      - RegionProcessor.process_service in a local worker process
+
+The in-process backends load the RegionProcessor code from REGION_PROCESSOR_PATH.
+They run the whole onboarding flow as one process, against local AWS stand-ins
+or real accounts, so orchestration cost can be measured without Lambda's. The
+process backend needs /dev/shm and is for local runs only.
+"""
+
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_BACKENDS = ("lambda-async", "lambda-sync", "thread", "process")
+DEFAULT_REGION_PROCESSOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "RegionProcessor")
+REGION_PROCESSOR_MODULE = "region_processor_function"
+
+
+def _failure(payload: Dict[str, Any], error: str) -> Dict[str, Any]:
+    return {"success": False, "service": payload["service"], "region": payload["region"], "error": error}
+
+
+class LambdaExecutor:
+    """Invokes the RegionProcessor function, asynchronously (Event) or synchronously"""
+
+    invokes_lambda = True
+    shares_run_budget = False
+
+    def __init__(self, lambda_client, function_name: str, synchronous: bool = False, invocation_delay: float = 0.0):
+        self.lambda_client = lambda_client
+        self.function_name = function_name
+        self.synchronous = synchronous
+        self.invocation_delay = invocation_delay
+        self.name = "lambda-sync" if synchronous else "lambda-async"
+
+    def execute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Spaces out invokes against the account's Lambda concurrency / throttling
+        if self.invocation_delay > 0:
+            time.sleep(self.invocation_delay)
+
+        response = self.lambda_client.invoke(
+            FunctionName=self.function_name,
+            InvocationType="RequestResponse" if self.synchronous else "Event",
+            Payload=json.dumps(payload),
+        )
+
+        if not self.synchronous:
+            # For Event invocations, AWS returns 202 immediately and runs async
+            if response["StatusCode"] == 202:
+                return {"success": True, "service": payload["service"], "region": payload["region"], "status": "invoked_async"}
+            return _failure(payload, f"Invocation failed with status {response['StatusCode']}")
+
+        body = json.loads(response["Payload"].read() or b"{}")
+        if response.get("FunctionError"):
+            return _failure(payload, f"{response['FunctionError']} error: {body.get('errorMessage', body)}")
+        result = json.loads(body["body"]) if isinstance(body.get("body"), str) else body
+        return {"service": payload["service"], "region": payload["region"], **result, "status": "completed"}
+
+    def shutdown(self) -> None:
+        pass
+
+
+def load_region_processor(path: Optional[str] = None):
+    """Import RegionProcessor's lambda_function under its own module name, once per process"""
+    if REGION_PROCESSOR_MODULE in sys.modules:
+        return sys.modules[REGION_PROCESSOR_MODULE]
+
+    path = os.path.abspath(path or os.environ.get("REGION_PROCESSOR_PATH", DEFAULT_REGION_PROCESSOR_PATH))
+    # services / service_registry / utils are imported as top-level modules, as on Lambda
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    spec = importlib.util.spec_from_file_location(REGION_PROCESSOR_MODULE, os.path.join(path, "lambda_function.py"))
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No RegionProcessor lambda_function.py under {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[REGION_PROCESSOR_MODULE] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[REGION_PROCESSOR_MODULE]
+        raise
+    return module
+
+
+def process_in_place(payload: Dict[str, Any], region_processor_path: Optional[str] = None) -> Dict[str, Any]:
+    """Run one task through RegionProcessor.process_service in the calling process"""
+    from cyngular_common.metrics import MetricsCollector
+    from cyngular_common.tracing import Tracer
+
+    module = load_region_processor(region_processor_path)
+    metrics = MetricsCollector(payload["client_name"], "RegionalServiceManager", mode="emf")
+    # Continues the orchestrator's trace, as the RegionProcessor function would
+    tracer = Tracer.from_event(payload)
+    try:
+        with tracer.span("RegionProcessor", service=payload["service"], region=payload["region"]):
+            processor = module.RegionProcessor(
+                payload["region"],
+                payload["client_name"],
+                payload["cyngular_bucket"],
+                payload["cyngular_role_arn"],
+                metrics,
+                tracer,
+                module.previous_resume_at(payload["service"], payload["region"]),
+            )
+            start_time = time.time()
+            result = processor.process_service(payload["service"])
+            result["regressions"] = module.record_cell(
+                payload["service"], payload["region"], tracer.run_id, start_time, result
+            )
+    finally:
+        metrics.flush()
+    return {"service": payload["service"], "region": payload["region"], **result, "status": "completed"}
+
+
+def _process_in_worker(payload: Dict[str, Any], region_processor_path: Optional[str] = None) -> Dict[str, Any]:
+    """process_in_place in a worker process, under the cell's share of the run's API ceilings"""
+    from cyngular_common import budget
+
+    # Importing the RegionProcessor installs the call counting in this process
+    load_region_processor(region_processor_path)
+    budget.activate(budget.ApiBudget.from_env(payload.get("api_budget")))
+    result = process_in_place(payload, region_processor_path)
+    result["api_budget"] = budget.get_active_budget().ledger()
+    return result
+
+
+class ThreadExecutor:
+    """Runs tasks on the ServiceManager's worker threads, sharing its API budget and call counts"""
+
+    invokes_lambda = False
+    shares_run_budget = True
+    name = "thread"
+
+    def __init__(self, region_processor_path: Optional[str] = None):
+        self.region_processor_path = region_processor_path
+        # Import once up front - concurrent first imports from worker threads would race
+        load_region_processor(region_processor_path)
+
+    def execute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return process_in_place(payload, self.region_processor_path)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ProcessExecutor:
+    """Runs tasks in a pool of worker processes, each with its own boto3 clients"""
+
+    invokes_lambda = False
+    shares_run_budget = False
+    name = "process"
+
+    def __init__(self, max_workers: int, region_processor_path: Optional[str] = None):
+        self.region_processor_path = region_processor_path
+        # spawn - forking a process that already holds threads and boto3 clients is unsafe
+        self.pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def execute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self.pool.submit(_process_in_worker, payload, self.region_processor_path).result()
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=True)
+
+
+def get_executor(
+    lambda_client=None,
+    function_name: Optional[str] = None,
+    max_workers: int = 4,
+    invocation_delay: float = 0.0,
+    backend: Optional[str] = None,
+):
+    """
+    Executor for backend, or REGION_EXECUTOR when omitted
+
+    Args:
+        lambda_client: Lambda client used by the lambda-* backends
+        function_name: RegionProcessor function name for the lambda-* backends
+        max_workers: Worker processes of the process backend
+        invocation_delay: Seconds to wait before each Lambda invoke
+        backend: One of EXECUTOR_BACKENDS
+
+    Returns:
+        An executor with execute(payload) -> result and shutdown()
+    """
+    backend = (backend or os.environ.get("REGION_EXECUTOR", "lambda-async")).lower()
+    if backend not in EXECUTOR_BACKENDS:
+        raise ValueError(f"Unknown region executor: {backend}. Expected one of {EXECUTOR_BACKENDS}")
+
+    if backend in ("lambda-async", "lambda-sync"):
+        return LambdaExecutor(lambda_client, function_name, backend == "lambda-sync", invocation_delay)
+    if backend == "thread":
+        return ThreadExecutor()
+    return ProcessExecutor(max_workers)
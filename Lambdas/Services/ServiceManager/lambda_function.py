@@ -3,21 +3,42 @@ import json
 import logging
 import os
 import time
+import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from botocore.config import Config
-from cyngular_common import cfnresponse
-# from cyngular_common.metrics import MetricsCollector
+from cyngular_common import budget, cfnresponse, instrumentation
+from cyngular_common.metrics import MetricsCollector, flush_timeout_from_context
+from cyngular_common.profiling import profile_handler
+from cyngular_common.run_history import get_run_history, record_run
+from cyngular_common.structured_logging import get_logger, reset_sampling
+from cyngular_common.tracing import Span, Tracer
+from executors import get_executor
 
 # Use Lambda runtime logger properly
 logger = logging.getLogger(__name__)
+slog = get_logger(__name__)
+
+
+BACKGROUND_RUN_KEY = "cyngular_background_run"
+
+# Every boto3 client created by the orchestrator is measured per operation and region
+instrumentation.install()
+budget.install()
 
 
 class ServiceManager:
     MAX_CONCURRENT_WORKERS = 4
     INVOCATION_DELAY_SECONDS = 0.1
-
-    def __init__(self, lambda_context):
+    # AWS services each RegionProcessor cell calls - a cell only gets a share of their ceilings
+    CELL_API_SERVICES = {
+        "dns": ("route53resolver", "ec2"),
+        "vfl": ("ec2",),
+        "eks": ("eks",),
+        "os": ("ec2", "ssm"),
+    }
+
+    def __init__(self, lambda_context, tracer: Optional[Tracer] = None):
         # Required environment variables - fail if not present
         self.client_name = os.environ["CLIENT_NAME"]
         self.region_processor_function = os.environ[
@@ -32,6 +53,13 @@ class ServiceManager:
         self.enable_eks = os.environ.get("ENABLE_EKS", "false")
         self.enable_vpc_flow_logs = os.environ.get("ENABLE_VPC_FLOW_LOGS", "false")
 
+        # "async" acknowledges CloudFormation right after dispatching the fan-out
+        self.cfn_ack_mode = os.environ.get("CFN_ACK_MODE", "sync").lower()
+        self.results_bucket = os.environ.get("RESULTS_BUCKET", "")
+        self.results_prefix = os.environ.get(
+            "RESULTS_PREFIX", "cyngular-service-manager/runs"
+        ).strip("/")
+
         # Configure clients with retry settings
         retry_config = Config(retries={"max_attempts": 3, "mode": "adaptive"})
         self.lambda_client = boto3.client("lambda", config=retry_config)
@@ -39,7 +67,19 @@ class ServiceManager:
 
         self.fallback_lambda_region = self.context.invoked_function_arn.split(":")[3]
 
-        # self.metrics = MetricsCollector(self.client_name, "ServiceOrchestrator")
+        # Buffered EMF metrics - flushed once by the handler, no API calls
+        self.metrics = MetricsCollector(self.client_name, "ServiceOrchestrator", mode="emf")
+
+        # The run ID and parent span travel in every RegionProcessor payload
+        self.tracer = tracer or Tracer()
+
+        # REGION_EXECUTOR: Lambda invokes in production, in-process for local / benchmark runs
+        self.executor = get_executor(
+            self.lambda_client,
+            self.region_processor_function,
+            self.MAX_CONCURRENT_WORKERS,
+            self.INVOCATION_DELAY_SECONDS,
+        )
 
     def get_enabled_regions(self) -> List[str]:
         """Get list of enabled regions for the account"""
@@ -86,47 +126,48 @@ class ServiceManager:
         )
         return services
 
-    def invoke_region_processor_task(self, service: str, region: str) -> Dict[str, Any]:
+    def invoke_region_processor_task(
+        self,
+        service: str,
+        region: str,
+        parent: Optional[Span] = None,
+        cell_budget: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
         """Task to invoke region processor - designed for thread pool"""
-        payload = {
-            "service": service,
-            "region": region,
-            "client_name": self.client_name,
-            "cyngular_bucket": self.cyngular_bucket,
-            "cyngular_role_arn": self.cyngular_role_arn,
-        }
+        with self.tracer.span(
+            "invoke_region_processor", parent=parent, service=service, region=region
+        ) as span:
+            start_time = time.time()
+            result = self._invoke_region_processor(service, region, span, cell_budget)
+            result["duration_seconds"] = round(time.time() - start_time, 3)
+            span.set_attribute("success", result["success"])
+            return result
+
+    def _invoke_region_processor(
+        self, service: str, region: str, span: Span, cell_budget: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        payload = self.tracer.inject(
+            {
+                "service": service,
+                "region": region,
+                "client_name": self.client_name,
+                "cyngular_bucket": self.cyngular_bucket,
+                "cyngular_role_arn": self.cyngular_role_arn,
+            },
+            span,
+        )
+        if cell_budget:
+            payload["api_budget"] = cell_budget
 
         try:
-            if self.INVOCATION_DELAY_SECONDS > 0:
-                time.sleep(self.INVOCATION_DELAY_SECONDS)
-
-            response = self.lambda_client.invoke(
-                FunctionName=self.region_processor_function,
-                InvocationType="Event",  # Asynchronous - no waiting for response
-                Payload=json.dumps(payload),
-            )
-
-            # For Event invocations, AWS returns 202 immediately and runs async
-            if response["StatusCode"] == 202:
-                logger.info(
-                    f"[{region} | ServiceManager] Successfully invoked {service} processing for {region}"
-                )
-                return {
-                    "success": True,
-                    "service": service,
-                    "region": region,
-                    "status": "invoked_async",
-                }
+            result = self.executor.execute(payload)
+            if result["success"]:
+                slog.sampled("service_manager.invoked", service=service, region=region, status=result.get("status"))
             else:
                 logger.error(
-                    f"[{region} | ServiceManager] Failed to invoke {service} for {region}: Status {response['StatusCode']}"
+                    f"[{region} | ServiceManager] Failed to process {service} for {region} via {self.executor.name}: {result.get('error')}"
                 )
-                return {
-                    "success": False,
-                    "service": service,
-                    "region": region,
-                    "error": f"Invocation failed with status {response['StatusCode']}",
-                }
+            return result
 
         except Exception as e:
             logger.error(
@@ -139,6 +180,17 @@ class ServiceManager:
                 "error": str(e),
             }
 
+    def previous_resume_at(self) -> Optional[str]:
+        """First cell ("service:region") the previous run deferred, if any"""
+        try:
+            history = get_run_history().read("runs")
+        except Exception as e:
+            logger.warning(
+                f"[{self.fallback_lambda_region} | ServiceManager] Failed to read run history, starting from the first cell: {str(e)}"
+            )
+            return None
+        return history[-1].get("resume_at") if history else None
+
     def process_all_services(self) -> Dict[str, Any]:
         """Process all enabled services across all regions in parallel"""
         regions = self.get_enabled_regions()
@@ -146,6 +198,24 @@ class ServiceManager:
 
         tasks = [(service, region) for service in services for region in regions]
 
+        # Tasks past the lambda:Invoke ceiling wait for the next scheduled run
+        run_budget = budget.get_active_budget()
+        allowed = run_budget.remaining("lambda", "Invoke") if self.executor.invokes_lambda else None
+        deferred_tasks = []
+        if allowed is not None and allowed < len(tasks):
+            # Start at the first cell the previous run deferred, so every cell is reached in turn
+            order = budget.resume_order([f"{service}:{region}" for service, region in tasks], self.previous_resume_at())
+            tasks = [tuple(key.split(":", 1)) for key in order]
+            tasks, deferred_tasks = tasks[:allowed], tasks[allowed:]
+            run_budget.defer("lambda", "Invoke", len(deferred_tasks))
+
+        # Each cell gets its share of what the run has left; in-thread cells count against the run budget itself
+        cell_budgets = {}
+        if run_budget.ceilings and not self.executor.shares_run_budget:
+            cell_budgets = run_budget.split(
+                {f"{service}:{region}": self.CELL_API_SERVICES.get(service, ()) for service, region in tasks}
+            )
+
         logger.info(
             f"Starting parallel processing of {len(tasks)} tasks across {len(regions)} regions and {len(services)} services"
         )
@@ -154,9 +224,17 @@ class ServiceManager:
         successful_results = []
         failed_results = []
 
+        # Worker threads have no open span of their own - parent them explicitly
+        run_span = self.tracer.current_span
         with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_WORKERS) as executor:
             future_to_task = {
-                executor.submit(self.invoke_region_processor_task, service, region): (
+                executor.submit(
+                    self.invoke_region_processor_task,
+                    service,
+                    region,
+                    run_span,
+                    cell_budgets.get(f"{service}:{region}"),
+                ): (
                     service,
                     region,
                 )
@@ -196,19 +274,36 @@ class ServiceManager:
 
         end_time = time.time()
 
+        # Cells that return their ledger (lambda-sync, process) are added to the run's;
+        # lambda-async cells report theirs in their own results and run history
+        api_budget = run_budget.ledger()
+        if not self.executor.shares_run_budget:
+            cell_ledgers = [r["api_budget"] for r in successful_results + failed_results if "api_budget" in r]
+            api_budget = budget.merge_ledgers(api_budget, cell_ledgers)
+            api_budget["cells_unreported"] = len(tasks) - len(cell_ledgers)
+            api_budget["cell_ceilings"] = cell_budgets
+
         final_results = {
+            "run_id": self.tracer.run_id,
             "regions": regions,
             "services_processed": services,
             "total_tasks": len(tasks),
             "services_done": len(successful_results),
             "services_failed": len(failed_results),
+            "services_deferred": len(deferred_tasks),
             "success_rate": (len(successful_results) / len(tasks) * 100)
             if tasks
             else 0,
             "processing_time_seconds": round(end_time - start_time, 2),
             "max_workers": self.MAX_CONCURRENT_WORKERS,
+            "executor": self.executor.name,
             "successful_results": successful_results,
             "failed_results": failed_results,
+            "deferred_tasks": [
+                {"service": service, "region": region} for service, region in deferred_tasks
+            ],
+            "api_calls": instrumentation.summary(),
+            "api_budget": api_budget,
         }
 
         logger.info(
@@ -217,17 +312,131 @@ class ServiceManager:
             f"Success Rate: {final_results['success_rate']:.2%}"
         )
 
-        # self.metrics.record_processing_results(final_results)
+        final_results["regressions"] = record_run(
+            get_run_history(),
+            "runs",
+            {
+                "run_id": self.tracer.run_id,
+                "timestamp": start_time,
+                "duration_seconds": final_results["processing_time_seconds"],
+                "success": not failed_results,
+                "total_tasks": len(tasks),
+                "services_done": len(successful_results),
+                "services_failed": len(failed_results),
+                "services_deferred": len(deferred_tasks),
+                "resume_at": ":".join(deferred_tasks[0]) if deferred_tasks else None,
+                "cells": {
+                    f"{r['service']}:{r['region']}": bool(r.get("success"))
+                    for r in successful_results + failed_results
+                },
+            },
+        )
+
+        self.metrics.record_processing_results(final_results)
 
         return final_results
 
-    # [Rest of the CloudFormation and event handling methods remain the same as original]
+    def validate_configuration(self) -> Dict[str, Any]:
+        """Resolve regions and services up front so bad configuration fails the stack fast"""
+        regions = self.get_enabled_regions()
+        services = self.get_services_to_configure()
+        if not regions:
+            raise ValueError("No enabled regions to configure")
+        if not services:
+            raise ValueError("No services to configure")
+        return {"regions": regions, "services": services, "total_tasks": len(regions) * len(services)}
+
+    def dispatch_background_run(self, event: Dict[str, Any]) -> str:
+        """Durably hand the fan-out to an async invocation of this function"""
+        # The background invocation continues this trace under the same run ID
+        run_id = self.tracer.run_id
+        payload = self.tracer.inject(
+            {
+                BACKGROUND_RUN_KEY: {
+                    "run_id": run_id,
+                    "request_type": event.get("RequestType"),
+                    "stack_id": event.get("StackId"),
+                    "logical_resource_id": event.get("LogicalResourceId"),
+                }
+            }
+        )
+
+        # Async invokes are queued by Lambda and retried on failure
+        response = self.lambda_client.invoke(
+            FunctionName=self.context.invoked_function_arn,
+            InvocationType="Event",
+            Payload=json.dumps(payload),
+        )
+        if response["StatusCode"] != 202:
+            raise RuntimeError(f"Background dispatch failed with status {response['StatusCode']}")
+
+        logger.info(
+            f"[{self.fallback_lambda_region} | ServiceManager] Dispatched background run {run_id}"
+        )
+        return run_id
+
+    def write_run_results(self, run_id: str, results: Dict[str, Any]) -> None:
+        """Persist the final per-task status of a background run"""
+        logger.info(
+            f"[{self.fallback_lambda_region} | ServiceManager] Run {run_id} results: "
+            f"{results['services_done']}/{results['total_tasks']} tasks succeeded"
+        )
+        if not self.results_bucket:
+            return
+
+        key = f"{self.results_prefix}/{run_id}.json"
+        try:
+            boto3.client("s3").put_object(
+                Bucket=self.results_bucket,
+                Key=key,
+                Body=json.dumps({"run_id": run_id, **results}).encode("utf-8"),
+                ContentType="application/json",
+            )
+            logger.info(
+                f"[{self.fallback_lambda_region} | ServiceManager] Run results written to s3://{self.results_bucket}/{key}"
+            )
+        except Exception as e:
+            logger.error(
+                f"[{self.fallback_lambda_region} | ServiceManager] Failed to write run results: {str(e)}"
+            )
+
+    def handle_background_run(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        """Complete a fan-out dispatched by an early-acknowledged CloudFormation event"""
+        run_id = run.get("run_id", "unknown")
+        logger.info(
+            f"[{self.fallback_lambda_region} | ServiceManager] Starting background run {run_id} "
+            f"for {run.get('request_type')} of {run.get('logical_resource_id')}"
+        )
+        results = self.process_all_services()
+        self.write_run_results(run_id, results)
+        return results
+
     def handle_cloudformation_event(self, event: Dict[str, Any], context: Any) -> None:
         """Handle CloudFormation custom resource events"""
         try:
             request_type = event["RequestType"]
             logger.info(f"CloudFormation request type: {request_type}")
 
+            if request_type in ["Create", "Update"] and self.cfn_ack_mode == "async":
+                config = self.validate_configuration()
+                try:
+                    run_id = self.dispatch_background_run(event)
+                except Exception as e:
+                    logger.warning(
+                        f"[{self.fallback_lambda_region} | ServiceManager] Background dispatch failed, processing inline: {str(e)}"
+                    )
+                else:
+                    cfnresponse.send(
+                        event,
+                        context,
+                        cfnresponse.SUCCESS,
+                        {
+                            "message": f"Dispatched {config['total_tasks']} tasks in background run {run_id}",
+                            "RunId": run_id,
+                        },
+                    )
+                    return
+
             if request_type in ["Create", "Update"]:
                 results = self.process_all_services()
 
@@ -297,77 +506,98 @@ class ServiceManager:
         return self.process_all_services()
 
 
+@profile_handler("ServiceManager")
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Main lambda handler"""
-    logger.info(f"Received event: {json.dumps(event)}")
+    # Sampling counts are per invocation, not per warm container
+    reset_sampling()
+    slog.payload("service_manager.received_event", event)
 
     event_type = "Unknown"
-    if "RequestType" in event and "StackId" in event:
+    if BACKGROUND_RUN_KEY in event:
+        event_type = "Background"
+    elif "RequestType" in event and "StackId" in event:
         event_type = "CloudFormation"
     elif "source" in event and event["source"] == "aws.events":
         event_type = "Scheduled"
     else:
         event_type = "Direct"
 
-    try:
-        service_manager = ServiceManager(context)
+    tracer = Tracer.from_event(event)
+    with tracer.span("ServiceManager", event_type=event_type):
+        instrumentation.reset()
+        budget.activate(budget.ApiBudget.from_env())
+        try:
+            service_manager = ServiceManager(context, tracer)
+
+            service_manager.metrics.record_invocation(event_type)
 
-        # service_manager.metrics.record_invocation(event_type)
+            # Background completion of an early-acknowledged CloudFormation event
+            if BACKGROUND_RUN_KEY in event:
+                result = service_manager.handle_background_run(event[BACKGROUND_RUN_KEY])
+                return {"statusCode": 200, "body": json.dumps(result)}
 
-        # CloudFormation event
-        if "RequestType" in event and "StackId" in event:
-            service_manager.handle_cloudformation_event(event, context)
-            return {"statusCode": 200}
+            # CloudFormation event
+            elif "RequestType" in event and "StackId" in event:
+                service_manager.handle_cloudformation_event(event, context)
+                return {"statusCode": 200}
 
-        # scheduled event
-        elif "source" in event and event["source"] == "aws.events":
-            result = service_manager.handle_scheduled_event(event, context)
-            return {"statusCode": 200, "body": json.dumps(result)}
+            # scheduled event
+            elif "source" in event and event["source"] == "aws.events":
+                result = service_manager.handle_scheduled_event(event, context)
+                return {"statusCode": 200, "body": json.dumps(result)}
+
+            # Direct invocation
+            else:
+                result = service_manager.process_all_services()
+                return {"statusCode": 200, "body": json.dumps(result)}
+        except Exception as e:
+            fallback_region = "unknown"
+            try:
+                if "service_manager" in locals():
+                    fallback_region = service_manager.fallback_lambda_region
+            except Exception:
+                logger.error(
+                    f"[{fallback_region} | ServiceManager] Lambda handler failed: {type(e).__name__} - {str(e)}"
+                )
+
+            error_details = {
+                "error_type": type(e).__name__,
+                "error_message": str(e),
+                "timestamp": time.time(),
+                "event_type": event_type,
+            }
 
-        # Direct invocation
-        else:
-            result = service_manager.process_all_services()
-            return {"statusCode": 200, "body": json.dumps(result)}
-    except Exception as e:
-        fallback_region = "unknown"
-        try:
-            if "service_manager" in locals():
-                fallback_region = service_manager.fallback_lambda_region
-        except Exception:
             logger.error(
-                f"[{fallback_region} | ServiceManager] Lambda handler failed: {type(e).__name__} - {str(e)}"
+                f"[{fallback_region} | ServiceManager] Lambda handler failed: {error_details['error_type']} - {error_details['error_message']}"
+            )
+            logger.error(
+                f"[{fallback_region} | ServiceManager] Event type: {error_details['event_type']}"
             )
 
-        error_details = {
-            "error_type": type(e).__name__,
-            "error_message": str(e),
-            "timestamp": time.time(),
-            "event_type": event_type,
-        }
-
-        logger.error(
-            f"[{fallback_region} | ServiceManager] Lambda handler failed: {error_details['error_type']} - {error_details['error_message']}"
-        )
-        logger.error(
-            f"[{fallback_region} | ServiceManager] Event type: {error_details['event_type']}"
-        )
+            try:
+                if "service_manager" in locals():
+                    service_manager.metrics.record_error(
+                        error_details["error_type"], error_details["error_message"]
+                    )
+            except Exception:
+                logger.warning(traceback.format_exc())
 
-        # try:
-        #     if "service_manager" in locals():
-        #         service_manager.metrics.record_error(
-        #             error_details["error_type"], error_details["error_message"]
-        #         )
-        # except Exception:
-        #     logger.warning(traceback.format_exc())
-
-        return {
-            "statusCode": 500,
-            "body": json.dumps(
-                {
-                    "success": False,
-                    "error": error_details["error_message"],
-                    "error_type": error_details["error_type"],
-                    "timestamp": error_details["timestamp"],
-                }
-            ),
-        }
+            return {
+                "statusCode": 500,
+                "body": json.dumps(
+                    {
+                        "success": False,
+                        "error": error_details["error_message"],
+                        "error_type": error_details["error_type"],
+                        "timestamp": error_details["timestamp"],
+                    }
+                ),
+            }
+        finally:
+            # Publish the buffered metrics once per invocation
+            if "service_manager" in locals():
+                service_manager.executor.shutdown()
+                if os.environ.get("API_CALL_METRICS", "false").lower() == "true":
+                    instrumentation.get_recorder().emit_metrics(service_manager.metrics)
+                service_manager.metrics.flush(timeout=flush_timeout_from_context(context))
@@ -1,10 +1,50 @@
 import boto3
+import copy
 import os
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.exceptions import ClientError
 from cyngular_common import cfnresponse
+from cyngular_common.profiling import profile_handler
 
 ORG_LOG_DELIVERY_SIDS = ("OrgLogDeliveryWrite", "OrgLogDeliveryAclCheck")
+MAX_CONCURRENT_BUCKETS = 8
+
+LOG_DELIVERY_STATEMENTS_TEMPLATE = """[
+    {
+        "Sid": "OrgLogDeliveryWrite",
+        "Effect": "Allow",
+        "Principal": {
+            "Service": "delivery.logs.amazonaws.com"
+        },
+        "Action": "s3:PutObject",
+        "Resource": "$%BUCKET_ARN%$/*",
+        "Condition": {
+            "ArnLike": {
+                "AWS:SourceArn": []
+            }
+        }
+    },
+    {
+        "Sid": "OrgLogDeliveryAclCheck",
+        "Effect": "Allow",
+        "Principal": {
+            "Service": "delivery.logs.amazonaws.com"
+        },
+        "Action": [
+            "s3:GetBucketAcl",
+            "s3:ListBucket"
+        ],
+        "Resource": "$%BUCKET_ARN%$",
+        "Condition": {
+            "ArnLike": {
+                "aws:SourceArn": []
+            }
+        }
+    }
+]
+"""
 
 
 def get_account_ids_lst(management_account_id):
@@ -27,77 +67,130 @@ def get_account_ids_lst(management_account_id):
     return member_accounts
 
 
-def update_bucket(bucket_name, management_account_id, is_org):
+def get_bucket_names(event):
+    """Resolve the deduplicated list of log buckets to manage, primary bucket first"""
+    bucket_names = [os.environ["BUCKET_NAME"]]
+    bucket_names.extend(
+        b.strip() for b in os.environ.get("ADDITIONAL_BUCKET_NAMES", "").split(",")
+    )
+    # Direct invocations may target extra buckets without a stack update
+    if isinstance(event.get("bucket_names"), list):
+        bucket_names.extend(event["bucket_names"])
+
+    return list(dict.fromkeys(b for b in bucket_names if b))
+
+
+def build_log_delivery_statements(account_ids_list):
+    """Build the org log delivery statements once, with a bucket ARN placeholder"""
+    account_arns_list = [f"arn:aws:logs:*:{account_id}:*" for account_id in account_ids_list]
+    logging.info(f"account_arns_list: {account_arns_list}")
+
+    statements = json.loads(LOG_DELIVERY_STATEMENTS_TEMPLATE)
+    for statement in statements:
+        for condition in statement["Condition"]["ArnLike"]:
+            statement["Condition"]["ArnLike"][condition] = list(account_arns_list)
+    return statements
+
+
+def render_statements_for_bucket(statements, bucket_name):
+    """Fill the bucket ARN into a copy of the shared statement set"""
+    bucket_arn = f"arn:aws:s3:::{bucket_name}"
+    rendered = copy.deepcopy(statements)
+    for statement in rendered:
+        statement["Resource"] = statement["Resource"].replace("$%BUCKET_ARN%$", bucket_arn)
+    return rendered
+
+
+def _canonical(value):
+    """S3 may return single-item arrays as scalars and reorder lists - compare canonically"""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        items = sorted((_canonical(v) for v in value), key=json.dumps)
+        return items[0] if len(items) == 1 else items
+    return value
+
+
+def _normalize_statements(statements):
+    """Order-insensitive representation of statements, used to detect drift"""
+    return sorted(json.dumps(_canonical(s), sort_keys=True) for s in statements)
+
+
+def get_bucket_policy(s3_client, bucket_name):
+    """Fetch the current bucket policy, treating a missing policy as empty"""
     try:
-        s3_client = boto3.client("s3")
         response = s3_client.get_bucket_policy(Bucket=bucket_name)
+        return json.loads(response["Policy"])
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "NoSuchBucketPolicy":
+            return {"Version": "2012-10-17", "Statement": []}
+        raise
 
-        account_ids_list = (
-            get_account_ids_lst(management_account_id)
-            if is_org
-            else [management_account_id]
-        )
-        logging.info(f"account_ids_list: {account_ids_list}")
-        account_arns_list = []
-        for account_id in account_ids_list:
-            account_arns_list.append(f'"arn:aws:logs:*:{account_id}:*"')
-        logging.info(f"account_arns_list: {account_arns_list}")
-        new_statement = """[
-            {
-                "Sid": "OrgLogDeliveryWrite",
-                "Effect": "Allow",
-                "Principal": {
-                    "Service": "delivery.logs.amazonaws.com"
-                },
-                "Action": "s3:PutObject",
-                "Resource": "$%BUCKET_ARN%$/*",
-                "Condition": {
-                    "ArnLike": {
-                        "AWS:SourceArn": [$%ACCOUNT_ARNS_LIST%$]
-                    }
-                }
-            },
-            {
-                "Sid": "OrgLogDeliveryAclCheck",
-                "Effect": "Allow",
-                "Principal": {
-                    "Service": "delivery.logs.amazonaws.com"
-                },
-                "Action": [
-                    "s3:GetBucketAcl",
-                    "s3:ListBucket"
-                ],
-                "Resource": "$%BUCKET_ARN%$",
-                "Condition": {
-                    "ArnLike": {
-                        "aws:SourceArn": [$%ACCOUNT_ARNS_LIST%$]
-                    }
-                }
-            }
+
+def update_bucket(s3_client, bucket_name, statements):
+    """Reconcile the org log delivery statements of a single bucket"""
+    try:
+        response_policy = get_bucket_policy(s3_client, bucket_name)
+        wanted_statements = render_statements_for_bucket(statements, bucket_name)
+
+        existing_statements = response_policy.get("Statement", [])
+        if isinstance(existing_statements, dict):
+            existing_statements = [existing_statements]
+
+        current_org_statements = [
+            s for s in existing_statements if s.get("Sid") in ORG_LOG_DELIVERY_SIDS
         ]
-        """.replace("$%ACCOUNT_ARNS_LIST%$", ",".join(account_arns_list)).replace(
-            "$%BUCKET_ARN%$", f"arn:aws:s3:::{bucket_name}"
-        )
-        new_statement_json = json.loads(new_statement)
-        response_policy = json.loads(response["Policy"])
+        if _normalize_statements(current_org_statements) == _normalize_statements(wanted_statements):
+            logging.info(f"[{bucket_name}] BUCKET POLICY ALREADY UP TO DATE")
+            return {"bucket": bucket_name, "status": "unchanged"}
+
         # Remove any existing org log delivery statements to avoid accumulation on daily runs
         statement_policy = [
-            s for s in response_policy["Statement"]
+            s for s in existing_statements
             if s.get("Sid") not in ORG_LOG_DELIVERY_SIDS
         ]
-        statement_policy.extend(new_statement_json)
+        statement_policy.extend(wanted_statements)
         new_policy = {}
         new_policy["Statement"] = statement_policy
         new_policy["Version"] = "2012-10-17"
 
-        response = s3_client.put_bucket_policy(
+        s3_client.put_bucket_policy(
             Bucket=bucket_name, Policy=json.dumps(new_policy)
         )
-        logging.info(response)
+        logging.info(f"[{bucket_name}] BUCKET POLICY UPDATED")
+        return {"bucket": bucket_name, "status": "updated"}
     except Exception as e:
-        logging.critical(str(e))
+        logging.critical(f"[{bucket_name}] {str(e)}")
+        return {"bucket": bucket_name, "status": "failed", "error": str(e)}
 
 
+def update_buckets(bucket_names, management_account_id, is_org):
+    """Reconcile every log bucket in parallel against one computed statement set"""
+    account_ids_list = (
+        get_account_ids_lst(management_account_id)
+        if is_org
+        else [management_account_id]
+    )
+    logging.info(f"account_ids_list: {account_ids_list}")
+    statements = build_log_delivery_statements(account_ids_list)
+
+    s3_client = boto3.client("s3")
+    results = []
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_CONCURRENT_BUCKETS, len(bucket_names))
+    ) as executor:
+        futures = [
+            executor.submit(update_bucket, s3_client, bucket_name, statements)
+            for bucket_name in bucket_names
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    order = {bucket_name: i for i, bucket_name in enumerate(bucket_names)}
+    return sorted(results, key=lambda r: order[r["bucket"]])
+
+
+@profile_handler("UpdateBucketPolicy")
 def lambda_handler(event, context):
     logging.basicConfig(
         format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
@@ -110,20 +203,30 @@ def lambda_handler(event, context):
     is_cfn_event = "RequestType" in event and "StackId" in event
     
     try:
-        logger.info("UPDATING CYNGULAR BUCKET POLICY")
+        logger.info("UPDATING CYNGULAR BUCKET POLICIES")
         is_org = os.environ["IS_ORG"].lower() == "true"
-        cyngular_bucket_name = os.environ["BUCKET_NAME"]
+        bucket_names = get_bucket_names(event)
+        logger.info(f"BUCKETS: {bucket_names}")
         mgmt_acc_id = boto3.client("sts").get_caller_identity()["Account"]
 
-        update_bucket(cyngular_bucket_name, mgmt_acc_id, is_org)
-        logger.info("DONE!")
+        results = update_buckets(bucket_names, mgmt_acc_id, is_org)
+        summary = {
+            status: sum(1 for r in results if r["status"] == status)
+            for status in ("updated", "unchanged", "failed")
+        }
+        logger.info(f"DONE! {summary}")
         
         # Send success response to CloudFormation if needed
         if is_cfn_event:
             cfnresponse.send(event, context, cfnresponse.SUCCESS, {
-                "Message": "Bucket policy updated successfully"
+                "Message": "Bucket policy updated successfully",
+                "BucketsUpdated": summary["updated"],
+                "BucketsUnchanged": summary["unchanged"],
+                "BucketsFailed": summary["failed"],
             })
 
+        return {"statusCode": 200, "body": json.dumps({"summary": summary, "results": results})}
+
     except Exception as e:
         logger.critical(str(e))
         
@@ -132,3 +235,5 @@ def lambda_handler(event, context):
             cfnresponse.send(event, context, cfnresponse.FAILED, {
                 "Message": f"Failed to update bucket policy: {str(e)}"
             })
+
+        return {"statusCode": 500, "body": json.dumps({"success": False, "error": str(e)})}
@@ -1,6 +1,345 @@
-def main():
-    print("Hello from cyngular-client-onboarding!")
+"""
+Onboard or repair one account from a workstation, without waiting for the schedule.
+
+Resolves the same configuration as the ServiceManager function (enabled regions
+minus EXCLUDED_REGIONS, services from the ENABLE_* flags), then:
+    plan  - read-only discovery, in parallel, of what every service/region task
+            would touch, printed as a resource count table
+    apply - the plan, then the ServiceManager fan-out with configurable
+            concurrency and a timing table per region and service
+
+Tasks run in this process by default (REGION_EXECUTOR=thread); --executor
+lambda-sync / lambda-async dispatch them to the deployed RegionProcessor instead.
+
+Usage:
+    python main.py plan  --client-name CLIENT --bucket BUCKET --role-arn ARN [--profile P] [--regions a,b] [--services dns,os]
+    python main.py apply --client-name CLIENT --bucket BUCKET --role-arn ARN [--concurrency 8] [--executor thread] [--yes]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+from botocore.config import Config
+
+LAMBDAS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_MANAGER_DIR = os.path.join(LAMBDAS_DIR, "Services", "ServiceManager")
+LAYER_DIR = os.path.join(LAMBDAS_DIR, "Services", "Layer", "python")
+
+DEFAULT_DISCOVERY_WORKERS = 16
+DEFAULT_CONCURRENCY = 4
+CYNGULAR_QLC_NAME = "cyngular_dns"
+CYNGULAR_FLOW_LOG_NAME = "Cyngular-vpc-flowlogs"
+
+RETRY_CONFIG = Config(retries={"max_attempts": 5, "mode": "adaptive"})
+
+
+class LocalContext:
+    """The parts of the Lambda context the ServiceManager reads"""
+
+    def __init__(self, region: str):
+        self.invoked_function_arn = f"arn:aws:lambda:{region}:000000000000:function:cyngular-local"
+        self.aws_request_id = f"local-{int(time.time())}"
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 15 * 60 * 1000
+
+
+def _count_pages(client, operation: str, key: str, **kwargs) -> int:
+    return sum(len(page.get(key, [])) for page in client.get_paginator(operation).paginate(**kwargs))
+
+
+def discover_dns(region: str) -> Dict[str, Any]:
+    """VPCs to associate with the cyngular_dns query log config"""
+    r53_client = boto3.client("route53resolver", region_name=region, config=RETRY_CONFIG)
+    ec2_client = boto3.client("ec2", region_name=region, config=RETRY_CONFIG)
+    configs = _count_pages(
+        r53_client,
+        "list_resolver_query_log_configs",
+        "ResolverQueryLogConfigs",
+        Filters=[{"Name": "Name", "Values": [CYNGULAR_QLC_NAME]}],
+    )
+    return {"vpcs": _count_pages(ec2_client, "describe_vpcs", "Vpcs"), "query_log_config": bool(configs)}
+
+
+def discover_vfl(region: str) -> Dict[str, Any]:
+    """VPCs that get flow logs, and the Cyngular flow logs already there"""
+    ec2_client = boto3.client("ec2", region_name=region, config=RETRY_CONFIG)
+    existing = _count_pages(
+        ec2_client,
+        "describe_flow_logs",
+        "FlowLogs",
+        Filters=[{"Name": "tag:Name", "Values": [CYNGULAR_FLOW_LOG_NAME]}],
+    )
+    return {"vpcs": _count_pages(ec2_client, "describe_vpcs", "Vpcs"), "flow_logs": existing}
+
+
+def discover_eks(region: str) -> Dict[str, Any]:
+    """Clusters whose logging and access entries are configured"""
+    eks_client = boto3.client("eks", region_name=region, config=RETRY_CONFIG)
+    return {"clusters": _count_pages(eks_client, "list_clusters", "clusters")}
+
+
+def discover_os(region: str) -> Dict[str, Any]:
+    """Running instances that get the auditd SSM command"""
+    ec2_client = boto3.client("ec2", region_name=region, config=RETRY_CONFIG)
+    instances = 0
+    paginator = ec2_client.get_paginator("describe_instances")
+    for page in paginator.paginate(Filters=[{"Name": "instance-state-name", "Values": ["running"]}]):
+        for reservation in page.get("Reservations", []):
+            instances += len(reservation.get("Instances", []))
+    return {"instances": instances}
+
+
+DISCOVERY: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "dns": discover_dns,
+    "vfl": discover_vfl,
+    "eks": discover_eks,
+    "os": discover_os,
+}
+
+
+def _summary(service: str, found: Dict[str, Any]) -> str:
+    if "error" in found:
+        return "error"
+    if service == "dns":
+        return f"{found['vpcs']} VPCs" + ("" if found["query_log_config"] else " (new QLC)")
+    if service == "vfl":
+        return f"{found['vpcs']} VPCs ({found['flow_logs']} logged)"
+    if service == "eks":
+        return f"{found['clusters']} clusters"
+    return f"{found['instances']} instances"
+
+
+def discover(services: List[str], regions: List[str], workers: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Read-only discovery of every service/region task in parallel: {region: {service: counts}}"""
+    tasks = [(service, region) for region in regions for service in services if service in DISCOVERY]
+
+    def run(task):
+        service, region = task
+        start_time = time.time()
+        try:
+            found = DISCOVERY[service](region)
+        except Exception as e:
+            found = {"error": str(e)}
+        found["duration_seconds"] = round(time.time() - start_time, 3)
+        return task, found
+
+    plan: Dict[str, Dict[str, Dict[str, Any]]] = {region: {} for region in regions}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for (service, region), found in executor.map(run, tasks):
+            plan[region][service] = found
+    return plan
+
+
+def _print_table(header: List[str], rows: List[List[str]]) -> None:
+    widths = [max(len(str(row[i])) for row in [header] + rows) for i in range(len(header))]
+    print("  ".join(f"{cell:<{widths[i]}}" for i, cell in enumerate(header)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(f"{str(cell):<{widths[i]}}" for i, cell in enumerate(row)))
+
+
+def print_plan(plan: Dict[str, Dict[str, Dict[str, Any]]], services: List[str], duration: float) -> None:
+    rows = [[region] + [_summary(service, found[service]) for service in services] for region, found in plan.items()]
+    print(f"\nPlan: {len(services)} services x {len(plan)} regions = {len(services) * len(plan)} tasks")
+    _print_table(["Region"] + services, rows)
+    for region, found in plan.items():
+        for service, counts in found.items():
+            if "error" in counts:
+                print(f"  discovery of {service} in {region} failed: {counts['error']}")
+    print(f"Discovered in {duration:.2f}s")
+
+
+def print_timings(results: Dict[str, Any], services: List[str]) -> None:
+    cells = {(r["region"], r["service"]): r for r in results["successful_results"] + results["failed_results"]}
+    regions = results["regions"]
+    rows = []
+    for region in regions:
+        row = [region]
+        for service in services:
+            result = cells.get((region, service))
+            if result is None:
+                row.append("deferred")
+            else:
+                row.append(f"{result.get('duration_seconds', 0):.2f}s {'ok' if result.get('success') else 'FAILED'}")
+        rows.append(row)
+    totals = ["total"]
+    for service in services:
+        durations = [cells[(region, service)].get("duration_seconds", 0) for region in regions if (region, service) in cells]
+        totals.append(f"{sum(durations):.2f}s")
+    rows.append(totals)
+
+    print(f"\nApplied with {results['executor']} x {results['max_workers']} workers")
+    _print_table(["Region"] + services, rows)
+    for result in results["failed_results"]:
+        print(f"  {result['service']} in {result['region']} failed: {result.get('error')}")
+    api_calls = results.get("api_calls", {}).get("totals", {})
+    print(
+        f"{results['services_done']}/{results['total_tasks']} tasks succeeded in {results['processing_time_seconds']}s"
+        f" ({api_calls.get('calls', 0)} API calls, {api_calls.get('throttles', 0)} throttled)"
+    )
+
+
+def _configure_environment(args) -> None:
+    """Map CLI options onto the env vars the ServiceManager reads; unset options keep the env"""
+    overrides = {
+        "CLIENT_NAME": args.client_name,
+        "CYNGULAR_BUCKET": args.bucket,
+        "CYNGULAR_ROLE_ARN": args.role_arn,
+        "EXCLUDED_REGIONS": args.exclude_regions,
+        "REGION_EXECUTOR": args.executor,
+        "REGIONAL_SERVICE_MANAGER_FUNCTION_NAME": args.function_name,
+    }
+    for name, value in overrides.items():
+        if value is not None:
+            os.environ[name] = value
+    for flag in ("dns", "eks", "vpc_flow_logs"):
+        if getattr(args, f"enable_{flag}"):
+            os.environ[f"ENABLE_{flag.upper()}"] = "true"
+    # Only the Lambda executors invoke the function
+    os.environ.setdefault("REGIONAL_SERVICE_MANAGER_FUNCTION_NAME", "cyngular-local")
+
+    missing = [name for name in ("CLIENT_NAME", "CYNGULAR_BUCKET", "CYNGULAR_ROLE_ARN") if not os.environ.get(name)]
+    if missing:
+        raise SystemExit(f"Missing configuration: {', '.join(missing)} (set the env vars or pass the options)")
+
+
+def _load_service_manager():
+    """Import the ServiceManager handler module as the function would see it"""
+    for path in (LAYER_DIR, SERVICE_MANAGER_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    import lambda_function
+
+    return lambda_function
+
+
+def build_manager(args):
+    """ServiceManager restricted to --regions / --services, with --concurrency workers"""
+    service_manager = _load_service_manager()
+
+    class LocalServiceManager(service_manager.ServiceManager):
+        def __init__(self, context, regions: Optional[List[str]], services: Optional[List[str]], concurrency: int):
+            # Read by ServiceManager.__init__ to size the executor
+            self.MAX_CONCURRENT_WORKERS = concurrency
+            self.only_regions = regions
+            self.only_services = services
+            super().__init__(context)
+
+        def get_enabled_regions(self) -> List[str]:
+            regions = super().get_enabled_regions()
+            return [r for r in regions if r in self.only_regions] if self.only_regions else regions
+
+        def get_services_to_configure(self) -> List[str]:
+            services = super().get_services_to_configure()
+            return [s for s in services if s in self.only_services] if self.only_services else services
+
+    regions = args.regions.split(",") if args.regions else None
+    services = args.services.split(",") if args.services else None
+    return LocalServiceManager(LocalContext(args.region), regions, services, args.concurrency)
+
+
+def _write_report(path: Optional[str], report: Dict[str, Any]) -> None:
+    if path:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+def _confirm(tasks: int) -> bool:
+    if not sys.stdin.isatty():
+        print("Not a terminal - pass --yes to apply")
+        return False
+    return input(f"Apply {tasks} tasks? [y/N] ").strip().lower() in ("y", "yes")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Plan and apply Cyngular onboarding for one account")
+    parser.add_argument("command", choices=["plan", "apply"])
+    parser.add_argument("--client-name", help="CLIENT_NAME")
+    parser.add_argument("--bucket", help="CYNGULAR_BUCKET receiving the logs")
+    parser.add_argument("--role-arn", help="CYNGULAR_ROLE_ARN granted EKS access")
+    parser.add_argument("--profile", help="AWS profile of the account")
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION", "us-east-1"), help="Home region")
+    parser.add_argument("--regions", help="Only these regions (comma-separated)")
+    parser.add_argument("--services", help="Only these services (comma-separated)")
+    parser.add_argument("--exclude-regions", help="EXCLUDED_REGIONS (comma-separated)")
+    parser.add_argument("--enable-dns", action="store_true", help="ENABLE_DNS=true")
+    parser.add_argument("--enable-eks", action="store_true", help="ENABLE_EKS=true")
+    parser.add_argument("--enable-vpc-flow-logs", action="store_true", help="ENABLE_VPC_FLOW_LOGS=true")
+    parser.add_argument("--discovery-workers", type=int, default=DEFAULT_DISCOVERY_WORKERS, help="Parallel discovery calls")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Tasks applied in parallel")
+    parser.add_argument(
+        "--executor",
+        default=os.environ.get("REGION_EXECUTOR", "thread"),
+        choices=["thread", "process", "lambda-sync", "lambda-async"],
+        help="Where tasks run (REGION_EXECUTOR)",
+    )
+    parser.add_argument("--function-name", help="RegionProcessor function for the lambda executors")
+    parser.add_argument("--yes", action="store_true", help="Apply without confirmation")
+    parser.add_argument(
+        "--ignore-discovery-errors", action="store_true", help="Apply even when discovery failed for some tasks"
+    )
+    parser.add_argument("--json", help="Also write the plan and results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Log the handlers' INFO messages")
+    args = parser.parse_args(argv)
+
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    logging.basicConfig(level=log_level, stream=sys.stderr)
+
+    _configure_environment(args)
+    # Before the ServiceManager import, which instruments the default session
+    boto3.setup_default_session(profile_name=args.profile, region_name=args.region)
+
+    manager = build_manager(args)
+    # RegionProcessor's services module sets the root logger to INFO on import
+    logging.getLogger().setLevel(log_level)
+    regions = manager.get_enabled_regions()
+    services = manager.get_services_to_configure()
+
+    start_time = time.time()
+    plan = discover(services, regions, args.discovery_workers)
+    print_plan(plan, services, time.time() - start_time)
+    report: Dict[str, Any] = {"regions": regions, "services": services, "plan": plan}
+    discovery_errors = [
+        f"{service}:{region}" for region, found in plan.items() for service, counts in found.items() if "error" in counts
+    ]
+    report["discovery_errors"] = discovery_errors
+
+    # A failed discovery (no credentials, missing permissions) must not look like a clean plan
+    exit_code = 2 if discovery_errors else 0
+    if args.command == "apply":
+        if discovery_errors and not args.ignore_discovery_errors:
+            print(
+                f"Discovery failed for {len(discovery_errors)} tasks - not applying "
+                "(pass --ignore-discovery-errors to apply anyway)",
+                file=sys.stderr,
+            )
+            _write_report(args.json, report)
+            return exit_code
+        if not (args.yes or _confirm(len(regions) * len(services))):
+            return 1
+        # EMF metric lines go to stderr, next to the logs, so stdout keeps the tables
+        with contextlib.redirect_stdout(sys.stderr):
+            try:
+                results = manager.process_all_services()
+            finally:
+                manager.executor.shutdown()
+                manager.metrics.flush()
+        print_timings(results, services)
+        report["results"] = results
+        exit_code = 0 if not results["failed_results"] else 2
+
+    _write_report(args.json, report)
+    return exit_code
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,575 @@
+"""
+Benchmark the RegionProcessor service handlers against a synthetic large account.
+
+A seeded in-memory account (VPCs, EKS clusters, instances per region) answers
+every AWS call the handlers make. The stand-in hooks the default boto3 session
+at before-send and returns serialized HTTP responses, so botocore's parsers,
+retry handler and the layer's API call instrumentation all run as against AWS.
+Per-call latency, random throttling and per service/region request rates are
+injected there. Pagination follows the AWS defaults, so a handler reading only
+the first page shows up as incomplete coverage.
+
+For every handler and region the tool records wall time, API calls per
+operation, throttles, retries, peak traced memory and coverage, which is the
+share of the seeded resources the handler actually configured.
+
+Usage:
+    python account_simulator.py [--preset large] [--services dns,eks] [--latency-ms 20 --throttle-rate 0.02] [--json out.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REGION_PROCESSOR_DIR = os.path.join(TOOLS_DIR, "..", "Services", "RegionProcessor")
+LAYER_DIR = os.path.join(TOOLS_DIR, "..", "Services", "Layer", "python")
+
+ACCOUNT_ID = "000000000000"
+CYNGULAR_BUCKET = "cyngular-simulated-logs"
+CYNGULAR_ROLE_ARN = f"arn:aws:iam::{ACCOUNT_ID}:role/cyngular-simulated"
+WANTED_LOG_TYPES = {"audit", "authenticator"}
+AUTH_MODES = ("API", "API_AND_CONFIG_MAP", "CONFIG_MAP")
+
+PRESETS = {
+    "small": {"vpcs": 50, "clusters": 10, "instances": 500},
+    "large": {"vpcs": 1000, "clusters": 200, "instances": 20000},
+}
+# Results per page when the caller passes no MaxResults / maxResults
+DEFAULT_PAGE_SIZES = {
+    "ListClusters": 100,
+    "ListAccessEntries": 100,
+    "ListResolverQueryLogConfigs": 100,
+    "ListResolverQueryLogConfigAssociations": 100,
+    "ListCommandInvocations": 50,
+}
+MAX_SEND_COMMAND_INSTANCES = 50
+
+
+class SimulatedError(Exception):
+    def __init__(self, code: str, message: str, status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+class SyntheticRegion:
+    """Resources of one region, seeded deterministically"""
+
+    def __init__(self, name: str, vpcs: int, clusters: int, instances: int, running_rate: float, seed: int):
+        rng = random.Random(f"{seed}:{name}")
+        self.name = name
+        self.vpcs = [f"vpc-{i:08x}" for i in range(vpcs)]
+        self.clusters = {
+            f"cluster-{i:04d}": {
+                # Half already ship some logs, a quarter already ship the wanted ones
+                "log_types": set(rng.sample(["api", "audit", "authenticator", "scheduler"], rng.randint(0, 2))),
+                "auth_mode": rng.choice(AUTH_MODES),
+                "access_entries": set(),
+            }
+            for i in range(clusters)
+        }
+        self.instances = [
+            {"id": f"i-{i:017x}", "state": "running" if rng.random() < running_rate else "stopped"}
+            for i in range(instances)
+        ]
+        self.query_log_configs: Dict[str, Dict[str, Any]] = {}
+        self.associations = set()
+        # VPC ID -> log destination, instance ID -> command comment
+        self.flow_logged: Dict[str, str] = {}
+        self.commanded: Dict[str, str] = {}
+
+    def running(self) -> List[str]:
+        return [instance["id"] for instance in self.instances if instance["state"] == "running"]
+
+    def coverage(self, service: str) -> Tuple[int, int]:
+        """(configured, total) resources for a service"""
+        if service == "dns":
+            return len(self.associations), len(self.vpcs)
+        if service == "vfl":
+            return len(self.flow_logged), len(self.vpcs)
+        if service == "eks":
+            done = sum(
+                1
+                for cluster in self.clusters.values()
+                if WANTED_LOG_TYPES <= cluster["log_types"]
+                and (cluster["auth_mode"] == "CONFIG_MAP" or CYNGULAR_ROLE_ARN in cluster["access_entries"])
+            )
+            return done, len(self.clusters)
+        running = self.running()
+        return len(self.commanded.keys() & set(running)), len(running)
+
+
+def _page(items: List[Any], params: Dict[str, Any], operation: str, token_key: str, max_key: str) -> Tuple[List[Any], Optional[str]]:
+    default = DEFAULT_PAGE_SIZES.get(operation, len(items) or 1)
+    size = int(params.get(max_key) or default)
+    start = int(params.get(token_key) or 0)
+    end = start + size
+    return items[start:end], (str(end) if end < len(items) else None)
+
+
+class AwsSimulator:
+    """Answers the handlers' AWS calls from SyntheticRegions, with injected latency and throttling"""
+
+    def __init__(
+        self,
+        regions: Dict[str, SyntheticRegion],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        throttle_rate: float = 0.0,
+        tps: float = 0.0,
+        unmanaged_rate: float = 0.0,
+        seed: int = 1,
+    ):
+        self.regions = regions
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.tps = tps
+        self.unmanaged_rate = unmanaged_rate
+        self.rng = random.Random(seed)
+        self.calls: Dict[str, int] = {}
+        self.throttled = 0
+        self._buckets: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def install(self, session=None) -> None:
+        """Answer every call of clients created from session (default boto3 session if omitted)"""
+        import boto3
+
+        if session is None:
+            session = boto3.DEFAULT_SESSION or boto3._get_default_session()
+        session.events.register("before-parameter-build", self._remember_call, unique_id="cyngular-simulator-params")
+        session.events.register("before-send", self._respond, unique_id="cyngular-simulator-send")
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.calls = {}
+            self.throttled = 0
+
+    def _remember_call(self, params=None, model=None, context=None, **kwargs) -> None:
+        # before-send only sees the serialized request; each thread makes one call at a time
+        self._local.call = (model, dict(params or {}), (context or {}).get("client_region"))
+
+    def _throttle(self, service: str, region: str) -> bool:
+        with self._lock:
+            if self.throttle_rate and self.rng.random() < self.throttle_rate:
+                return True
+            if not self.tps:
+                return False
+            # Token bucket per service and region, one second of burst
+            tokens, updated = self._buckets.get((service, region), [self.tps, time.monotonic()])
+            now = time.monotonic()
+            tokens = min(self.tps, tokens + (now - updated) * self.tps)
+            throttled = tokens < 1
+            self._buckets[(service, region)] = [tokens if throttled else tokens - 1, now]
+            return throttled
+
+    def _respond(self, request=None, **kwargs):
+        model, params, region = self._local.call
+        service = model.service_model.service_name
+        operation = model.name
+        with self._lock:
+            key = f"{service}:{operation}"
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+        delay = self.latency_ms + (self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        try:
+            if self._throttle(service, region):
+                with self._lock:
+                    self.throttled += 1
+                if service == "ec2":
+                    raise SimulatedError("RequestLimitExceeded", "Request limit exceeded.", 503)
+                raise SimulatedError("ThrottlingException", "Rate exceeded", 400)
+            handler = getattr(self, f"_{service.replace('-', '_')}_{operation}", None)
+            if handler is None:
+                raise SimulatedError("UnsupportedOperation", f"The simulator does not implement {service}:{operation}")
+            with self._lock:
+                output = handler(self.regions[region], params)
+            return _http_response(request, model, 200, output)
+        except SimulatedError as e:
+            return _http_error(request, model, e)
+
+    # EC2
+
+    def _ec2_DescribeVpcs(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        vpcs, token = _page(region.vpcs, params, "DescribeVpcs", "NextToken", "MaxResults")
+        output = {"Vpcs": [{"VpcId": vpc, "State": "available", "OwnerId": ACCOUNT_ID, "IsDefault": False} for vpc in vpcs]}
+        return {**output, "NextToken": token} if token else output
+
+    def _ec2_DescribeInstances(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        instances = region.instances
+        for state_filter in [f for f in params.get("Filters", []) if f["Name"] == "instance-state-name"]:
+            instances = [instance for instance in instances if instance["state"] in state_filter["Values"]]
+        page, token = _page(instances, params, "DescribeInstances", "NextToken", "MaxResults")
+        reservations = [
+            {
+                "ReservationId": f"r-{index:017x}",
+                "OwnerId": ACCOUNT_ID,
+                "Instances": [
+                    {"InstanceId": instance["id"], "State": {"Name": instance["state"], "Code": 16 if instance["state"] == "running" else 80}}
+                    for instance in page[index : index + 25]
+                ],
+            }
+            for index in range(0, len(page), 25)
+        ]
+        return {"Reservations": reservations, "NextToken": token} if token else {"Reservations": reservations}
+
+    def _ec2_CreateFlowLogs(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        created, unsuccessful = [], []
+        for vpc in params["ResourceIds"]:
+            if vpc in region.flow_logged:
+                unsuccessful.append({"ResourceId": vpc, "Error": {"Code": "FlowLogAlreadyExists", "Message": "already exists"}})
+            else:
+                region.flow_logged[vpc] = params["LogDestination"]
+                created.append(f"fl-{uuid.uuid4().hex[:17]}")
+        return {"FlowLogIds": created, "Unsuccessful": unsuccessful}
+
+    def _ec2_DescribeFlowLogs(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        flow_logs = [
+            {"FlowLogId": f"fl-{index:017x}", "ResourceId": vpc, "LogDestinationType": "s3", "LogDestination": destination}
+            for index, (vpc, destination) in enumerate(sorted(region.flow_logged.items()))
+        ]
+        page, token = _page(flow_logs, params, "DescribeFlowLogs", "NextToken", "MaxResults")
+        return {"FlowLogs": page, "NextToken": token} if token else {"FlowLogs": page}
+
+    # Route 53 Resolver
+
+    def _route53resolver_ListResolverQueryLogConfigs(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        configs = list(region.query_log_configs.values())
+        page, token = _page(configs, params, "ListResolverQueryLogConfigs", "NextToken", "MaxResults")
+        output = {"TotalCount": len(configs), "ResolverQueryLogConfigs": page}
+        return {**output, "NextToken": token} if token else output
+
+    def _route53resolver_ListResolverQueryLogConfigAssociations(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        config_ids = [value for f in params.get("Filters", []) if f["Name"] == "ResolverQueryLogConfigId" for value in f["Values"]]
+        associations = [
+            {"Id": f"rqlca-{index:016x}", "ResolverQueryLogConfigId": config_id, "ResourceId": vpc, "Status": "ACTIVE"}
+            for config_id in config_ids
+            if config_id in region.query_log_configs
+            for index, vpc in enumerate(sorted(region.associations))
+        ]
+        page, token = _page(associations, params, "ListResolverQueryLogConfigAssociations", "NextToken", "MaxResults")
+        output = {"TotalCount": len(associations), "ResolverQueryLogConfigAssociations": page}
+        return {**output, "NextToken": token} if token else output
+
+    def _route53resolver_CreateResolverQueryLogConfig(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        config_id = f"rqlc-{uuid.uuid4().hex[:16]}"
+        config = {"Id": config_id, "Name": params["Name"], "DestinationArn": params["DestinationArn"], "Status": "CREATED"}
+        region.query_log_configs[config_id] = config
+        return {"ResolverQueryLogConfig": config}
+
+    def _route53resolver_AssociateResolverQueryLogConfig(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        if params["ResolverQueryLogConfigId"] not in region.query_log_configs:
+            raise SimulatedError("ResourceNotFoundException", "Query log config not found")
+        if params["ResourceId"] in region.associations:
+            raise SimulatedError("ResourceInUseException", f"{params['ResourceId']} is already associated")
+        region.associations.add(params["ResourceId"])
+        return {
+            "ResolverQueryLogConfigAssociation": {
+                "Id": f"rqlca-{uuid.uuid4().hex[:16]}",
+                "ResolverQueryLogConfigId": params["ResolverQueryLogConfigId"],
+                "ResourceId": params["ResourceId"],
+                "Status": "CREATING",
+            }
+        }
+
+    # EKS
+
+    def _cluster(self, region: SyntheticRegion, name: str) -> Dict[str, Any]:
+        if name not in region.clusters:
+            raise SimulatedError("ResourceNotFoundException", f"No cluster found for name: {name}.", 404)
+        return region.clusters[name]
+
+    def _eks_ListClusters(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        names, token = _page(sorted(region.clusters), params, "ListClusters", "nextToken", "maxResults")
+        return {"clusters": names, "nextToken": token} if token else {"clusters": names}
+
+    def _eks_DescribeCluster(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        cluster = self._cluster(region, params["name"])
+        return {
+            "cluster": {
+                "name": params["name"],
+                "status": "ACTIVE",
+                "logging": {"clusterLogging": [{"types": sorted(cluster["log_types"]), "enabled": True}]},
+                "accessConfig": {"authenticationMode": cluster["auth_mode"]},
+            }
+        }
+
+    def _eks_UpdateClusterConfig(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        cluster = self._cluster(region, params["name"])
+        wanted = set()
+        for setup in params.get("logging", {}).get("clusterLogging", []):
+            if setup.get("enabled"):
+                wanted |= set(setup.get("types", []))
+        if wanted <= cluster["log_types"]:
+            raise SimulatedError("InvalidParameterException", "No changes needed for the logging config provided")
+        cluster["log_types"] |= wanted
+        return {"update": {"id": uuid.uuid4().hex, "status": "InProgress", "type": "LoggingUpdate"}}
+
+    def _eks_ListAccessEntries(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        cluster = self._cluster(region, params["clusterName"])
+        if cluster["auth_mode"] == "CONFIG_MAP":
+            raise SimulatedError(
+                "InvalidRequestException",
+                "The cluster's authentication mode must be set to one of [API, API_AND_CONFIG_MAP] to perform this operation.",
+            )
+        entries, token = _page(sorted(cluster["access_entries"]), params, "ListAccessEntries", "nextToken", "maxResults")
+        return {"accessEntries": entries, "nextToken": token} if token else {"accessEntries": entries}
+
+    def _eks_CreateAccessEntry(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        cluster = self._cluster(region, params["clusterName"])
+        if params["principalArn"] in cluster["access_entries"]:
+            raise SimulatedError("ResourceInUseException", "The specified access entry resource is already in use.", 409)
+        cluster["access_entries"].add(params["principalArn"])
+        return {"accessEntry": {"clusterName": params["clusterName"], "principalArn": params["principalArn"], "type": "STANDARD"}}
+
+    def _eks_AssociateAccessPolicy(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._cluster(region, params["clusterName"])
+        return {
+            "clusterName": params["clusterName"],
+            "principalArn": params["principalArn"],
+            "associatedAccessPolicy": {"policyArn": params["policyArn"], "accessScope": params["accessScope"]},
+        }
+
+    # SSM
+
+    def _ssm_SendCommand(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        instance_ids = params["InstanceIds"]
+        if len(instance_ids) > MAX_SEND_COMMAND_INSTANCES:
+            raise SimulatedError("ValidationException", f"InstanceIds has more than {MAX_SEND_COMMAND_INSTANCES} items")
+        # A share of the instances has no SSM agent / instance profile
+        unmanaged = [i for i in instance_ids if random.Random(i).random() < self.unmanaged_rate]
+        if unmanaged:
+            raise SimulatedError("InvalidInstanceId", f"Instances [{unmanaged}] not in a valid state for account {ACCOUNT_ID}")
+        for instance_id in instance_ids:
+            region.commanded[instance_id] = params.get("Comment", "")
+        return {"Command": {"CommandId": str(uuid.uuid4()), "DocumentName": params["DocumentName"], "InstanceIds": instance_ids, "Status": "Pending"}}
+
+
+    def _ssm_ListCommandInvocations(self, region: SyntheticRegion, params: Dict[str, Any]) -> Dict[str, Any]:
+        invocations = [
+            {"CommandId": f"{index:08x}-0000-0000-0000-000000000000", "InstanceId": instance_id, "Comment": comment, "Status": "Success"}
+            for index, (instance_id, comment) in enumerate(sorted(region.commanded.items()))
+        ]
+        page, token = _page(invocations, params, "ListCommandInvocations", "NextToken", "MaxResults")
+        return {"CommandInvocations": page, "NextToken": token} if token else {"CommandInvocations": page}
+
+
+def _xml(shape, value: Any, name: str) -> str:
+    """EC2 protocol XML for value, shaped by the botocore output model"""
+    if shape.type_name == "structure":
+        inner = "".join(
+            _xml(member, value[member_name], member.serialization.get("name", member_name))
+            for member_name, member in shape.members.items()
+            if member_name in value and value[member_name] is not None
+        )
+    elif shape.type_name == "list":
+        inner = "".join(_xml(shape.member, item, shape.member.serialization.get("name", "item")) for item in value)
+    elif shape.type_name == "boolean":
+        inner = "true" if value else "false"
+    else:
+        inner = escape(str(value))
+    return f"<{name}>{inner}</{name}>"
+
+
+def _http_response(request, model, status: int, output: Dict[str, Any]):
+    from botocore.awsrequest import AWSResponse, HeadersDict
+
+    headers = HeadersDict({"x-amzn-requestid": uuid.uuid4().hex})
+    if model.service_model.protocol == "ec2":
+        body = _xml(model.output_shape, output, f"{model.name}Response")
+        body = body.replace(f"<{model.name}Response>", f'<{model.name}Response xmlns="http://ec2.amazonaws.com/doc/2016-11-15/">', 1)
+        headers["Content-Type"] = "text/xml;charset=UTF-8"
+    else:
+        body = json.dumps(output)
+        headers["Content-Type"] = "application/x-amz-json-1.1"
+    return AWSResponse(request.url, status, headers, _RawBody(body.encode("utf-8")))
+
+
+def _http_error(request, model, error: SimulatedError):
+    from botocore.awsrequest import AWSResponse, HeadersDict
+
+    headers = HeadersDict({"x-amzn-requestid": uuid.uuid4().hex})
+    if model.service_model.protocol == "ec2":
+        body = (
+            f"<Response><Errors><Error><Code>{error.code}</Code><Message>{escape(error.message)}</Message></Error></Errors>"
+            f"<RequestID>{uuid.uuid4()}</RequestID></Response>"
+        )
+    else:
+        headers["x-amzn-ErrorType"] = error.code
+        body = json.dumps({"__type": error.code, "message": error.message})
+    return AWSResponse(request.url, error.status, headers, _RawBody(body.encode("utf-8")))
+
+
+class _RawBody:
+    """The urllib3 response surface AWSResponse reads the body from"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def stream(self, *args, **kwargs):
+        yield self.body
+
+
+def _load_region_processor():
+    for path in (LAYER_DIR, REGION_PROCESSOR_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    import lambda_function
+
+    return lambda_function
+
+
+def run_handler(service: str, region_name: str, args) -> Dict[str, Any]:
+    """Run one service handler against a freshly seeded region"""
+    from cyngular_common import budget, instrumentation
+    from cyngular_common.metrics import MetricsCollector
+    from cyngular_common.tracing import Tracer
+
+    region_processor = _load_region_processor()
+    region = SyntheticRegion(region_name, args.vpcs, args.clusters, args.instances, args.running_rate, args.seed)
+    simulator = args.simulator
+    simulator.regions = {region_name: region}
+    simulator.reset_counts()
+    instrumentation.reset()
+    budget.activate(budget.ApiBudget.from_env())
+
+    processor = region_processor.RegionProcessor(
+        region_name,
+        "simulated",
+        CYNGULAR_BUCKET,
+        CYNGULAR_ROLE_ARN,
+        MetricsCollector("simulated", "RegionalServiceManager", mode="emf"),
+        Tracer(sink=None),
+    )
+    if args.memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        result = processor.process_service(service)
+    finally:
+        wall_seconds = time.perf_counter() - start_time
+        peak = tracemalloc.get_traced_memory()[1] if args.memory else None
+        if args.memory:
+            tracemalloc.stop()
+
+    totals = instrumentation.summary()["totals"]
+    configured, total = region.coverage(service)
+    return {
+        "service": service,
+        "region": region_name,
+        "success": bool(result.get("success")),
+        "error": result.get("error"),
+        "wall_seconds": round(wall_seconds, 3),
+        "api_calls": sum(simulator.calls.values()),
+        "calls": dict(sorted(simulator.calls.items())),
+        "throttled": simulator.throttled,
+        "retries": totals["retries"],
+        "errors": totals["errors"],
+        "peak_mib": round(peak / 1024 / 1024, 2) if peak is not None else None,
+        "configured": configured,
+        "resources": total,
+    }
+
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    print(
+        f"{'Service':<8} {'Region':<12} {'Wall s':>8} {'Calls':>7} {'Throttled':>9} {'Retries':>7} "
+        f"{'Peak MiB':>9} {'Coverage':>16}  Result"
+    )
+    for row in rows:
+        peak = "-" if row["peak_mib"] is None else f"{row['peak_mib']:.2f}"
+        coverage = f"{row['configured']}/{row['resources']}"
+        if row["resources"]:
+            coverage += f" {row['configured'] / row['resources']:.0%}"
+        status = "ok" if row["success"] else f"FAILED: {row['error']}"
+        print(
+            f"{row['service']:<8} {row['region']:<12} {row['wall_seconds']:>8.2f} {row['api_calls']:>7} "
+            f"{row['throttled']:>9} {row['retries']:>7} {peak:>9} {coverage:>16}  {status}"
+        )
+    for row in rows:
+        calls = ", ".join(f"{op} {count}" for op, count in row["calls"].items())
+        print(f"  {row['service']}/{row['region']}: {calls}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the RegionProcessor handlers against a synthetic account")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small", help="Resource counts per region")
+    parser.add_argument("--vpcs", type=int, help="VPCs per region (overrides the preset)")
+    parser.add_argument("--clusters", type=int, help="EKS clusters per region (overrides the preset)")
+    parser.add_argument("--instances", type=int, help="Instances per region (overrides the preset)")
+    parser.add_argument("--running-rate", type=float, default=0.9, help="Share of instances that are running")
+    parser.add_argument("--unmanaged-rate", type=float, default=0.05, help="Share of instances SSM cannot reach")
+    parser.add_argument("--services", default="dns,vfl,eks,os", help="Handlers to run (comma-separated)")
+    parser.add_argument("--regions", default="us-east-1", help="Regions to simulate (comma-separated)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per API call attempt")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability an attempt is throttled")
+    parser.add_argument("--tps", type=float, default=0.0, help="Requests per second per service and region before throttling (0: no limit)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the account and the injected faults")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip tracemalloc (it slows handlers down)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    for name, value in PRESETS[args.preset].items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+
+    # Requests are signed before the simulator answers them - never with real credentials
+    for name, value in (("AWS_ACCESS_KEY_ID", "simulated"), ("AWS_SECRET_ACCESS_KEY", "simulated")):
+        os.environ[name] = value
+    os.environ.pop("AWS_SESSION_TOKEN", None)
+    os.environ.pop("AWS_PROFILE", None)
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("TRACE_SINK", "none")
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    _load_region_processor()
+    # The services module raises the root logger to INFO on import
+    logging.getLogger().setLevel(logging.WARNING)
+    args.simulator = AwsSimulator(
+        {}, args.latency_ms, args.jitter_ms, args.throttle_rate, args.tps, args.unmanaged_rate, args.seed
+    )
+    args.simulator.install()
+
+    # Load the service models up front so the first handler's wall time and memory exclude them
+    import boto3
+
+    for service in ("ec2", "eks", "ssm", "route53resolver"):
+        boto3.client(service, region_name=args.regions.split(",")[0])
+
+    rows = []
+    for region_name in args.regions.split(","):
+        for service in args.services.split(","):
+            rows.append(run_handler(service, region_name, args))
+
+    print(
+        f"Simulated account: {args.vpcs} VPCs, {args.clusters} clusters, {args.instances} instances per region; "
+        f"latency {args.latency_ms}+/-{args.jitter_ms} ms, throttle rate {args.throttle_rate}, tps {args.tps or 'unlimited'}"
+    )
+    print_report(rows)
+
+    if args.json:
+        settings = {k: v for k, v in vars(args).items() if k != "simulator"}
+        with open(args.json, "w") as f:
+            json.dump({"settings": settings, "results": rows}, f, indent=2)
+    return 0 if all(row["success"] for row in rows) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
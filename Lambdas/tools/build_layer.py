@@ -0,0 +1,327 @@
+"""
+Build the cyngular-onboarding Lambda layer zip, optimized for cold starts.
+
+Steps:
+    1. pip install Lambdas/Services/Layer/requirements.txt for the target runtime
+    2. copy the cyngular_common sources
+    3. drop packages the Lambda runtime already provides (boto3, botocore, ...)
+       unless an installed distribution pins their version
+    4. strip caches, tests and build leftovers
+    5. precompile .pyc with the target interpreter (unchecked-hash, so the
+       read-only Lambda filesystem never recompiles or stats sources)
+    6. write a reproducible zip and a size / import-time report
+
+The bytecode is only used when it matches the runtime's Python version, so run
+this with (or pass --python) the interpreter of CFN's PythonRuntime.
+
+Usage:
+    python build_layer.py --output layer-package/cyngular-onboarding.zip [--runtime python3.12] [--benchmark]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess  # nosec B404 - runs pip / the target interpreter only
+import sys
+import tempfile
+import zipfile
+from typing import Any, Dict, List, Optional
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+LAYER_SOURCE_DIR = os.path.join(TOOLS_DIR, "..", "Services", "Layer")
+DEFAULT_RUNTIME = "python3.12"
+PLATFORM = "manylinux2014_x86_64"
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+LAMBDA_LAYER_PATH = "/opt/python"
+
+# Import names and distributions that every Lambda Python runtime already ships
+RUNTIME_PROVIDED = {
+    "boto3": "boto3",
+    "botocore": "botocore",
+    "s3transfer": "s3transfer",
+    "jmespath": "jmespath",
+    "dateutil": "python_dateutil",
+    "six": "six",
+    "urllib3": "urllib3",
+}
+# Requirement specifiers the runtime's (unknown, moving) version may not satisfy
+PINNING_OPERATORS = ("==", "===", "~=", "<")
+STRIP_DIRS = {"__pycache__", "tests", "test", "testing", ".pytest_cache"}
+STRIP_SUFFIXES = (".pyc", ".pyo", ".pyi", ".pyx", ".c", ".h", ".cpp")
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def check_python(python: str, runtime: str) -> None:
+    """Fail early when the interpreter would compile bytecode the runtime ignores"""
+    version = subprocess.run(  # nosec B603 - fixed arguments
+        [python, "-c", "import sys; print(f'python{sys.version_info[0]}.{sys.version_info[1]}')"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    if version != runtime:
+        raise SystemExit(f"{python} is {version}, the layer targets {runtime} - pass --python for {runtime}")
+
+
+def install_requirements(python: str, runtime: str, target: str) -> None:
+    requirements = os.path.join(LAYER_SOURCE_DIR, "requirements.txt")
+    if not os.path.isfile(requirements):
+        return
+    subprocess.run(  # nosec B603 - fixed arguments
+        [
+            python, "-m", "pip", "install", "--quiet", "-r", requirements, "-t", target,
+            "--platform", PLATFORM, "--implementation", "cp", "--python-version", runtime[len("python"):],
+            "--only-binary=:all:", "--upgrade",
+        ],
+        check=True,
+    )
+
+
+def _normalize(distribution: str) -> str:
+    return re.sub(r"[-_.]+", "-", distribution).lower()
+
+
+def pinned_runtime_packages(target: str) -> Dict[str, List[str]]:
+    """
+    Runtime-provided packages that an installed distribution pins
+
+    aiobotocore (aioboto3), for example, requires one exact botocore release;
+    the runtime's botocore would break it, so such packages must stay in the
+    layer. Any exact pin or upper bound counts.
+    Returns module -> the requirements that pin it.
+    """
+    modules = {_normalize(distribution): module for module, distribution in RUNTIME_PROVIDED.items()}
+    pinned: Dict[str, List[str]] = {}
+    for entry in sorted(os.listdir(target)):
+        metadata = os.path.join(target, entry, "METADATA")
+        if not entry.endswith(".dist-info") or not os.path.isfile(metadata):
+            continue
+        # The runtime's boto3 / botocore / ... are a consistent set - their pins on each other do not count
+        if _normalize(entry.split("-", 1)[0]) in modules:
+            continue
+        with open(metadata, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.startswith("Requires-Dist:"):
+                    continue
+                requirement, _, marker = line[len("Requires-Dist:") :].strip().partition(";")
+                # Optional extras are not installed unless asked for
+                if "extra" in marker:
+                    continue
+                match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*\(?([^)]*)\)?", requirement)
+                if not match or _normalize(match.group(1)) not in modules:
+                    continue
+                if any(op in match.group(2) for op in PINNING_OPERATORS):
+                    owner = entry[: -len(".dist-info")]
+                    pinned.setdefault(modules[_normalize(match.group(1))], []).append(f"{owner}: {requirement.strip()}")
+    return pinned
+
+
+def dedupe_runtime_packages(target: str, keep: List[str]) -> Dict[str, int]:
+    """Remove packages the runtime provides; returns bytes freed per package"""
+    removed = {}
+    for entry in sorted(os.listdir(target)):
+        path = os.path.join(target, entry)
+        for module, distribution in RUNTIME_PROVIDED.items():
+            if module in keep:
+                continue
+            if entry == module or (entry.startswith(f"{distribution}-") and entry.endswith(".dist-info")):
+                size = _dir_size(path) if os.path.isdir(path) else os.path.getsize(path)
+                removed[module] = removed.get(module, 0) + size
+                shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    return removed
+
+
+def strip_tree(target: str) -> Dict[str, int]:
+    """Delete caches, tests and build leftovers; returns files and bytes removed"""
+    files, size = 0, 0
+    for root, dirs, names in os.walk(target, topdown=True):
+        for name in [d for d in dirs if d in STRIP_DIRS]:
+            path = os.path.join(root, name)
+            files += sum(len(f) for _, _, f in os.walk(path))
+            size += _dir_size(path)
+            shutil.rmtree(path)
+            dirs.remove(name)
+        for name in names:
+            if name.endswith(STRIP_SUFFIXES):
+                path = os.path.join(root, name)
+                files += 1
+                size += os.path.getsize(path)
+                os.remove(path)
+    return {"files": files, "bytes": size}
+
+
+def precompile(python: str, target: str) -> None:
+    # Record the path Lambda mounts the layer at instead of the temporary build dir, and
+    # fix the hash seed (set constants) - both keep the .pyc bytes identical across builds
+    subprocess.run(  # nosec B603 - fixed arguments
+        [
+            python, "-m", "compileall", "-q", "-j", "0", "--invalidation-mode", "unchecked-hash",
+            "-s", target, "-p", LAMBDA_LAYER_PATH, target,
+        ],
+        env=dict(os.environ, PYTHONHASHSEED="0"),
+        check=True,
+    )
+
+
+def write_zip(layer_root: str, output: str) -> None:
+    """Reproducible zip of layer_root (which holds python/): sorted, fixed timestamps and modes"""
+    paths = []
+    for root, _, names in os.walk(layer_root):
+        for name in names:
+            paths.append(os.path.join(root, name))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for path in sorted(paths, key=lambda p: os.path.relpath(p, layer_root)):
+            info = zipfile.ZipInfo(os.path.relpath(path, layer_root).replace(os.sep, "/"), date_time=ZIP_EPOCH)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.create_system = 3
+            mode = 0o755 if os.access(path, os.X_OK) else 0o644
+            info.external_attr = (0o100000 | mode) << 16
+            with open(path, "rb") as f:
+                zipf.writestr(info, f.read())
+
+
+def package_sizes(target: str) -> List[Dict[str, Any]]:
+    sizes = []
+    for entry in os.listdir(target):
+        if entry.endswith(".dist-info"):
+            continue
+        path = os.path.join(target, entry)
+        sizes.append({"package": entry, "bytes": _dir_size(path) if os.path.isdir(path) else os.path.getsize(path)})
+    return sorted(sizes, key=lambda item: item["bytes"], reverse=True)
+
+
+def layer_import_ms(python: str, target: str) -> Optional[float]:
+    """
+    Cold import time of every cyngular_common submodule from the built layer
+
+    boto3 comes from the interpreter, as it does from the Lambda runtime; when
+    the interpreter lacks it the measurement is skipped (None).
+    """
+    modules = sorted(
+        f"cyngular_common.{name[:-3]}"
+        for name in os.listdir(os.path.join(target, "cyngular_common"))
+        if name.endswith(".py") and name != "__init__.py"
+    )
+    env = dict(os.environ, PYTHONPATH=target, PYTHONDONTWRITEBYTECODE="1", AWS_DEFAULT_REGION="us-east-1")
+    completed = subprocess.run(  # nosec B603 - fixed arguments
+        [python, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr else "import failed"
+        print(f"Skipping layer import time: {error}", file=sys.stderr)
+        return None
+    total = 0
+    for line in completed.stderr.splitlines():
+        parts = line[len("import time:") :].split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[2].strip().startswith("cyngular_common"):
+            # Top-level rows only - nested rows are already in their parent's cumulative time
+            if parts[2][1:] == parts[2].strip():
+                total += int(parts[1])
+    return round(total / 1000, 1)
+
+
+def benchmark(python: str, raw_dir: str, optimized_dir: str, runs: int) -> List[Dict[str, Any]]:
+    """Median handler import time with the unoptimized and the optimized layer"""
+    sys.path.insert(0, TOOLS_DIR)
+    import import_benchmark
+
+    os.environ["PYTHONDONTWRITEBYTECODE"] = "1"  # Lambda cannot write bytecode either
+    rows = []
+    for name, handler_dir in import_benchmark.discover_handlers().items():
+        before = import_benchmark.measure(name, handler_dir, runs, raw_dir, python)
+        after = import_benchmark.measure(name, handler_dir, runs, optimized_dir, python)
+        rows.append({"handler": name, "source_layer_ms": before["median_ms"], "optimized_layer_ms": after["median_ms"]})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the optimized cyngular-onboarding Lambda layer")
+    parser.add_argument("--output", default="layer-package/cyngular-onboarding.zip", help="Layer zip to write")
+    parser.add_argument("--report", help="Report JSON path (default: <output>.report.json)")
+    parser.add_argument("--runtime", default=DEFAULT_RUNTIME, help="Lambda runtime the bytecode targets")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter matching --runtime")
+    parser.add_argument("--skip-deps", action="store_true", help="Do not pip install requirements.txt")
+    parser.add_argument("--keep", action="append", default=[], help="Runtime-provided package to keep (repeatable)")
+    parser.add_argument("--benchmark", action="store_true", help="Compare handler cold imports with the source layer")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per handler when benchmarking")
+    args = parser.parse_args(argv)
+
+    check_python(args.python, args.runtime)
+    build_dir = tempfile.mkdtemp(prefix="cyngular-layer-")
+    try:
+        target = os.path.join(build_dir, "layer", "python")
+        os.makedirs(target)
+        if not args.skip_deps:
+            install_requirements(args.python, args.runtime, target)
+        shutil.copytree(
+            os.path.join(LAYER_SOURCE_DIR, "python"),
+            target,
+            dirs_exist_ok=True,
+            ignore=shutil.ignore_patterns("__pycache__", "*.pyc"),
+        )
+        # Unoptimized copy for the benchmark - the layer used to ship bytecode of the
+        # build interpreter, which the runtime ignores, so it is left out here
+        raw_target = os.path.join(build_dir, "raw", "python")
+        if args.benchmark:
+            shutil.copytree(target, raw_target, ignore=shutil.ignore_patterns("__pycache__"))
+        source_bytes = _dir_size(target)
+
+        pinned = pinned_runtime_packages(target)
+        for module, requirements in pinned.items():
+            if module not in args.keep:
+                print(f"Keeping {module} in the layer - pinned by {'; '.join(requirements)}", file=sys.stderr)
+        deduped = dedupe_runtime_packages(target, sorted(set(args.keep) | set(pinned)))
+        stripped = strip_tree(target)
+        precompile(args.python, target)
+        write_zip(os.path.join(build_dir, "layer"), args.output)
+
+        report = {
+            "runtime": args.runtime,
+            "source_bytes": source_bytes,
+            "layer_bytes": _dir_size(target),
+            "zip_bytes": os.path.getsize(args.output),
+            "deduped_runtime_packages": deduped,
+            "pinned_runtime_packages": pinned,
+            "stripped": stripped,
+            "packages": package_sizes(target)[:15],
+            "cyngular_common_import_ms": layer_import_ms(args.python, target),
+        }
+        if args.benchmark:
+            report["benchmark"] = benchmark(args.python, raw_target, target, args.runs)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    report_path = args.report or f"{args.output}.report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    mib = 1024 * 1024
+    print(f"Layer zip: {args.output} ({report['zip_bytes'] / mib:.2f} MiB zipped, {report['layer_bytes'] / mib:.2f} MiB unzipped)")
+    print(f"Sources before optimization: {report['source_bytes'] / mib:.2f} MiB")
+    for module, size in deduped.items():
+        print(f"  deduped {module:<12} {size / mib:>8.2f} MiB (provided by the runtime)")
+    print(f"  stripped {stripped['files']} files, {stripped['bytes'] / mib:.2f} MiB")
+    if report["cyngular_common_import_ms"] is not None:
+        print(f"cyngular_common cold import: {report['cyngular_common_import_ms']} ms")
+    for row in report.get("benchmark", []):
+        print(f"  {row['handler']:<20} {row['source_layer_ms']:>8} ms -> {row['optimized_layer_ms']:>8} ms")
+    print(f"Report: {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Measure the cold import cost of every Lambda handler module.
+
+Each handler's lambda_function is imported in fresh interpreters (-X importtime)
+with the handler directory and the layer on the path, as on Lambda. The tool
+reports the median import time, the heaviest imports and the number of modules
+loaded, and fails when:
+    - a handler loads a module it must not load at import (deterministic)
+    - the median import time regressed against a saved baseline
+
+Usage:
+    python import_benchmark.py [--runs 5] [--baseline import_baseline.json] [--update-baseline] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec B404 - runs the local interpreter only
+import sys
+from typing import Any, Dict, List, Optional
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+LAYER_DIR = os.path.join(LAMBDAS_DIR, "Services", "Layer", "python")
+HANDLER_ROOTS = ("Services", "Cleaners")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_baseline.json")
+DEFAULT_RUNS = 5
+DEFAULT_TOLERANCE = 0.25
+# Timing noise on shared runners - smaller slowdowns are never flagged
+DEFAULT_MIN_DELTA_MS = 20.0
+TOP_IMPORTS = 5
+
+# Only loaded when PROFILE_MODE is set
+ALWAYS_FORBIDDEN = {"cProfile", "pstats"}
+# Layer modules a handler does not use must stay unloaded (lazy package __init__)
+UNUSED_LAYER_MODULES = {
+    "cyngular_common.metrics",
+    "cyngular_common.instrumentation",
+    "cyngular_common.tracing",
+    "cyngular_common.budget",
+    "cyngular_common.run_history",
+    "cyngular_common.structured_logging",
+}
+FORBIDDEN_MODULES = {
+    "UpdateBucketPolicy": ALWAYS_FORBIDDEN | UNUSED_LAYER_MODULES,
+    "Offboard": ALWAYS_FORBIDDEN | UNUSED_LAYER_MODULES | {"cyngular_common.cfnresponse"},
+    "RemoveDNS": ALWAYS_FORBIDDEN | UNUSED_LAYER_MODULES | {"cyngular_common.cfnresponse"},
+    "RemoveVFL": ALWAYS_FORBIDDEN | UNUSED_LAYER_MODULES | {"cyngular_common.cfnresponse"},
+    "RegionProcessor": ALWAYS_FORBIDDEN | {"cyngular_common.cfnresponse"},
+    "ServiceManager": ALWAYS_FORBIDDEN,
+}
+
+PROBE = "import lambda_function, json, sys; print(json.dumps(sorted(sys.modules)))"
+
+
+def discover_handlers() -> Dict[str, str]:
+    handlers = {}
+    for root in HANDLER_ROOTS:
+        root_dir = os.path.join(LAMBDAS_DIR, root)
+        for name in sorted(os.listdir(root_dir)):
+            if os.path.isfile(os.path.join(root_dir, name, "lambda_function.py")):
+                handlers[name] = os.path.abspath(os.path.join(root_dir, name))
+    return handlers
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of -X importtime output: module, depth, self and cumulative microseconds"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2][1:]
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip(" "))) // 2,
+                "self_us": int(parts[0]),
+                "cumulative_us": int(parts[1]),
+            }
+        )
+    return rows
+
+
+def import_once(handler_dir: str, layer_dir: str = LAYER_DIR, python: str = sys.executable) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([handler_dir, os.path.abspath(layer_dir)])
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    env.pop("PROFILE_MODE", None)
+    completed = subprocess.run(  # nosec B603 - fixed arguments
+        [python, "-X", "importtime", "-c", PROBE],
+        cwd=handler_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "import failed")
+    rows = parse_importtime(completed.stderr)
+    total = next((row["cumulative_us"] for row in rows if row["module"] == "lambda_function"), 0)
+    return {"total_us": total, "rows": rows, "modules": json.loads(completed.stdout.strip().splitlines()[-1])}
+
+
+def measure(
+    name: str, handler_dir: str, runs: int, layer_dir: str = LAYER_DIR, python: str = sys.executable
+) -> Dict[str, Any]:
+    samples = [import_once(handler_dir, layer_dir, python) for _ in range(runs)]
+    last = samples[-1]
+    # Heaviest imports made directly by the handler module
+    direct = [row for row in last["rows"] if row["depth"] == 1]
+    heaviest = sorted(direct, key=lambda row: row["cumulative_us"], reverse=True)[:TOP_IMPORTS]
+    loaded = set(last["modules"])
+    return {
+        "handler": name,
+        "median_ms": round(statistics.median(s["total_us"] for s in samples) / 1000, 1),
+        "min_ms": round(min(s["total_us"] for s in samples) / 1000, 1),
+        "module_count": len(loaded),
+        "heaviest": [{"module": row["module"], "ms": round(row["cumulative_us"] / 1000, 1)} for row in heaviest],
+        "forbidden_loaded": sorted(FORBIDDEN_MODULES.get(name, ALWAYS_FORBIDDEN) & loaded),
+    }
+
+
+def find_regressions(
+    results: List[Dict[str, Any]], baseline: Dict[str, float], tolerance: float, min_delta_ms: float
+) -> List[Dict[str, Any]]:
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["handler"])
+        if previous is None:
+            continue
+        delta = result["median_ms"] - previous
+        if result["median_ms"] > previous * (1 + tolerance) and delta >= min_delta_ms:
+            regressions.append({"handler": result["handler"], "median_ms": result["median_ms"], "baseline_ms": previous})
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    """Median import ms per handler from path ({} when it does not exist); exits on a malformed file"""
+    try:
+        with open(path, "r") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        raise SystemExit(f"invalid baseline {path}: {e} - fix it or rewrite it with --update-baseline")
+    if not isinstance(baseline, dict) or not all(
+        isinstance(value, (int, float)) and not isinstance(value, bool) for value in baseline.values()
+    ):
+        raise SystemExit(f"invalid baseline {path}: expected a JSON object of handler -> median ms")
+    return baseline
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cold imports of the Lambda handler modules")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Fresh interpreters per handler")
+    parser.add_argument("--handler", action="append", help="Only benchmark these handlers (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON of median import ms per handler")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the measured medians as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown ratio")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS, help="Ignore smaller slowdowns")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    handlers = discover_handlers()
+    if args.handler:
+        handlers = {name: path for name, path in handlers.items() if name in args.handler}
+
+    # --update-baseline also replaces an unreadable baseline, so it is not compared against
+    baseline = {} if args.update_baseline else load_baseline(args.baseline)
+    results = [measure(name, path, max(1, args.runs)) for name, path in handlers.items()]
+    regressions = find_regressions(results, baseline, args.tolerance, args.min_delta_ms)
+    forbidden = [result for result in results if result["forbidden_loaded"]]
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({result["handler"]: result["median_ms"] for result in results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    else:
+        print(f"{'Handler':<20} {'Median ms':>10} {'Min ms':>8} {'Modules':>8}  Heaviest imports")
+        for result in results:
+            heaviest = ", ".join(f"{row['module']} {row['ms']}" for row in result["heaviest"])
+            print(
+                f"{result['handler']:<20} {result['median_ms']:>10} {result['min_ms']:>8} "
+                f"{result['module_count']:>8}  {heaviest}"
+            )
+        for result in forbidden:
+            print(f"FAIL {result['handler']} loads at import: {', '.join(result['forbidden_loaded'])}")
+        for regression in regressions:
+            print(
+                f"FAIL {regression['handler']} import regressed: "
+                f"{regression['median_ms']} ms vs baseline {regression['baseline_ms']} ms"
+            )
+
+    return 2 if forbidden or (regressions and not args.update_baseline) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
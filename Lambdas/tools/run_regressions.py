@@ -0,0 +1,82 @@
+"""
+Flag run history streams whose latest run regressed against the trailing runs.
+
+Reads the history written by the ServiceManager ("runs") and RegionProcessor
+("cells/<service>/<region>") from S3 or a local directory, and reports every
+stream whose last run is slower, or failing more often, than its baseline.
+
+Usage:
+    python run_regressions.py --bucket RESULTS_BUCKET [--prefix cyngular-service-manager/history]
+    python run_regressions.py --dir /tmp/cyngular-service-manager/history
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Services", "Layer", "python"))
+
+from cyngular_common.run_history import (  # noqa: E402
+    DEFAULT_DURATION_THRESHOLD,
+    DEFAULT_FAILURE_RATE_THRESHOLD,
+    DEFAULT_WINDOW,
+    LocalRunHistory,
+    S3RunHistory,
+    find_regressions,
+)
+
+
+def scan(history_store, window: int, duration_threshold: float, failure_rate_threshold: float) -> List[Dict[str, Any]]:
+    flagged = []
+    for stream in history_store.list_streams():
+        records = history_store.read(stream)
+        if len(records) < 2:
+            continue
+        regressions = find_regressions(
+            records[:-1],
+            records[-1],
+            window=window,
+            duration_threshold=duration_threshold,
+            failure_rate_threshold=failure_rate_threshold,
+        )
+        if regressions:
+            flagged.append({"stream": stream, "run_id": records[-1].get("run_id"), "regressions": regressions})
+    return flagged
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Detect performance regressions in the run history")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--bucket", help="S3 bucket holding the run history (the stack's ResultsBucket)")
+    source.add_argument("--dir", help="Local run history directory")
+    parser.add_argument("--prefix", default="cyngular-service-manager/history", help="S3 prefix of the run history")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Trailing runs forming the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_DURATION_THRESHOLD, help="Slowdown ratio to flag")
+    parser.add_argument(
+        "--failure-threshold", type=float, default=DEFAULT_FAILURE_RATE_THRESHOLD, help="Failure rate increase to flag"
+    )
+    parser.add_argument("--json", action="store_true", help="Print findings as JSON")
+    args = parser.parse_args(argv)
+
+    history_store = S3RunHistory(args.bucket, args.prefix) if args.bucket else LocalRunHistory(args.dir)
+    flagged = scan(history_store, args.window, args.threshold, args.failure_threshold)
+
+    if args.json:
+        print(json.dumps(flagged, indent=2))
+    elif not flagged:
+        print("No regressions found")
+    else:
+        for finding in flagged:
+            for regression in finding["regressions"]:
+                print(
+                    f"{finding['stream']:<40} {regression['metric']:<18} "
+                    f"{regression['value']:>10} vs {regression['baseline']:<10} (run {finding['run_id']})"
+                )
+    # Non-zero exit lets a scheduled job alert on regressions
+    return 2 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Reconstruct a Cyngular run from exported spans.
+
+Reads span JSON lines (FileSpanSink output, or CloudWatch Logs exports of the
+ServiceManager / RegionProcessor log groups - non-span lines are skipped) and
+prints the run's critical path and a per-region timeline.
+
+Usage:
+    python trace_report.py spans.jsonl [more.jsonl ...] [--run-id RUN_ID] [--json]
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+SPAN_LOG_MARKER = "cyngular_span"
+TIMELINE_WIDTH = 60
+
+
+def read_spans(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Collect span records from files, tolerating log prefixes before the JSON"""
+    spans = []
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                if SPAN_LOG_MARKER not in line:
+                    continue
+                start = line.find("{")
+                try:
+                    record = json.loads(line[start:])
+                except ValueError:
+                    continue
+                # CloudWatch exports may wrap the line in an event with a message field
+                if SPAN_LOG_MARKER not in record and isinstance(record.get("message"), str):
+                    try:
+                        record = json.loads(record["message"])
+                    except ValueError:
+                        continue
+                if record.get(SPAN_LOG_MARKER) and record.get("end") is not None:
+                    spans.append(record)
+    return spans
+
+
+def select_run(spans: List[Dict[str, Any]], run_id: Optional[str]) -> List[Dict[str, Any]]:
+    runs = defaultdict(list)
+    for span in spans:
+        runs[span["run_id"]].append(span)
+    if run_id:
+        if run_id not in runs:
+            raise SystemExit(f"Run {run_id} not found. Runs available: {', '.join(sorted(runs))}")
+        return runs[run_id]
+    if len(runs) != 1:
+        listing = "\n".join(f"  {rid}  {len(s)} spans" for rid, s in sorted(runs.items()))
+        raise SystemExit(f"Found {len(runs)} runs - pick one with --run-id:\n{listing}")
+    return next(iter(runs.values()))
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Chain of spans from the root, following at every level the child whose subtree finished last"""
+    by_id = {span["span_id"]: span for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span.get("parent_id") in by_id:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+    if not roots:
+        return []
+
+    # Async fan-out outlives its parent span, so compare subtree ends, not span ends
+    subtree_end = {}
+
+    def finish(span: Dict[str, Any]) -> float:
+        if span["span_id"] not in subtree_end:
+            subtree_end[span["span_id"]] = max(
+                [span["end"]] + [finish(child) for child in children.get(span["span_id"], [])]
+            )
+        return subtree_end[span["span_id"]]
+
+    path = [max(roots, key=finish)]
+    while children.get(path[-1]["span_id"]):
+        path.append(max(children[path[-1]["span_id"]], key=finish))
+    return path
+
+
+def region_timeline(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """First start, last end and outcome of the work done for each region"""
+    regions = {}
+    for span in spans:
+        region = span.get("attributes", {}).get("region")
+        if not region:
+            continue
+        entry = regions.setdefault(
+            region, {"region": region, "start": span["start"], "end": span["end"], "spans": 0, "errors": 0, "services": set()}
+        )
+        entry["start"] = min(entry["start"], span["start"])
+        entry["end"] = max(entry["end"], span["end"])
+        entry["spans"] += 1
+        if span.get("status") == "error" or span.get("attributes", {}).get("success") is False:
+            entry["errors"] += 1
+        service = span.get("attributes", {}).get("service")
+        if service:
+            entry["services"].add(service)
+
+    timeline = sorted(regions.values(), key=lambda r: r["start"])
+    for entry in timeline:
+        entry["services"] = sorted(entry["services"])
+    return timeline
+
+
+def build_report(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    run_start = min(span["start"] for span in spans)
+    run_end = max(span["end"] for span in spans)
+
+    def offset(value: float) -> float:
+        return round((value - run_start) * 1000, 1)
+
+    return {
+        "run_id": spans[0]["run_id"],
+        "spans": len(spans),
+        "duration_ms": offset(run_end),
+        "critical_path": [
+            {
+                "name": span["name"],
+                "start_ms": offset(span["start"]),
+                "duration_ms": span["duration_ms"],
+                "status": span.get("status"),
+                "attributes": span.get("attributes", {}),
+            }
+            for span in critical_path(spans)
+        ],
+        "regions": [
+            {
+                "region": entry["region"],
+                "start_ms": offset(entry["start"]),
+                "end_ms": offset(entry["end"]),
+                "duration_ms": round((entry["end"] - entry["start"]) * 1000, 1),
+                "spans": entry["spans"],
+                "errors": entry["errors"],
+                "services": entry["services"],
+            }
+            for entry in region_timeline(spans)
+        ],
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"Run {report['run_id']}: {report['spans']} spans, {report['duration_ms']:.1f} ms")
+
+    print("\nCritical path:")
+    for depth, span in enumerate(report["critical_path"]):
+        attributes = " ".join(
+            f"{k}={v}" for k, v in span["attributes"].items() if k in ("service", "region", "event_type")
+        )
+        print(
+            f"  {'  ' * depth}{span['name']:<30} +{span['start_ms']:>10.1f} ms  "
+            f"{span['duration_ms']:>10.1f} ms  {span['status']:<5} {attributes}"
+        )
+
+    total = report["duration_ms"] or 1.0
+    print("\nRegion timeline:")
+    for entry in report["regions"]:
+        begin = int(entry["start_ms"] / total * TIMELINE_WIDTH)
+        width = max(1, int(entry["duration_ms"] / total * TIMELINE_WIDTH))
+        bar = " " * begin + "#" * width
+        errors = f" {entry['errors']} errors" if entry["errors"] else ""
+        print(
+            f"  {entry['region']:<16} |{bar:<{TIMELINE_WIDTH}}| "
+            f"+{entry['start_ms']:.0f}..{entry['end_ms']:.0f} ms {','.join(entry['services'])}{errors}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Critical path and per-region timeline of a traced run")
+    parser.add_argument("paths", nargs="+", help="Span JSONL files or CloudWatch Logs exports")
+    parser.add_argument("--run-id", help="Run to report on (required when the input holds several)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    spans = read_spans(args.paths)
+    if not spans:
+        print("No spans found", file=sys.stderr)
+        return 1
+
+    report = build_report(select_run(spans, args.run_id))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())